@@ -0,0 +1,81 @@
+"""
+Compare a Unix domain socket with loopback TCP against the fake server of the package.
+
+Run from the repository root:
+
+    python -m benchmarks.unix_socket --requests 1000 --tokens 20000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from typing import Optional
+
+from ollama_python.endpoints.generate import GenerateAPI
+from ollama_python.fakeserver import FakeServer, chunk
+
+COMPLETION = {
+    **chunk("Hello", done=True),
+    "context": [1],
+    "total_duration": 1,
+    "load_duration": 1,
+    "prompt_eval_duration": 1,
+    "eval_count": 1,
+    "eval_duration": 1,
+}
+
+
+def request_latencies(base_url: str, count: int) -> list[float]:
+    api = GenerateAPI(model="test-model", base_url=base_url)
+    api.generate(prompt="warm up")
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        api.generate(prompt="test")
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def tokens_per_second(base_url: str) -> float:
+    api = GenerateAPI(model="test-model", base_url=base_url)
+    start = time.perf_counter()
+    count = sum(1 for _ in api.generate(prompt="test", stream=True))
+    return count / (time.perf_counter() - start)
+
+
+def measure(args: argparse.Namespace, unix_socket: Optional[str] = None) -> dict:
+    with FakeServer(chunks=[COMPLETION], unix_socket=unix_socket) as server:
+        latencies = request_latencies(server.base_url, args.requests)
+    tokens = [chunk(" token") for _ in range(args.tokens)] + [chunk("", done=True)]
+    with FakeServer(chunks=tokens, unix_socket=unix_socket) as server:
+        rate = tokens_per_second(server.base_url)
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": statistics.quantiles(latencies, n=100)[98] * 1000,
+        "tokens_per_second": rate,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--tokens", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = {
+            "tcp": measure(args),
+            "unix": measure(args, os.path.join(directory, "ollama.sock")),
+        }
+
+    print(f"{'transport':<10}{'p50 ms':>10}{'p99 ms':>10}{'tokens/s':>12}")
+    for name, result in results.items():
+        print(
+            f"{name:<10}{result['p50_ms']:>10.3f}{result['p99_ms']:>10.3f}"
+            f"{result['tokens_per_second']:>12.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
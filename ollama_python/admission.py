@@ -0,0 +1,202 @@
+"""Priority-aware admission control for requests sent to Ollama hosts"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from ollama_python.models.metrics import AdmissionStats, LaneStats
+
+
+class _Waiter:
+    """A request waiting for a slot"""
+
+    def __init__(self, host: str, model: Optional[str], lane: str, tag: float):
+        self.host = host
+        self.model = model
+        self.lane = lane
+        self.tag = tag
+        self.granted = False
+        self.enqueued_at = time.monotonic()
+
+
+class _Lane:
+    """The queue and statistics of one priority lane"""
+
+    def __init__(self, weight: float):
+        self.weight = weight
+        self.finish_tag = 0.0
+        self.queued = 0
+        self.admitted = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+
+class AdmissionController:
+    """
+    Limit the requests in flight per host and per model on each host, and share the free
+    slots between priority lanes with weighted fair queuing.
+
+    Each waiting request gets a virtual finish tag of ``1 / weight`` past the previous request of
+    its lane, and a free slot goes to the waiter with the lowest tag that fits within the
+    limits. With the default weights interactive requests get four slots for every bulk one
+    while both lanes are backlogged, and bulk work still progresses.
+    """
+
+    def __init__(
+        self,
+        max_per_host: int = 4,
+        max_per_model: Optional[int] = None,
+        lanes: Optional[dict[str, float]] = None,
+    ):
+        """
+        Initialize the admission controller
+        :param max_per_host: The largest number of requests in flight to one host
+        :param max_per_model: The largest number of requests in flight for one model on one host
+        :param lanes: The priority lanes and their weights, defaults to {"interactive": 4, "bulk": 1}
+        """
+        lanes = lanes if lanes is not None else {"interactive": 4, "bulk": 1}
+        if max_per_host < 1 or (max_per_model is not None and max_per_model < 1):
+            raise ValueError("Concurrency limits must be at least 1")
+        if not lanes or any(weight <= 0 for weight in lanes.values()):
+            raise ValueError("Lane weights must be positive")
+
+        self.max_per_host = max_per_host
+        self.max_per_model = max_per_model
+        self._lanes = {name: _Lane(weight) for name, weight in lanes.items()}
+        self._cond = threading.Condition()
+        self._waiters: list[_Waiter] = []
+        self._virtual_time = 0.0
+        self._host_in_flight: dict[str, int] = {}
+        self._model_in_flight: dict[tuple[str, Optional[str]], int] = {}
+
+    def acquire(
+        self,
+        host: str,
+        model: Optional[str] = None,
+        lane: str = "interactive",
+        timeout: Optional[float] = None,
+    ) -> None:
+        """
+        Wait for a slot on the given host
+        :param host: The host the request is sent to
+        :param model: The model of the request, None for requests without one
+        :param lane: The priority lane of the request
+        :param timeout: The longest time in seconds to wait, waits forever when omitted
+        :raises TimeoutError: If no slot was granted within the timeout
+        """
+        if lane not in self._lanes:
+            raise ValueError(
+                f"Unknown lane {lane!r}, expected one of {list(self._lanes)}"
+            )
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            queue = self._lanes[lane]
+            queue.finish_tag = (
+                max(self._virtual_time, queue.finish_tag) + 1 / queue.weight
+            )
+            waiter = _Waiter(host, model, lane, queue.finish_tag)
+            self._waiters.append(waiter)
+            queue.queued += 1
+            self._dispatch()
+
+            while not waiter.granted:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._waiters.remove(waiter)
+                    queue.queued -= 1
+                    queue.timeouts += 1
+                    raise TimeoutError(f"No slot on {host} within {timeout} seconds")
+                self._cond.wait(remaining)
+
+            waited = time.monotonic() - waiter.enqueued_at
+            queue.wait_seconds += waited
+            queue.max_wait_seconds = max(queue.max_wait_seconds, waited)
+
+    def release(self, host: str, model: Optional[str] = None) -> None:
+        """
+        Free the slot taken by a finished request
+        :param host: The host the request was sent to
+        :param model: The model of the request
+        """
+        with self._cond:
+            self._host_in_flight[host] -= 1
+            self._model_in_flight[(host, model)] -= 1
+            self._dispatch()
+
+    @contextmanager
+    def slot(
+        self,
+        host: str,
+        model: Optional[str] = None,
+        lane: str = "interactive",
+        timeout: Optional[float] = None,
+    ) -> Iterator[None]:
+        """
+        Hold a slot for the duration of the block
+        :param host: The host the request is sent to
+        :param model: The model of the request
+        :param lane: The priority lane of the request
+        :param timeout: The longest time in seconds to wait for the slot
+        """
+        self.acquire(host=host, model=model, lane=lane, timeout=timeout)
+        try:
+            yield
+        finally:
+            self.release(host=host, model=model)
+
+    def stats(self) -> AdmissionStats:
+        """
+        Get a snapshot of the queue depths, wait times and requests in flight
+        :return: The admission statistics
+        """
+        with self._cond:
+            return AdmissionStats(
+                lanes=[
+                    LaneStats(
+                        lane=name,
+                        weight=lane.weight,
+                        queued=lane.queued,
+                        admitted=lane.admitted,
+                        timeouts=lane.timeouts,
+                        mean_wait_seconds=(
+                            lane.wait_seconds / lane.admitted if lane.admitted else 0.0
+                        ),
+                        max_wait_seconds=lane.max_wait_seconds,
+                    )
+                    for name, lane in self._lanes.items()
+                ],
+                in_flight={
+                    host: count for host, count in self._host_in_flight.items() if count
+                },
+            )
+
+    def _fits(self, waiter: _Waiter) -> bool:
+        if self._host_in_flight.get(waiter.host, 0) >= self.max_per_host:
+            return False
+        return (
+            self.max_per_model is None
+            or self._model_in_flight.get((waiter.host, waiter.model), 0)
+            < self.max_per_model
+        )
+
+    def _dispatch(self) -> None:
+        """Grant free slots to the waiters with the lowest finish tags, the lock must be held"""
+        granted = False
+        for waiter in sorted(self._waiters, key=lambda w: w.tag):
+            if not self._fits(waiter):
+                continue
+            self._waiters.remove(waiter)
+            waiter.granted = granted = True
+            self._virtual_time = max(self._virtual_time, waiter.tag)
+            self._host_in_flight[waiter.host] = (
+                self._host_in_flight.get(waiter.host, 0) + 1
+            )
+            key = (waiter.host, waiter.model)
+            self._model_in_flight[key] = self._model_in_flight.get(key, 0) + 1
+            lane = self._lanes[waiter.lane]
+            lane.queued -= 1
+            lane.admitted += 1
+        if granted:
+            self._cond.notify_all()
@@ -0,0 +1,217 @@
+"""Rolling server-side performance analytics built from the timings of completions"""
+import math
+import threading
+import time
+from typing import Callable, Generator, Iterator, Optional
+
+from ollama_python.models.metrics import (
+    DistributionStats,
+    ModelPerformanceStats,
+    PerformanceStats,
+)
+
+# Buckets grow by 10%, so a quantile estimated at the middle of its bucket is within 5%
+_GROWTH = 1.1
+_LOG_GROWTH = math.log(_GROWTH)
+# Clamping the bucket index bounds every histogram to 401 buckets, covering about 1e-8 to 1e8
+_MAX_BUCKET = 200
+_METRICS = ("prompt_tokens_per_second", "generation_tokens_per_second", "queue_seconds")
+
+
+class _Histogram:
+    """Counts of samples in logarithmic buckets"""
+
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self):
+        self.counts: dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value: float) -> None:
+        # Zero (e.g. no queueing at all) lands in the lowest bucket
+        bucket = (
+            max(
+                -_MAX_BUCKET,
+                min(_MAX_BUCKET, math.floor(math.log(value) / _LOG_GROWTH)),
+            )
+            if value > 0
+            else -_MAX_BUCKET
+        )
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+
+    def merge(self, other: "_Histogram") -> None:
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.count += other.count
+        self.total += other.total
+
+    def quantile(self, q: float) -> float:
+        rank = q * self.count
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                break
+        return _GROWTH ** (bucket + 0.5)
+
+    def summary(self) -> DistributionStats:
+        if not self.count:
+            return DistributionStats()
+        return DistributionStats(
+            count=self.count,
+            mean=self.total / self.count,
+            p50=self.quantile(0.5),
+            p90=self.quantile(0.9),
+            p99=self.quantile(0.99),
+        )
+
+
+class _Slot:
+    """The samples of one host and model recorded during one slice of the window"""
+
+    __slots__ = ("epoch", "requests", "loads", "histograms")
+
+    def __init__(self, epoch: int):
+        self.epoch = epoch
+        self.requests = 0
+        self.loads = 0
+        self.histograms = {name: _Histogram() for name in _METRICS}
+
+
+class PerformanceTracker:
+    """
+    Aggregate the timings reported by final completions into rolling, constant-memory histograms
+    per host and model: prompt and generation tokens per second, the time spent queueing (the
+    total duration minus the load, prompt evaluation and generation durations) and how often
+    the model had to be loaded.
+
+    The window is split into ``slots`` slices that are recycled as time moves on, and each
+    histogram has a bounded number of logarithmic buckets, so memory does not grow with traffic.
+    Attach a tracker to a GenerateAPI with ``analytics=`` or feed it with :meth:`record`.
+    """
+
+    def __init__(
+        self,
+        window: float = 300.0,
+        slots: int = 10,
+        load_threshold: float = 0.5,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the tracker
+        :param window: The length in seconds of the rolling window
+        :param slots: The number of slices the window is split into, samples expire one slice at a time
+        :param load_threshold: A load_duration in seconds above which a completion counts as a model load
+        :param clock: The clock used to place samples in the window, in seconds
+        """
+        if window <= 0 or slots < 1:
+            raise ValueError("window must be positive and slots at least 1")
+
+        self.window = window
+        self.slots = slots
+        self.load_threshold = load_threshold
+        self.clock = clock
+        self._slot_seconds = window / slots
+        self._series: dict[tuple[str, str], list[Optional[_Slot]]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, completion, base_url: str) -> bool:
+        """
+        Record the timings of a completion
+        :param completion: A Completion, ChatCompletion or the final chunk of a stream
+        :param base_url: The base URL of the host that served it
+        :return: Whether the completion carried timings, intermediate stream chunks do not
+        """
+        total = completion.total_duration
+        load = completion.load_duration
+        prompt_eval = completion.prompt_eval_duration or 0
+        evaluation = completion.eval_duration or 0
+        if not completion.done or total is None or load is None:
+            return False
+
+        samples = {
+            "queue_seconds": max(0, total - load - prompt_eval - evaluation) / 1e9
+        }
+        if completion.prompt_eval_count and prompt_eval:
+            samples["prompt_tokens_per_second"] = (
+                completion.prompt_eval_count / prompt_eval * 1e9
+            )
+        if completion.eval_count and evaluation:
+            samples["generation_tokens_per_second"] = (
+                completion.eval_count / evaluation * 1e9
+            )
+
+        epoch = int(self.clock() // self._slot_seconds)
+        with self._lock:
+            series = self._series.setdefault(
+                (base_url.rstrip("/"), completion.model), [None] * self.slots
+            )
+            slot = series[epoch % self.slots]
+            if slot is None or slot.epoch != epoch:
+                slot = series[epoch % self.slots] = _Slot(epoch)
+            slot.requests += 1
+            slot.loads += load >= self.load_threshold * 1e9
+            for name, value in samples.items():
+                slot.histograms[name].add(value)
+        return True
+
+    def track(self, stream: Iterator, base_url: str) -> Generator:
+        """
+        Record the final chunk of a stream as it passes through
+        :param stream: A stream of completions
+        :param base_url: The base URL of the host that serves it
+        :return: A generator that yields the items of the stream
+        """
+        try:
+            for item in stream:
+                if item.done:
+                    self.record(item, base_url)
+                yield item
+        finally:
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+
+    def stats(
+        self, base_url: Optional[str] = None, model: Optional[str] = None
+    ) -> PerformanceStats:
+        """
+        Get a snapshot of the window, e.g. for a router picking the fastest host
+        :param base_url: Only include this host, all hosts when omitted
+        :param model: Only include this model, all models when omitted
+        :return: The statistics of every host and model with completions in the window
+        """
+        oldest = int(self.clock() // self._slot_seconds) - self.slots + 1
+        models = []
+        with self._lock:
+            for (host, name), series in self._series.items():
+                if base_url is not None and host != base_url.rstrip("/"):
+                    continue
+                if model is not None and name != model:
+                    continue
+                live = [slot for slot in series if slot and slot.epoch >= oldest]
+                requests = sum(slot.requests for slot in live)
+                if not requests:
+                    continue
+                loads = sum(slot.loads for slot in live)
+                merged = {metric: _Histogram() for metric in _METRICS}
+                for slot in live:
+                    for metric, histogram in slot.histograms.items():
+                        merged[metric].merge(histogram)
+                models.append(
+                    ModelPerformanceStats(
+                        base_url=host,
+                        model=name,
+                        requests=requests,
+                        loads=loads,
+                        load_rate=loads / requests,
+                        **{
+                            metric: histogram.summary()
+                            for metric, histogram in merged.items()
+                        },
+                    )
+                )
+        return PerformanceStats(window_seconds=self.window, models=models)
@@ -0,0 +1,337 @@
+"""Audit log of requests and responses, written off the request path"""
+import contextlib
+import gzip
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Literal, Optional
+
+from ollama_python.models.metrics import AuditLogStats
+
+Overflow = Literal["drop_newest", "drop_oldest", "block"]
+
+
+class AuditRecord:
+    """The request and response of one call, filled in while the call runs"""
+
+    __slots__ = (
+        "id",
+        "started",
+        "base_url",
+        "endpoint",
+        "body",
+        "status",
+        "response",
+        "chunks",
+        "raw",
+        "error",
+        "duration",
+    )
+
+    def __init__(self, id: int, base_url: str, endpoint: str, body: Optional[dict]):
+        self.id = id
+        self.started = time.time()
+        self.base_url = base_url
+        self.endpoint = endpoint
+        self.body = body
+        self.status: Optional[int] = None
+        # The response body of a blocking call, the parsed chunks of a stream or the raw bytes of a passthrough stream
+        self.response: Optional[bytes] = None
+        self.chunks: list[dict] = []
+        self.raw: list[bytes] = []
+        self.error: Optional[str] = None
+        self.duration: Optional[float] = None
+
+    def to_json(self) -> str:
+        """
+        Serialize the record as one JSON line
+        :return: The JSON text of the record
+        """
+        entry: dict[str, Any] = {
+            "id": self.id,
+            "time": self.started,
+            "duration": self.duration,
+            "base_url": self.base_url,
+            "endpoint": self.endpoint,
+            "request": self.body,
+            "status": self.status,
+        }
+        if self.response is not None:
+            text = self.response.decode("utf-8", "replace")
+            try:
+                entry["response"] = json.loads(text)
+            except ValueError:
+                entry["response"] = text
+        if self.chunks:
+            entry["chunks"] = self.chunks
+        if self.raw:
+            entry["raw"] = b"".join(self.raw).decode("utf-8", "replace")
+        if self.error is not None:
+            entry["error"] = self.error
+        return json.dumps(entry, default=_encode)
+
+
+def _encode(value: Any) -> Any:
+    """Serialize the values json cannot, e.g. a MessageHistory"""
+    if hasattr(value, "encoded"):
+        return json.loads(value.encoded())
+    if isinstance(value, bytes):
+        return value.decode("utf-8", "replace")
+    return str(value)
+
+
+class _SentJSON:
+    """JSON text recorded as it was sent"""
+
+    __slots__ = ("text",)
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def encoded(self) -> str:
+        return self.text
+
+
+class AuditLog:
+    """
+    Record the body of every request and the raw response or stream chunks of a client, passed
+    to an endpoint as ``audit=``.
+
+    Calls only append their record to a bounded in-memory queue when they finish. A background
+    thread serializes the queued records and appends them in batches of up to ``batch_size`` to
+    gzip-compressed JSONL files in ``directory``, one gzip member per batch, flushing at least
+    every ``flush_interval`` seconds. A file is rotated once it reaches ``max_file_bytes`` and
+    only the newest ``max_files`` files are kept.
+
+    When ``max_queue`` records are waiting, ``overflow`` decides: ``drop_newest`` (the default)
+    discards the new record, ``drop_oldest`` discards the oldest queued record and ``block``
+    makes the finishing call wait for room. Dropped records are counted in :meth:`stats`.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        prefix: str = "audit",
+        max_queue: int = 10000,
+        overflow: Overflow = "drop_newest",
+        batch_size: int = 256,
+        flush_interval: float = 1.0,
+        max_file_bytes: int = 64 * 1024 * 1024,
+        max_files: Optional[int] = None,
+        compresslevel: int = 6,
+    ):
+        """
+        Initialize the audit log
+        :param directory: The directory of the log files, created if missing
+        :param prefix: The prefix of the log file names
+        :param max_queue: The number of records that may wait for the writer
+        :param overflow: "drop_newest", "drop_oldest" or "block", what happens to a record when the queue is full
+        :param batch_size: The largest number of records written at once
+        :param flush_interval: The longest time in seconds a record waits for its batch to fill
+        :param max_file_bytes: The compressed size from which the next batch goes to a new file
+        :param max_files: The number of files to keep, the oldest are deleted, None keeps every file
+        :param compresslevel: The gzip compression level
+        """
+        if overflow not in ("drop_newest", "drop_oldest", "block"):
+            raise ValueError('overflow must be "drop_newest", "drop_oldest" or "block"')
+        if max_queue < 1 or batch_size < 1:
+            raise ValueError("max_queue and batch_size must be at least 1")
+        if max_files is not None and max_files < 1:
+            raise ValueError("max_files must be at least 1")
+
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.prefix = prefix
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_file_bytes = max_file_bytes
+        self.max_files = max_files
+        self.compresslevel = compresslevel
+
+        self._queue: deque[AuditRecord] = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._writing = False
+        self._thread: Optional[threading.Thread] = None
+        self._ids = itertools.count(1)
+        self._files: list[str] = []
+        self._file_numbers = itertools.count()
+        self._file_bytes = 0
+        self._submitted = 0
+        self._written = 0
+        self._dropped = 0
+        self._batches = 0
+        self._bytes_written = 0
+        self._write_errors = 0
+
+    def begin(
+        self, base_url: str, endpoint: str, parameters: Optional[dict]
+    ) -> AuditRecord:
+        """
+        Start the record of a call
+        :param base_url: The base URL the request is sent to
+        :param endpoint: The endpoint of the request
+        :param parameters: The parameters sent, copied so later changes by the caller are not recorded
+        :return: The record to fill in and submit
+        """
+        body = None
+        if parameters is not None:
+            # A MessageHistory is recorded as the JSON it sent, it may grow before the record is written
+            body = {
+                key: _SentJSON(value.encoded()) if hasattr(value, "encoded") else value
+                for key, value in parameters.items()
+            }
+        return AuditRecord(next(self._ids), base_url, endpoint, body)
+
+    def submit(self, record: AuditRecord) -> None:
+        """
+        Queue a finished record for the writer, applying the overflow policy when the queue is full
+        :param record: The record of the call
+        """
+        record.duration = time.time() - record.started
+        with self._cond:
+            self._submitted += 1
+            if self._closed:
+                self._dropped += 1
+                return
+            if len(self._queue) >= self.max_queue:
+                if self.overflow == "drop_newest":
+                    self._dropped += 1
+                    return
+                if self.overflow == "drop_oldest":
+                    self._queue.popleft()
+                    self._dropped += 1
+                else:
+                    self._start()
+                    while len(self._queue) >= self.max_queue and not self._closed:
+                        self._cond.wait()
+                    if self._closed:
+                        self._dropped += 1
+                        return
+            self._queue.append(record)
+            self._start()
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued record has been written
+        :param timeout: The longest time in seconds to wait, waits forever when omitted
+        :return: Whether the queue was written within the timeout
+        """
+        with self._cond:
+            self._cond.notify_all()
+            return self._cond.wait_for(
+                lambda: not self._queue and not self._writing, timeout
+            )
+
+    def close(self) -> None:
+        """Write the queued records and stop the background thread"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "AuditLog":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def files(self) -> list[str]:
+        """The paths of the kept log files, oldest first"""
+        with self._cond:
+            return list(self._files)
+
+    def stats(self) -> AuditLogStats:
+        """
+        Get a snapshot of the audit log
+        :return: The audit log statistics
+        """
+        with self._cond:
+            return AuditLogStats(
+                overflow=self.overflow,
+                queued=len(self._queue),
+                submitted=self._submitted,
+                written=self._written,
+                dropped=self._dropped,
+                batches=self._batches,
+                files=len(self._files),
+                bytes_written=self._bytes_written,
+                write_errors=self._write_errors,
+            )
+
+    def _start(self) -> None:
+        """Start the writer thread on first use, the lock must be held"""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="ollama-audit-writer", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._closed and len(self._queue) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                if not self._queue:
+                    if self._closed:
+                        return
+                    continue
+                batch = [
+                    self._queue.popleft()
+                    for _ in range(min(self.batch_size, len(self._queue)))
+                ]
+                self._writing = True
+                # Room was made for calls blocked by the overflow policy
+                self._cond.notify_all()
+            try:
+                size = self._write(batch)
+            except Exception:
+                size = None
+            with self._cond:
+                self._writing = False
+                if size is None:
+                    self._write_errors += 1
+                    self._dropped += len(batch)
+                else:
+                    self._written += len(batch)
+                    self._batches += 1
+                    self._bytes_written += size
+                self._cond.notify_all()
+
+    def _write(self, batch: list[AuditRecord]) -> int:
+        """Append a batch to the current file as one gzip member, return the compressed size"""
+        lines = "".join(f"{record.to_json()}\n" for record in batch).encode()
+        data = gzip.compress(lines, compresslevel=self.compresslevel)
+        if not self._files or self._file_bytes >= self.max_file_bytes:
+            self._rotate()
+        with open(self._files[-1], "ab") as file:
+            file.write(data)
+        self._file_bytes += len(data)
+        return len(data)
+
+    def _rotate(self) -> None:
+        """Start a new file and delete the oldest ones beyond max_files"""
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+        path = os.path.join(
+            self.directory,
+            f"{self.prefix}-{stamp}-{next(self._file_numbers):06d}.jsonl.gz",
+        )
+        with self._cond:
+            self._files.append(path)
+            removed = []
+            if self.max_files is not None:
+                removed = self._files[: -self.max_files]
+                del self._files[: -self.max_files]
+        self._file_bytes = 0
+        for old in removed:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(old)
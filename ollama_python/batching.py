@@ -0,0 +1,240 @@
+"""Micro-batching of online embedding requests"""
+import json
+import math
+import threading
+import time
+from concurrent.futures import Future
+from typing import Optional
+
+from requests.exceptions import HTTPError
+
+from ollama_python.endpoints.embedding import EmbeddingAPI
+from ollama_python.models.embedding import Embedding
+from ollama_python.models.metrics import BatcherStats
+
+
+def _normalized(embedding: list[float]) -> list[float]:
+    """Scale an embedding to unit length, as the batch endpoint returns them"""
+    norm = math.sqrt(sum(value * value for value in embedding))
+    return [value / norm for value in embedding] if norm else embedding
+
+
+class _Pending:
+    """A queued embedding request"""
+
+    def __init__(self, prompt: str, options: Optional[dict], options_key: str):
+        self.prompt = prompt
+        self.options = options
+        self.options_key = options_key
+        self.future: Future = Future()
+
+
+class EmbeddingBatcher:
+    """
+    Queue individual embedding requests from many threads and send them as one request to the
+    batch ``embed`` endpoint.
+
+    A batch is flushed once ``max_batch_size`` requests are queued or the oldest request has
+    waited ``max_wait`` seconds. When requests arrive further apart than ``max_wait`` waiting
+    cannot grow the batch, so the window is skipped and sparse traffic pays no extra latency.
+    Servers without the batch endpoint are detected on the first 404 and every request then
+    goes to the single-prompt ``embedding`` endpoint directly. Its embeddings are normalized to
+    unit length like those of the batch endpoint, so results do not depend on the endpoint.
+    """
+
+    def __init__(
+        self,
+        api: EmbeddingAPI,
+        max_batch_size: int = 32,
+        max_wait: float = 0.005,
+    ):
+        """
+        Initialize the embedding batcher
+        :param api: The embedding API used to send the requests
+        :param max_batch_size: The largest number of inputs sent in one request
+        :param max_wait: The longest time in seconds a request waits for its batch to fill
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+
+        self.api = api
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batch_supported: Optional[bool] = None
+
+        self._queue: list[_Pending] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._last_arrival: Optional[float] = None
+        self._interarrival: Optional[float] = None
+        self._requests = 0
+        self._batches = 0
+        self._batched_inputs = 0
+        self._fallbacks = 0
+
+    def submit(self, prompt: str, options: Optional[dict] = None) -> Future:
+        """
+        Queue an embedding request
+        :param prompt: The prompt to get the embedding for
+        :param options: Additional model parameters listed in the documentation for the Modelfile such as temperature
+        :return: A future resolving to the Embedding
+        """
+        pending = _Pending(prompt, options, json.dumps(options, sort_keys=True))
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("The batcher is closed")
+            self._requests += 1
+            if self.batch_supported is not False:
+                self._record_arrival(time.monotonic())
+                self._queue.append(pending)
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="ollama-embedding-batcher", daemon=True
+                    )
+                    self._thread.start()
+                self._cond.notify_all()
+                return pending.future
+        return self._single(prompt, options)
+
+    def get_embedding(self, prompt: str, options: Optional[dict] = None) -> Embedding:
+        """
+        Get the embedding for the given prompt, a drop-in replacement for EmbeddingAPI.get_embedding
+        :param prompt: The prompt to get the embedding for
+        :param options: Additional model parameters listed in the documentation for the Modelfile such as temperature
+        :return: The embedding
+        """
+        return self.submit(prompt=prompt, options=options).result()
+
+    def close(self) -> None:
+        """Flush the queued requests and stop the background thread"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "EmbeddingBatcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def stats(self) -> BatcherStats:
+        """
+        Get a snapshot of the batcher
+        :return: The batcher statistics
+        """
+        with self._cond:
+            return BatcherStats(
+                requests=self._requests,
+                batches=self._batches,
+                batched_inputs=self._batched_inputs,
+                fallbacks=self._fallbacks,
+                queued=len(self._queue),
+                mean_batch_size=(
+                    self._batched_inputs / self._batches if self._batches else 0.0
+                ),
+                batch_supported=self.batch_supported,
+            )
+
+    def _record_arrival(self, now: float) -> None:
+        """Track an exponentially weighted mean of the time between requests"""
+        if self._last_arrival is not None:
+            gap = now - self._last_arrival
+            self._interarrival = (
+                gap
+                if self._interarrival is None
+                else 0.8 * self._interarrival + 0.2 * gap
+            )
+        self._last_arrival = now
+
+    def _linger(self) -> float:
+        """How long to wait for the batch to fill, zero when traffic is too sparse to help"""
+        if self._interarrival is None or self._interarrival > self.max_wait:
+            return 0.0
+        return self.max_wait
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                deadline = time.monotonic() + self._linger()
+                while len(self._queue) < self.max_batch_size and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._take_batch()
+            self._flush(batch)
+
+    def _take_batch(self) -> list[_Pending]:
+        """Take up to max_batch_size queued requests sharing the options of the oldest one"""
+        options_key = self._queue[0].options_key
+        batch, rest = [], []
+        for pending in self._queue:
+            if pending.options_key == options_key and len(batch) < self.max_batch_size:
+                batch.append(pending)
+            else:
+                rest.append(pending)
+        self._queue = rest
+        return batch
+
+    def _flush(self, batch: list[_Pending]) -> None:
+        if self.batch_supported is not False:
+            try:
+                result = self.api.get_embeddings(
+                    inputs=[pending.prompt for pending in batch],
+                    options=batch[0].options,
+                )
+            except HTTPError as error:
+                if error.response is None or error.response.status_code != 404:
+                    self._fail(batch, error)
+                    return
+                self.batch_supported = False
+            except Exception as error:
+                self._fail(batch, error)
+                return
+            else:
+                self.batch_supported = True
+                if len(result.embeddings) != len(batch):
+                    self._fail(
+                        batch,
+                        ValueError(
+                            f"Expected {len(batch)} embeddings, the server returned {len(result.embeddings)}"
+                        ),
+                    )
+                    return
+                with self._cond:
+                    self._batches += 1
+                    self._batched_inputs += len(batch)
+                for pending, vector in zip(batch, result.embeddings):
+                    pending.future.set_result(Embedding(embedding=vector))
+                return
+
+        for pending in batch:
+            single = self._single(pending.prompt, pending.options)
+            if single.exception() is not None:
+                pending.future.set_exception(single.exception())
+            else:
+                pending.future.set_result(single.result())
+
+    def _single(self, prompt: str, options: Optional[dict]) -> Future:
+        """Get one embedding from the single-prompt endpoint"""
+        future: Future = Future()
+        with self._cond:
+            self._fallbacks += 1
+        try:
+            embedding = self.api.get_embedding(prompt=prompt, options=options)
+            future.set_result(Embedding(embedding=_normalized(embedding.embedding)))
+        except Exception as error:
+            future.set_exception(error)
+        return future
+
+    @staticmethod
+    def _fail(batch: list[_Pending], error: Exception) -> None:
+        for pending in batch:
+            pending.future.set_exception(error)
@@ -1,3 +1,28 @@
-from ollama_python.endpoints.generate import GenerateAPI  # noqa
-from ollama_python.endpoints.model_management import ModelManagementAPI  # noqa
-from ollama_python.endpoints.embedding import EmbeddingAPI  # noqa
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # pragma: no cover
+    from ollama_python.endpoints.generate import GenerateAPI  # noqa
+    from ollama_python.endpoints.model_management import ModelManagementAPI  # noqa
+    from ollama_python.endpoints.embedding import EmbeddingAPI  # noqa
+
+# The endpoint modules are only imported when first used, so importing the package stays cheap
+_EXPORTS = {
+    "GenerateAPI": "ollama_python.endpoints.generate",
+    "ModelManagementAPI": "ollama_python.endpoints.model_management",
+    "EmbeddingAPI": "ollama_python.endpoints.embedding",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + __all__)
@@ -1,16 +1,76 @@
 """Base API for all endpoints"""
+from __future__ import annotations
+
+import contextlib
 import json
-import requests
-from typing import Callable, Generator, Optional
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    ContextManager,
+    Generator,
+    Iterator,
+    Optional,
+)
+
+if TYPE_CHECKING:  # pragma: no cover
+    import requests
+    from ollama_python.admission import AdmissionController
+    from ollama_python.audit import AuditLog, AuditRecord
+    from ollama_python.limiter import AdaptiveLimiter, Permit
+    from ollama_python.models.transport import Timeouts
+    from ollama_python.singleflight import SingleFlight
+    from ollama_python.transport import Call, CancelHandle
 
 
 class BaseAPI:
-    def __init__(self, base_url: str = "http://localhost:11434/api"):
+    def __init__(
+        self,
+        base_url: str = "http://localhost:11434/api",
+        single_flight: Optional[SingleFlight] = None,
+        admission: Optional[AdmissionController] = None,
+        priority: str = "interactive",
+        timeouts: Optional[Timeouts] = None,
+        socket_path: Optional[str] = None,
+        read_ahead: Optional[int] = None,
+        limiter: Optional[AdaptiveLimiter] = None,
+        audit: Optional[AuditLog] = None,
+    ):
         """
         Initialize the base API endpoint
-        :param base_url: The base URL of the API
+        :param base_url: The base URL of the API, ``http+unix://`` URLs with a percent-encoded socket path as host
+                         connect to a Unix domain socket
+        :param single_flight: Share identical in-flight requests through this group
+        :param admission: Wait for a slot from this admission controller before sending requests
+        :param priority: The admission lane of the requests sent by this client
+        :param timeouts: The default timeouts of every request, calls accepting timeouts can override them
+        :param socket_path: Connect to the API through this Unix domain socket, only the path of base_url is used
+        :param read_ahead: Read streams up to this many items ahead of the consumer on a background thread
+        :param limiter: Limit the requests in flight to each host with this adaptive concurrency limiter
+        :param audit: Record the body and the response or stream chunks of every request in this audit log
         """
+        if socket_path is not None:
+            from ollama_python.transport import unix_socket_url
+
+            base_url = unix_socket_url(socket_path, base_url)
         self.base_url = self._format_base_url(base_url=base_url)
+        self.single_flight = single_flight
+        self.admission = admission
+        self.priority = priority
+        self.timeouts = timeouts
+        self.read_ahead = read_ahead
+        self.limiter = limiter
+        self.audit = audit
+        self._session: Optional[requests.Session] = None
+
+    @property
+    def session(self) -> requests.Session:
+        """The HTTP session of the client, created on first use so importing the client stays cheap"""
+        if self._session is None:
+            from ollama_python.transport import create_session
+
+            self._session = create_session()
+        return self._session
 
     def _format_base_url(self, base_url: str) -> str:
         """
@@ -23,39 +83,133 @@ class BaseAPI:
         return base_url
 
     def _stream(
-        self, endpoint: str, parameters: dict, return_type: Optional[Callable] = None
+        self,
+        endpoint: str,
+        parameters: dict,
+        return_type: Optional[Callable] = None,
+        timeouts: Optional[Timeouts] = None,
+        cancel: Optional[CancelHandle] = None,
     ) -> Generator:
         """
         Stream the response from the given endpoint
         :param endpoint: The endpoint to stream from
         :param parameters: The parameters to send
+        :param return_type: The type to parse each streamed item into
+        :param timeouts: The timeouts of the call, defaults to the timeouts of the client
+        :param cancel: A handle that cancels the call and closes its connection
         :return: A generator that yields the response
         """
-        with requests.post(
-            f"{self.base_url}/{endpoint}", json=parameters, stream=True
-        ) as response:
-            response.raise_for_status()
-            for line in response.iter_lines():
-                if line:
-                    resp = json.loads(line)
-                    yield return_type(**resp) if return_type else resp
+        from ollama_python.transport import Call
+
+        with Call(timeouts or self.timeouts, cancel, streaming=True) as call:
+            with self._audited(endpoint, parameters) as record, self._admitted(
+                parameters, call
+            ), self._limited(endpoint, parameters, call) as permit, call.send(
+                self.session.post,
+                f"{self.base_url}/{endpoint}",
+                stream=True,
+                **self._body(parameters),
+            ) as response:
+                if record is not None:
+                    record.status = response.status_code
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if line:
+                        call.chunk_received()
+                        resp = json.loads(line)
+                        if record is not None:
+                            record.chunks.append(resp)
+                        item = return_type(**resp) if return_type else resp
+                        if permit is not None:
+                            permit.observe(item)
+                        yield item
+
+    def _stream_bytes(
+        self,
+        endpoint: str,
+        parameters: dict,
+        passthrough: str = "ndjson",
+        timeouts: Optional[Timeouts] = None,
+        cancel: Optional[CancelHandle] = None,
+    ) -> Generator[bytes, None, None]:
+        """
+        Stream the response bytes from the given endpoint without decoding them
+        :param endpoint: The endpoint to stream from
+        :param parameters: The parameters to send
+        :param passthrough: "ndjson" yields the bytes as they arrive, "sse" frames every line as a server-sent event
+        :param timeouts: The timeouts of the call, defaults to the timeouts of the client
+        :param cancel: A handle that cancels the call and closes its connection
+        :return: A generator that yields the response bytes
+        """
+        from ollama_python.transport import Call
+
+        with Call(timeouts or self.timeouts, cancel, streaming=True) as call:
+            with self._audited(endpoint, parameters) as record, self._admitted(
+                parameters, call
+            ), self._limited(endpoint, parameters, call), call.send(
+                self.session.post,
+                f"{self.base_url}/{endpoint}",
+                stream=True,
+                **self._body(parameters),
+            ) as response:
+                if record is not None:
+                    record.status = response.status_code
+                response.raise_for_status()
+                if passthrough == "sse":
+                    for line in response.iter_lines():
+                        if line:
+                            call.chunk_received()
+                            if record is not None:
+                                record.raw.append(line + b"\n")
+                            yield b"data: " + line + b"\n\n"
+                    return
+                # chunk_size=None yields every chunk of the response as soon as it arrives
+                for data in response.iter_content(chunk_size=None):
+                    call.chunk_received()
+                    if record is not None:
+                        record.raw.append(data)
+                    yield data
 
     def _post(
         self,
         endpoint: str,
         parameters: Optional[dict] = None,
         return_type: Optional[Callable] = None,
+        timeouts: Optional[Timeouts] = None,
+        cancel: Optional[CancelHandle] = None,
     ):
         """
         Send a POST request to the given endpoint
         :param endpoint:
         :param parameters:
         :param return_type:
+        :param timeouts: The timeouts of the call, defaults to the timeouts of the client
+        :param cancel: A handle that cancels the call and closes its connection
         :return:
         """
-        response = requests.post(f"{self.base_url}/{endpoint}", json=parameters)
-        response.raise_for_status()
-        return return_type(**response.json()) if return_type else response.status_code
+        from ollama_python.transport import Call
+
+        with Call(timeouts or self.timeouts, cancel) as call:
+            with self._audited(endpoint, parameters) as record, self._admitted(
+                parameters, call
+            ), self._limited(endpoint, parameters, call) as permit:
+                response = call.send(
+                    self.session.post,
+                    f"{self.base_url}/{endpoint}",
+                    **self._body(parameters),
+                )
+                if record is not None:
+                    record.status = response.status_code
+                    record.response = response.content
+                response.raise_for_status()
+                result = (
+                    return_type(**response.json())
+                    if return_type
+                    else response.status_code
+                )
+                if permit is not None:
+                    permit.observe(result)
+        return result
 
     def _get(self, endpoint: str, return_type: Optional[Callable] = None):
         """
@@ -64,6 +218,233 @@ class BaseAPI:
         :param return_type:
         :return:
         """
-        response = requests.get(f"{self.base_url}/{endpoint}")
+        from ollama_python.transport import Call
+
+        with Call(self.timeouts) as call:
+            response = call.send(self.session.get, f"{self.base_url}/{endpoint}")
         response.raise_for_status()
         return return_type(**response.json()) if return_type else response.status_code
+
+    @staticmethod
+    def _body(parameters: Optional[dict]) -> dict:
+        """
+        Build the keyword arguments sending the parameters as the JSON body of a request
+        :param parameters: The parameters to send, values with an ``encoded`` method such as a MessageHistory are
+                           spliced into the body as the JSON text they return
+        :return: The keyword arguments of the request
+        """
+        encoded = {
+            key: value.encoded()
+            for key, value in (parameters or {}).items()
+            if hasattr(value, "encoded")
+        }
+        if not encoded:
+            return {"json": parameters}
+        plain = {key: value for key, value in parameters.items() if key not in encoded}
+        fields = [json.dumps(plain)[1:-1]] if plain else []
+        fields += [f"{json.dumps(key)}: {value}" for key, value in encoded.items()]
+        return {
+            "data": f"{{{', '.join(fields)}}}".encode(),
+            "headers": {"Content-Type": "application/json"},
+        }
+
+    def _read_ahead(self, stream: Iterator) -> Iterator:
+        """
+        Read a stream ahead of its consumer when read-ahead is enabled
+        :param stream: The stream returned to the caller
+        :return: A ReadAhead over the stream, or the stream itself
+        """
+        if not self.read_ahead:
+            return stream
+        from ollama_python.readahead import ReadAhead
+
+        return ReadAhead(stream, self.read_ahead)
+
+    @staticmethod
+    def _check_passthrough(passthrough: Optional[str], stream: bool) -> None:
+        """
+        Validate the passthrough mode of a call
+        :param passthrough: The requested mode, None decodes the stream as usual
+        :param stream: Whether the call streams its response
+        """
+        if passthrough is None:
+            return
+        if passthrough not in ("ndjson", "sse"):
+            raise ValueError('passthrough must be "ndjson" or "sse"')
+        if not stream:
+            raise ValueError("passthrough is only supported when streaming")
+
+    def _admitted(self, parameters: Optional[dict], call: Call) -> ContextManager:
+        """
+        Hold an admission slot for the request when an admission controller is set
+        :param parameters: The parameters of the request, used to find its model
+        :param call: The call the request belongs to, waiting for a slot counts towards its deadline
+        :return: A context manager holding the slot
+        """
+        if self.admission is None:
+            return contextlib.nullcontext()
+        model = parameters.get("model") if parameters else None
+        return self.admission.slot(
+            host=self.base_url,
+            model=model,
+            lane=self.priority,
+            timeout=call.remaining(),
+        )
+
+    @contextlib.contextmanager
+    def _audited(
+        self, endpoint: str, parameters: Optional[dict]
+    ) -> Iterator[Optional[AuditRecord]]:
+        """
+        Record the request in the audit log when one is set, the record is queued for the writer when the call ends
+        :param endpoint: The endpoint the request is sent to
+        :param parameters: The parameters of the request
+        :return: A context manager yielding the record to fill in, None without an audit log
+        """
+        if self.audit is None:
+            yield None
+            return
+        record = self.audit.begin(self.base_url, endpoint, parameters)
+        try:
+            yield record
+        except BaseException as exc:
+            record.error = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            self.audit.submit(record)
+
+    @contextlib.contextmanager
+    def _limited(
+        self, endpoint: str, parameters: Optional[dict], call: Call
+    ) -> Iterator[Optional[Permit]]:
+        """
+        Hold a slot of the adaptive limiter for the request when a limiter is set
+        :param endpoint: The endpoint the request is sent to
+        :param parameters: The parameters of the request, used to find its model
+        :param call: The call the request belongs to, waiting for a slot counts towards its deadline
+        :return: A context manager yielding the permit of the slot, None without a limiter
+        """
+        if self.limiter is None:
+            yield None
+            return
+        from ollama_python.limiter import is_overload
+
+        model = parameters.get("model") if parameters else None
+        permit = self.limiter.acquire(
+            host=self.base_url, model=model, endpoint=endpoint, timeout=call.remaining()
+        )
+        try:
+            yield permit
+        except BaseException as exc:
+            # Requests cancelled, closed early or rejected say nothing about the load of the host,
+            # their latency is not sampled either
+            overloaded = is_overload(exc) and call.handle.reason in (None, "deadline")
+            self.limiter.release(permit, overloaded=overloaded, sample=False)
+            raise
+        self.limiter.release(permit)
+
+    def _request_key(self, endpoint: str, parameters: dict) -> Optional[str]:
+        """
+        Build the key identifying identical requests
+        :param endpoint: The endpoint the request is sent to
+        :param parameters: The parameters to send
+        :return: The key, or None if the parameters cannot be serialized (e.g. file objects)
+        """
+        try:
+            return json.dumps(
+                [self.base_url, endpoint, parameters],
+                sort_keys=True,
+                default=lambda value: value.encoded(),
+            )
+        except (TypeError, AttributeError):
+            return None
+
+    def _share_key(
+        self,
+        endpoint: str,
+        parameters: dict,
+        cancel: Optional[CancelHandle],
+        share: bool,
+    ) -> Optional[str]:
+        """
+        Build the key of a request that may be shared through the single-flight group
+        :param endpoint: The endpoint the request is sent to
+        :param parameters: The parameters to send
+        :param cancel: The cancel handle of the call, calls with one are never shared as cancelling them would cancel
+                       every caller sharing them
+        :param share: Whether the request may be shared
+        :return: The key, or None if the request is sent on its own
+        """
+        if not self.single_flight or not share or cancel is not None:
+            return None
+        return self._request_key(endpoint, parameters)
+
+    def _deadline(self, timeouts: Optional[Timeouts]) -> Optional[float]:
+        """The deadline of a call in seconds, None without one"""
+        timeouts = timeouts or self.timeouts
+        return timeouts.deadline if timeouts is not None else None
+
+    def _shared_post(
+        self,
+        endpoint: str,
+        parameters: dict,
+        return_type: Optional[Callable] = None,
+        timeouts: Optional[Timeouts] = None,
+        cancel: Optional[CancelHandle] = None,
+        share: bool = True,
+        upstream: Optional[Callable[[Any], Any]] = None,
+    ):
+        """
+        Send a POST request, sharing it with identical in-flight requests when a single-flight group is set
+        :param endpoint: The endpoint to send the request to
+        :param parameters: The parameters to send
+        :param return_type: The type to parse the response into
+        :param timeouts: The timeouts of the upstream call
+        :param cancel: A handle that cancels the call, calls with one are not shared
+        :param share: Whether the request may be shared, identical requests may differ when it is not deterministic
+        :param upstream: Applied once to the upstream response before it is shared, e.g. to record it
+        :return: The (possibly shared) response
+        """
+
+        def send():
+            result = self._post(endpoint, parameters, return_type, timeouts, cancel)
+            return upstream(result) if upstream else result
+
+        key = self._share_key(endpoint, parameters, cancel, share)
+        if key is None:
+            return send()
+        return self.single_flight.do(key, send, deadline=self._deadline(timeouts))
+
+    def _shared_stream(
+        self,
+        endpoint: str,
+        parameters: dict,
+        return_type: Optional[Callable] = None,
+        timeouts: Optional[Timeouts] = None,
+        cancel: Optional[CancelHandle] = None,
+        share: bool = True,
+        upstream: Optional[Callable[[Iterator], Iterator]] = None,
+    ) -> Iterator:
+        """
+        Stream the response, fanning one upstream stream out to identical in-flight requests when a
+        single-flight group is set
+        :param endpoint: The endpoint to stream from
+        :param parameters: The parameters to send
+        :param return_type: The type to parse each streamed item into
+        :param timeouts: The timeouts of the upstream call
+        :param cancel: A handle that cancels the call, calls with one are not shared
+        :param share: Whether the request may be shared, identical requests may differ when it is not deterministic
+        :param upstream: Wraps the upstream stream once before it is shared, e.g. to record it
+        :return: A generator that yields the response
+        """
+
+        def open_stream() -> Iterator:
+            stream = self._stream(endpoint, parameters, return_type, timeouts, cancel)
+            return upstream(stream) if upstream else stream
+
+        key = self._share_key(endpoint, parameters, cancel, share)
+        if key is None:
+            return open_stream()
+        return self.single_flight.stream(
+            key, open_stream, deadline=self._deadline(timeouts)
+        )
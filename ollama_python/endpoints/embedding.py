@@ -1,25 +1,47 @@
-from typing import Optional
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional
 from ollama_python.endpoints.base import BaseAPI
-from ollama_python.models.generate import Options
-from ollama_python.models.embedding import Embedding
+
+if TYPE_CHECKING:  # pragma: no cover
+    from ollama_python.models.embedding import Embedding, Embeddings
+    from ollama_python.models.transport import Timeouts
+    from ollama_python.transport import CancelHandle
 
 
 class EmbeddingAPI(BaseAPI):
-    def __init__(self, model: str, base_url: str = "http://localhost:11434/api"):
+    def __init__(
+        self,
+        model: str,
+        base_url: str = "http://localhost:11434/api",
+        **kwargs,
+    ):
         """
         Initialize the embedding API
         :param base_url: The base URL of the API
+        :param kwargs: Transport settings passed to BaseAPI e.g. single_flight or admission
         """
-        super().__init__(base_url=base_url)
+        super().__init__(base_url=base_url, **kwargs)
         self.model = model
 
-    def get_embedding(self, prompt: str, options: Optional[dict] = None) -> Embedding:
+    def get_embedding(
+        self,
+        prompt: str,
+        options: Optional[dict] = None,
+        timeouts: Optional[Timeouts] = None,
+        cancel: Optional[CancelHandle] = None,
+    ) -> Embedding:
         """
         Get the embedding for the given prompt
         :param prompt: The prompt to get the embedding for
         :param options: Additional model parameters listed in the documentation for the Modelfile such as temperature
+        :param timeouts: The connect and deadline timeouts of the call
+        :param cancel: A handle that cancels the call from another thread and closes its connection
         :return: The embedding
         """
+        from ollama_python.models.embedding import Embedding
+        from ollama_python.models.generate import Options
+
         parameters = {"prompt": prompt, "model": self.model}
 
         if options:
@@ -29,6 +51,43 @@ class EmbeddingAPI(BaseAPI):
             options_dict = validated_options.model_dump(exclude_none=True)
             parameters["options"] = options_dict
 
-        return self._post(
-            parameters=parameters, endpoint="embedding", return_type=Embedding
+        return self._shared_post(
+            parameters=parameters,
+            endpoint="embedding",
+            return_type=Embedding,
+            timeouts=timeouts,
+            cancel=cancel,
+        )
+
+    def get_embeddings(
+        self,
+        inputs: list[str],
+        options: Optional[dict] = None,
+        timeouts: Optional[Timeouts] = None,
+        cancel: Optional[CancelHandle] = None,
+    ) -> Embeddings:
+        """
+        Get the embeddings for a batch of inputs in one request. Requires a server that supports
+        the batch ``embed`` endpoint
+        :param inputs: The texts to get the embeddings for
+        :param options: Additional model parameters listed in the documentation for the Modelfile such as temperature
+        :param timeouts: The connect and deadline timeouts of the call
+        :param cancel: A handle that cancels the call from another thread and closes its connection
+        :return: The embeddings, in the same order as the inputs
+        """
+        from ollama_python.models.embedding import Embeddings
+        from ollama_python.models.generate import Options
+
+        parameters = {"input": inputs, "model": self.model}
+
+        if options:
+            validated_options = Options(**options)
+            parameters["options"] = validated_options.model_dump(exclude_none=True)
+
+        return self._shared_post(
+            parameters=parameters,
+            endpoint="embed",
+            return_type=Embeddings,
+            timeouts=timeouts,
+            cancel=cancel,
         )
@@ -1,30 +1,99 @@
-from ollama_python.models.generate import (
-    Completion,
-    Options,
-    StreamCompletion,
-    ChatCompletion,
-    Message,
-    StreamChatCompletion,
-)
+from __future__ import annotations
+
+import json
+
 from ollama_python.endpoints.base import BaseAPI
-from typing import BinaryIO, Optional, Generator, Union
+from ollama_python.history import MessageHistory
+from ollama_python.images import Image, ImageEncoder
+from ollama_python.stopping import StopCondition, stop_early
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Iterator,
+    Literal,
+    Optional,
+    Generator,
+    Union,
+)
+
+if TYPE_CHECKING:  # pragma: no cover
+    from ollama_python.analytics import PerformanceTracker
+    from ollama_python.models.generate import ChatCompletion, Completion
+    from ollama_python.models.transport import Timeouts
+    from ollama_python.prefixes import PrefixRegistry
+    from ollama_python.semantic_cache import SemanticCache
+    from ollama_python.transport import CancelHandle
+
+
+def _is_deterministic(options: Optional[dict]) -> bool:
+    """Whether identical requests with the given options produce identical completions"""
+    return bool(options) and (
+        options.get("seed") is not None or options.get("temperature") == 0
+    )
+
+
+def _semantic_scope(endpoint: str, parameters: dict, text_key: str) -> str:
+    """The parameters of a request other than its text, which must match for a semantic cache hit"""
+    return json.dumps(
+        [
+            endpoint,
+            {
+                key: value
+                for key, value in parameters.items()
+                if key not in (text_key, "stream", "keep_alive")
+            },
+        ],
+        sort_keys=True,
+    )
 
 
 class GenerateAPI(BaseAPI):
-    def __init__(self, model: str, base_url: str = "http://localhost:11434/api"):
+    def __init__(
+        self,
+        model: str,
+        base_url: str = "http://localhost:11434/api",
+        image_encoder: Optional[ImageEncoder] = None,
+        analytics: Optional[PerformanceTracker] = None,
+        prefixes: Optional[PrefixRegistry] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        **kwargs,
+    ):
         """
         Initialize the Generate API endpoint
 
         :param model: The model to use for generating completions
         :param base_url: The base URL of the API
+        :param image_encoder: Encodes and caches the images of requests, share one between clients to share its cache
+        :param analytics: Record the timings of every completion in this performance tracker
+        :param prefixes: The registry of shared prompt prefixes generate calls can refer to by name
+        :param semantic_cache: Answer blocking calls without images from this cache when a similar prompt was
+                               already completed with the same parameters
+        :param kwargs: Transport settings passed to BaseAPI e.g. single_flight or admission
         """
-        super().__init__(base_url=base_url)
+        super().__init__(base_url=base_url, **kwargs)
         self.model = model
+        self.image_encoder = image_encoder or ImageEncoder()
+        self.analytics = analytics
+        self.prefixes = prefixes
+        self.semantic_cache = semantic_cache
+
+    def _recorded(self, completion: Any) -> Any:
+        """Record a completion in the performance tracker when one is set"""
+        if self.analytics is not None:
+            self.analytics.record(completion, self.base_url)
+        return completion
+
+    def _tracked(self, completions: Iterator) -> Iterator:
+        """Record the final chunk of a stream in the performance tracker when one is set"""
+        if self.analytics is None:
+            return completions
+        return self.analytics.track(completions, self.base_url)
 
     def generate(
         self,
         prompt: str,
-        images: Optional[list[Union[str, BinaryIO]]] = None,
+        images: Optional[list[Image]] = None,
         options: Optional[dict] = None,
         system: Optional[str] = None,
         stream: bool = False,
@@ -32,12 +101,18 @@ class GenerateAPI(BaseAPI):
         template: Optional[str] = None,
         context: Optional[list[int]] = None,
         raw: bool = False,
+        keep_alive: Optional[Union[int, str]] = None,
+        timeouts: Optional[Timeouts] = None,
+        cancel: Optional[CancelHandle] = None,
+        stop_when: Optional[list[Union[StopCondition, Callable[[str], bool]]]] = None,
+        prefix: Optional[str] = None,
+        passthrough: Optional[Literal["ndjson", "sse"]] = None,
     ) -> Union[Completion, Generator]:
         """
         Generate a completion using the given prompt
 
         :param prompt: The prompt to use for generating the completion
-        :param images : A list of base64-encoded images (for multimodal models such as llava)
+        :param images : A list of images as paths, bytes, binary files or base64-encoded strings (for multimodal models such as llava)
         :param options: Additional model parameters listed in the documentation for the Modelfile such as temperature
         :param system:  System message to (overrides what is defined in the Modelfile)
         :param stream: If false the response will be returned as a single response object, rather than a stream of objects
@@ -45,11 +120,36 @@ class GenerateAPI(BaseAPI):
         :param template: the prompt template to use (overrides what is defined in the Modelfile)
         :param context: The context parameter returned from a previous request to /generate, this can be used to keep a short conversational memory
         :param raw: If true no formatting will be applied to the prompt. You may choose to use the raw parameter if you are specifying a full templated prompt in your request to the API.
+        :param keep_alive: How long the model stays loaded in memory after the request e.g. "5m" or 300 (seconds)
+        :param timeouts: The connect, first-token, inter-token and deadline timeouts of the call
+        :param cancel: A handle that cancels the call from another thread and closes its connection
+        :param stop_when: Client-side stop conditions checked against every streamed fragment, the connection is
+                          closed as soon as one fires (requires stream=True)
+        :param prefix: The name of a registered prefix the prompt continues, its evaluated context is sent instead
+                       of evaluating the prefix again (requires a prefix registry)
+        :param passthrough: Yield the upstream bytes untouched instead of parsed chunks, "ndjson" as they arrive or
+                            "sse" framed as server-sent events (requires stream=True)
         :return: The completion
         """
+        from ollama_python.models.generate import Completion, Options, StreamCompletion
+
         if format != "json" and format is not None:
             raise ValueError("Only JSON format is supported")
 
+        if stop_when and not stream:
+            raise ValueError("stop_when is only supported when streaming")
+
+        self._check_passthrough(passthrough, stream)
+        if passthrough and stop_when:
+            raise ValueError("stop_when cannot be combined with passthrough")
+
+        if prefix is not None:
+            if self.prefixes is None:
+                raise ValueError("A prefix registry is required to use a prefix")
+            if context is not None:
+                raise ValueError("Only one of prefix and context can be given")
+            context = self.prefixes.context(self, prefix)
+
         parameters = {
             "prompt": prompt,
             "model": self.model,
@@ -68,41 +168,115 @@ class GenerateAPI(BaseAPI):
             parameters["options"] = options_dict
 
         if images:
-            parameters["images"] = images
+            parameters["images"] = self.image_encoder.encode_all(images)
 
         if format:
             parameters["format"] = format
 
+        if keep_alive is not None:
+            parameters["keep_alive"] = keep_alive
+
+        shared = _is_deterministic(parameters.get("options"))
+
+        if passthrough:
+            return self._read_ahead(
+                self._stream_bytes(
+                    parameters=parameters,
+                    endpoint="generate",
+                    passthrough=passthrough,
+                    timeouts=timeouts,
+                    cancel=cancel,
+                )
+            )
+
         if stream:
-            return self._stream(
-                parameters=parameters, endpoint="generate", return_type=StreamCompletion
+            # Tracked on the upstream, so a stream shared by several callers is recorded once
+            completions = self._shared_stream(
+                parameters=parameters,
+                endpoint="generate",
+                return_type=StreamCompletion,
+                timeouts=timeouts,
+                cancel=cancel,
+                share=shared,
+                upstream=self._tracked,
             )
+            if stop_when:
+                completions = stop_early(completions, stop_when)
+            return self._read_ahead(completions)
 
-        return self._post(
-            parameters=parameters, endpoint="generate", return_type=Completion
-        )
+        def send() -> Completion:
+            return self._shared_post(
+                parameters=parameters,
+                endpoint="generate",
+                return_type=Completion,
+                timeouts=timeouts,
+                cancel=cancel,
+                share=shared,
+                upstream=self._recorded,
+            )
+
+        if self.semantic_cache is not None and not images:
+            return self.semantic_cache.cached(
+                _semantic_scope("generate", parameters, "prompt"), prompt, send
+            )
+        return send()
 
     def generate_chat_completion(
         self,
-        messages: list[dict],
+        messages: Union[list[dict], MessageHistory],
         format: Optional[str] = None,
         options: Optional[dict] = None,
         template: Optional[str] = None,
         stream: bool = False,
+        timeouts: Optional[Timeouts] = None,
+        cancel: Optional[CancelHandle] = None,
+        stop_when: Optional[list[Union[StopCondition, Callable[[str], bool]]]] = None,
+        passthrough: Optional[Literal["ndjson", "sse"]] = None,
     ) -> Union[ChatCompletion, Generator]:
         """
         Generate a completion using the given prompt
-        :param messages: The list of messages e.g [{"role": "user", "content": "Hello"}]
+        :param messages: The list of messages e.g [{"role": "user", "content": "Hello"}], images may be given as
+                         paths, bytes, binary files or base64-encoded strings. A MessageHistory avoids validating and
+                         encoding the earlier messages of a long conversation again
         :param options: Additional model parameters listed in the documentation for the Modelfile such as temperature
         :param stream: If false the response will be returned as a single response object, rather than a stream of objects
         :param format: The format of the response, currently only support "json"
         :param template: the prompt template to use (overrides what is defined in the Modelfile)
+        :param timeouts: The connect, first-token, inter-token and deadline timeouts of the call
+        :param cancel: A handle that cancels the call from another thread and closes its connection
+        :param stop_when: Client-side stop conditions checked against every streamed fragment, the connection is
+                          closed as soon as one fires (requires stream=True)
+        :param passthrough: Yield the upstream bytes untouched instead of parsed chunks, "ndjson" as they arrive or
+                            "sse" framed as server-sent events (requires stream=True)
         """
+        from ollama_python.models.generate import (
+            ChatCompletion,
+            Message,
+            Options,
+            StreamChatCompletion,
+        )
+
         if format != "json" and format is not None:
             raise ValueError("Only JSON format is supported")
 
-        # validating the message input
-        [Message(**message) for message in messages]
+        if stop_when and not stream:
+            raise ValueError("stop_when is only supported when streaming")
+
+        self._check_passthrough(passthrough, stream)
+        if passthrough and stop_when:
+            raise ValueError("stop_when cannot be combined with passthrough")
+
+        # A MessageHistory validated and encoded its messages when they were appended
+        if not isinstance(messages, MessageHistory):
+            messages = [
+                {**message, "images": self.image_encoder.encode_all(message["images"])}
+                if message.get("images")
+                else message
+                for message in messages
+            ]
+
+            # validating the message input
+            [Message(**message) for message in messages]
 
         parameters = {
             "model": self.model,
@@ -119,11 +293,52 @@ class GenerateAPI(BaseAPI):
         if format:
             parameters["format"] = format
 
+        shared = _is_deterministic(parameters.get("options"))
+
+        if passthrough:
+            return self._read_ahead(
+                self._stream_bytes(
+                    parameters=parameters,
+                    endpoint="chat",
+                    passthrough=passthrough,
+                    timeouts=timeouts,
+                    cancel=cancel,
+                )
+            )
+
         if stream:
-            return self._stream(
-                parameters=parameters, endpoint="chat", return_type=StreamChatCompletion
+            # Tracked on the upstream, so a stream shared by several callers is recorded once
+            completions = self._shared_stream(
+                parameters=parameters,
+                endpoint="chat",
+                return_type=StreamChatCompletion,
+                timeouts=timeouts,
+                cancel=cancel,
+                share=shared,
+                upstream=self._tracked,
             )
+            if stop_when:
+                completions = stop_early(completions, stop_when)
+            return self._read_ahead(completions)
 
-        return self._post(
-            parameters=parameters, endpoint="chat", return_type=ChatCompletion
-        )
+        def send() -> ChatCompletion:
+            return self._shared_post(
+                parameters=parameters,
+                endpoint="chat",
+                return_type=ChatCompletion,
+                timeouts=timeouts,
+                cancel=cancel,
+                share=shared,
+                upstream=self._recorded,
+            )
+
+        if self.semantic_cache is not None and not any(
+            message.get("images") for message in messages
+        ):
+            # The whole conversation is compared, earlier turns change the meaning of the last one
+            text = "\n".join(
+                f"{message['role']}: {message['content']}" for message in messages
+            )
+            scope = _semantic_scope("chat", parameters, "messages")
+            return self.semantic_cache.cached(scope, text, send)
+        return send()
@@ -1,11 +1,14 @@
-from typing import Optional, Generator, Union
-import requests
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Literal, Optional, Generator, Union
 from ollama_python.endpoints.base import BaseAPI
-from ollama_python.models.model_management import (
-    ResponsePayload,
-    ModelTagList,
-    ModelInformation,
-)
+
+if TYPE_CHECKING:  # pragma: no cover
+    from ollama_python.models.model_management import (
+        ResponsePayload,
+        ModelTagList,
+        ModelInformation,
+    )
 
 
 class ModelManagementAPI(BaseAPI):
@@ -28,6 +31,8 @@ class ModelManagementAPI(BaseAPI):
         :param path: The path to the model file
         :return:
         """
+        from ollama_python.models.model_management import ResponsePayload
+
         parameters = {
             "name": name,
             "model_file": model_file,
@@ -36,8 +41,12 @@ class ModelManagementAPI(BaseAPI):
         }
 
         if stream:
-            return self._stream(
-                parameters=parameters, endpoint="create", return_type=ResponsePayload
+            return self._read_ahead(
+                self._stream(
+                    parameters=parameters,
+                    endpoint="create",
+                    return_type=ResponsePayload,
+                )
             )
 
         return self._post(
@@ -50,7 +59,10 @@ class ModelManagementAPI(BaseAPI):
         :param digest: The digest of the blob to check
         :return: The status code of the request
         """
-        response = requests.head(f"{self.base_url}/blob/{digest}")
+        from ollama_python.transport import Call
+
+        with Call(self.timeouts) as call:
+            response = call.send(self.session.head, f"{self.base_url}/blob/{digest}")
         response.raise_for_status()
 
         return response.status_code
@@ -70,6 +82,8 @@ class ModelManagementAPI(BaseAPI):
         List all tags
         :return: A list of local models
         """
+        from ollama_python.models.model_management import ModelTagList
+
         return self._get(endpoint="tags", return_type=ModelTagList)
 
     def show(self, name: str) -> ModelInformation:
@@ -78,6 +92,7 @@ class ModelManagementAPI(BaseAPI):
         :param name: The name of the model to show
         :return: The status code of the request
         """
+        from ollama_python.models.model_management import ModelInformation
 
         return self._post(
             endpoint="show", parameters={"name": name}, return_type=ModelInformation
@@ -105,7 +120,11 @@ class ModelManagementAPI(BaseAPI):
         return self._post(endpoint="delete", parameters={"name": name})
 
     def pull(
-        self, name: str, insecure: Optional[bool] = None, stream: bool = False
+        self,
+        name: str,
+        insecure: Optional[bool] = None,
+        stream: bool = False,
+        passthrough: Optional[Literal["ndjson", "sse"]] = None,
     ) -> Union[ResponsePayload, Generator]:
         """
         Download a model from the ollama library. Cancelled pulls are resumed from where they left off,
@@ -114,17 +133,30 @@ class ModelManagementAPI(BaseAPI):
         :param insecure: Allow insecure connections to the library. Only use this if you are pulling from
                         your own library during development.
         :param stream: if false the response will be returned as a single response object, rather than a stream of objects
+        :param passthrough: Yield the upstream bytes untouched instead of parsed progress updates, "ndjson" as they
+                            arrive or "sse" framed as server-sent events (requires stream=True)
         :return: ResponsePayload if stream is false, otherwise a generator that yields the response
         """
+        from ollama_python.models.model_management import ResponsePayload
+
+        self._check_passthrough(passthrough, stream)
         parameters = {
             "name": name,
             "stream": stream,
         }
         if parameters:
             parameters["insecure"] = insecure
+        if passthrough:
+            return self._read_ahead(
+                self._stream_bytes(
+                    endpoint="pull", parameters=parameters, passthrough=passthrough
+                )
+            )
         if stream:
-            return self._stream(
-                endpoint="pull", parameters=parameters, return_type=ResponsePayload
+            return self._read_ahead(
+                self._stream(
+                    endpoint="pull", parameters=parameters, return_type=ResponsePayload
+                )
             )
         return self._post(
             endpoint="pull", parameters=parameters, return_type=ResponsePayload
@@ -141,6 +173,8 @@ class ModelManagementAPI(BaseAPI):
         :param stream: if false the response will be returned as a single response object, rather than a stream of objects
         :return: ResponsePayload if stream is false, otherwise a generator that yields the response
         """
+        from ollama_python.models.model_management import ResponsePayload
+
         parameters = {
             "name": name,
             "stream": stream,
@@ -148,8 +182,10 @@ class ModelManagementAPI(BaseAPI):
         if parameters:
             parameters["insecure"] = insecure
         if stream:
-            return self._stream(
-                endpoint="push", parameters=parameters, return_type=ResponsePayload
+            return self._read_ahead(
+                self._stream(
+                    endpoint="push", parameters=parameters, return_type=ResponsePayload
+                )
             )
         return self._post(
             endpoint="push", parameters=parameters, return_type=ResponsePayload
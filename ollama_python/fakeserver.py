@@ -0,0 +1,220 @@
+"""A local stand-in for an Ollama server, for trying clients out without a GPU"""
+import json
+import os
+import random
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import quote
+
+
+def chunk(response: str, done: bool = False, model: str = "test-model") -> dict:
+    """
+    Build a streamed generate chunk
+    :param response: The text of the chunk
+    :param done: Whether the chunk is the last one
+    :param model: The model of the chunk
+    :return: The chunk
+    """
+    return {
+        "model": model,
+        "created_at": "2023-08-04T19:22:45.499127Z",
+        "response": response,
+        "done": done,
+    }
+
+
+class _ThreadingUnixHTTPServer(
+    socketserver.ThreadingMixIn, socketserver.UnixStreamServer
+):
+    daemon_threads = True
+
+
+class FakeServer:
+    """
+    A local stand-in for an Ollama server listening on a free loopback port or a Unix domain
+    socket, as a context manager.
+
+    With ``chunks`` every POST request is answered with those NDJSON chunks, with configurable
+    delays. Without them generate and embedding requests are answered with simulated prompt
+    evaluation and token generation times. ``requests`` holds the body of every POST request and
+    ``disconnected`` is set when a client goes away before its response is complete.
+    """
+
+    def __init__(
+        self,
+        chunks: Optional[list[dict]] = None,
+        header_delay: float = 0.0,
+        chunk_delay: float = 0.0,
+        stall_after: Optional[int] = None,
+        unix_socket: Optional[str] = None,
+        tokens: int = 32,
+        token_delay: float = 0.005,
+        prompt_rate: float = 5000.0,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        """
+        Initialize the server, it listens once entered
+        :param chunks: The chunks streamed for every POST request, None simulates generation
+        :param header_delay: Seconds to wait before sending the chunks
+        :param chunk_delay: Seconds to wait between chunks
+        :param stall_after: Stop sending chunks (but keep the connection open) after this many
+        :param unix_socket: Listen on this Unix domain socket path instead of a loopback TCP port
+        :param tokens: The number of tokens generated when the request does not set num_predict
+        :param token_delay: The seconds spent generating every token
+        :param prompt_rate: The prompt words evaluated per second
+        :param error_rate: The share of simulated requests answered with a server error
+        :param seed: The seed of the random errors
+        """
+        self.chunks = chunks
+        self.header_delay = header_delay
+        self.chunk_delay = chunk_delay
+        self.stall_after = stall_after
+        self.unix_socket = unix_socket
+        self.tokens = tokens
+        self.token_delay = token_delay
+        self.prompt_rate = prompt_rate
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.requests: list[dict] = []
+        self.disconnected = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+        if unix_socket:
+            self.httpd = _ThreadingUnixHTTPServer(unix_socket, self._handler())
+            self.base_url = f"http+unix://{quote(unix_socket, safe='')}/api"
+        else:
+            self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+            self.httpd.daemon_threads = True
+            self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}/api"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self) -> "FakeServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.unix_socket:
+            os.unlink(self.unix_socket)
+
+    def _handler(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Chunked HTTP/1.1 like Ollama, so every line reaches the client as soon as it is sent
+            protocol_version = "HTTP/1.1"
+            # Without TCP_NODELAY every small response waits for the delayed ACK of the client,
+            # the option does not exist on Unix domain sockets
+            disable_nagle_algorithm = not server.unix_socket
+
+            def log_message(self, *args):
+                pass
+
+            def send(self, status: int, body: bytes) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def start_stream(self) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+            def write_chunk(self, data: bytes) -> None:
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def do_GET(self):
+                self.send(
+                    200,
+                    json.dumps({"models": [], "host": self.headers["Host"]}).encode(),
+                )
+
+            def do_HEAD(self):
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                request = json.loads(self.rfile.read(length)) if length else {}
+                with server._lock:
+                    server.requests.append(request)
+                try:
+                    if server.chunks is None:
+                        self.simulate(request)
+                    else:
+                        self.replay()
+                except OSError:
+                    server.disconnected.set()
+
+            def replay(self) -> None:
+                self.close_connection = True
+                if server._stop.wait(server.header_delay):
+                    return
+                self.start_stream()
+                for index, item in enumerate(server.chunks):
+                    if index == server.stall_after:
+                        server._stop.wait(5)
+                        return
+                    if index and server._stop.wait(server.chunk_delay):
+                        return
+                    self.write_chunk(json.dumps(item).encode() + b"\n")
+                self.write_chunk(b"")
+                self.close_connection = False
+
+            def simulate(self, request: dict) -> None:
+                with server._lock:
+                    failed = server.rng.random() < server.error_rate
+                if failed:
+                    return self.send(500, b'{"error": "overloaded"}')
+                prompt_seconds = len(request["prompt"].split()) / server.prompt_rate
+                time.sleep(prompt_seconds)
+                if self.path.endswith("/embedding"):
+                    return self.send(200, json.dumps({"embedding": [0.1] * 8}).encode())
+                if not self.path.endswith("/generate"):
+                    return self.send(404, b'{"error": "not found"}')
+                tokens = (request.get("options") or {}).get(
+                    "num_predict", server.tokens
+                )
+                final = {
+                    "model": request["model"],
+                    "created_at": "2024-01-01T00:00:00Z",
+                    "response": "",
+                    "done": True,
+                    "context": [1],
+                    "total_duration": int(
+                        (prompt_seconds + tokens * server.token_delay) * 1e9
+                    ),
+                    "load_duration": 0,
+                    "prompt_eval_count": len(request["prompt"].split()),
+                    "prompt_eval_duration": int(prompt_seconds * 1e9),
+                    "eval_count": tokens,
+                    "eval_duration": int(tokens * server.token_delay * 1e9),
+                }
+                if not request.get("stream"):
+                    time.sleep(tokens * server.token_delay)
+                    return self.send(
+                        200,
+                        json.dumps({**final, "response": "token " * tokens}).encode(),
+                    )
+
+                self.start_stream()
+                for _ in range(tokens):
+                    time.sleep(server.token_delay)
+                    item = chunk("token ", model=request["model"])
+                    self.write_chunk(json.dumps(item).encode() + b"\n")
+                self.write_chunk(json.dumps(final).encode() + b"\n")
+                self.write_chunk(b"")
+
+        return Handler
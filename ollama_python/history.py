@@ -0,0 +1,89 @@
+"""A chat history that validates and encodes every message once"""
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional
+
+from ollama_python.images import ImageEncoder
+
+if TYPE_CHECKING:  # pragma: no cover
+    from ollama_python.models.generate import ChatCompletion
+
+
+class MessageHistory:
+    """
+    The messages of a conversation, passed to ``generate_chat_completion`` instead of a list.
+
+    Every message is validated, its images encoded and the message serialized to JSON once, when
+    it is appended. The request body of every turn is then assembled from the cached fragments,
+    so a long conversation no longer costs a validation and serialization of every earlier
+    message on each turn.
+    """
+
+    def __init__(
+        self,
+        messages: Optional[Iterable[dict]] = None,
+        image_encoder: Optional[ImageEncoder] = None,
+    ):
+        """
+        Initialize the history
+        :param messages: The first messages of the conversation
+        :param image_encoder: Encodes the images of the messages, share one between histories to share its cache
+        """
+        self.image_encoder = image_encoder or ImageEncoder()
+        self._messages: list[dict] = []
+        self._fragments: list[str] = []
+        self._encoded: Optional[str] = "[]"
+        self.extend(messages or [])
+
+    def append(self, message: dict) -> None:
+        """
+        Append a message
+        :param message: The message e.g. {"role": "user", "content": "Hello"}, images may be given as paths, bytes,
+                        binary files or base64-encoded strings
+        """
+        from ollama_python.models.generate import Message
+
+        if message.get("images"):
+            message = {
+                **message,
+                "images": self.image_encoder.encode_all(message["images"]),
+            }
+        Message(**message)
+        self._messages.append(message)
+        self._fragments.append(json.dumps(message))
+        self._encoded = None
+
+    def extend(self, messages: Iterable[dict]) -> None:
+        """
+        Append several messages
+        :param messages: The messages to append
+        """
+        for message in messages:
+            self.append(message)
+
+    def append_completion(self, completion: ChatCompletion) -> None:
+        """
+        Append the messages generated by a chat completion
+        :param completion: The completion returned by generate_chat_completion
+        """
+        for message in completion.message:
+            self.append(message.model_dump(exclude_none=True))
+
+    def encoded(self) -> str:
+        """
+        Get the messages encoded as a JSON array
+        :return: The JSON text of the messages
+        """
+        if self._encoded is None:
+            self._encoded = f"[{', '.join(self._fragments)}]"
+        return self._encoded
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self._messages)
+
+    def __getitem__(self, index: int) -> dict:
+        return self._messages[index]
@@ -0,0 +1,204 @@
+"""Base64 encoding of images for multimodal requests, cached by content hash"""
+from __future__ import annotations
+
+import binascii
+import hashlib
+import io
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, BinaryIO, Iterable, Optional, Union
+
+if TYPE_CHECKING:  # pragma: no cover
+    from ollama_python.models.metrics import ImageCacheStats
+
+Image = Union[str, bytes, bytearray, memoryview, os.PathLike, BinaryIO]
+
+# A multiple of 3, so every chunk but the last encodes without padding
+_CHUNK_SIZE = 3 * 256 * 1024
+
+
+def _digest(data) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _encode_buffer(data) -> str:
+    """Encode a buffer chunk by chunk into one preallocated output buffer"""
+    with memoryview(data) as view:
+        output = bytearray(4 * ((len(view) + 2) // 3))
+        position = 0
+        for start in range(0, len(view), _CHUNK_SIZE):
+            encoded = binascii.b2a_base64(
+                view[start : start + _CHUNK_SIZE], newline=False
+            )
+            output[position : position + len(encoded)] = encoded
+            position += len(encoded)
+    return output.decode("ascii")
+
+
+class ImageEncoder:
+    """
+    Base64-encode images given as paths, bytes or file objects. Files are memory-mapped where
+    possible and encoded in chunks, and the encoded payloads are kept in an LRU cache keyed by a
+    hash of their content, so an image sent with every request is only encoded once.
+    Strings are assumed to be base64-encoded already and are passed through.
+    """
+
+    def __init__(
+        self, max_entries: int = 64, max_bytes: Optional[int] = 256 * 1024 * 1024
+    ):
+        """
+        Initialize the encoder
+        :param max_entries: The number of encoded images to cache, 0 disables the cache
+        :param max_bytes: The total size of the cached payloads, None for no limit
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._cache: OrderedDict[str, str] = OrderedDict()
+        # (path, size, mtime) -> content hash, so unchanged files are not even re-hashed
+        self._files: OrderedDict[tuple, str] = OrderedDict()
+        self._cached_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def encode(self, image: Image) -> str:
+        """
+        Encode a single image
+        :param image: A path, bytes, a binary file object or an already base64-encoded string
+        :return: The base64-encoded image
+        """
+        if isinstance(image, str):
+            return image
+        if isinstance(image, (bytes, bytearray, memoryview)):
+            return self._encode_data(image)
+        if isinstance(image, os.PathLike):
+            return self._encode_path(os.fspath(image))
+        if hasattr(image, "read"):
+            return self._encode_file(image)[1]
+        raise TypeError(f"Unsupported image type {type(image).__name__}")
+
+    def encode_all(self, images: Iterable[Image]) -> list[str]:
+        """
+        Encode a list of images
+        :param images: Paths, bytes, binary file objects or already base64-encoded strings
+        :return: The base64-encoded images
+        """
+        return [self.encode(image) for image in images]
+
+    def stats(self) -> ImageCacheStats:
+        """
+        Get a snapshot of the cache
+        :return: The cache statistics
+        """
+        from ollama_python.models.metrics import ImageCacheStats
+
+        with self._lock:
+            return ImageCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                entries=len(self._cache),
+                cached_bytes=self._cached_bytes,
+                evictions=self._evictions,
+            )
+
+    def clear(self) -> None:
+        """Drop every cached payload"""
+        with self._lock:
+            self._cache.clear()
+            self._files.clear()
+            self._cached_bytes = 0
+
+    def _lookup(self, digest: str) -> Optional[str]:
+        with self._lock:
+            encoded = self._cache.get(digest)
+            if encoded is None:
+                self._misses += 1
+                return None
+            self._cache.move_to_end(digest)
+            self._hits += 1
+            return encoded
+
+    def _store(self, digest: str, encoded: str) -> None:
+        if not self.max_entries or (
+            self.max_bytes is not None and len(encoded) > self.max_bytes
+        ):
+            return
+        with self._lock:
+            if digest in self._cache:
+                return
+            self._cache[digest] = encoded
+            self._cached_bytes += len(encoded)
+            while len(self._cache) > self.max_entries or (
+                self.max_bytes is not None and self._cached_bytes > self.max_bytes
+            ):
+                _, evicted = self._cache.popitem(last=False)
+                self._cached_bytes -= len(evicted)
+                self._evictions += 1
+
+    def _encode_data(self, data) -> str:
+        digest = _digest(data)
+        encoded = self._lookup(digest)
+        if encoded is None:
+            encoded = _encode_buffer(data)
+            self._store(digest, encoded)
+        return encoded
+
+    def _encode_path(self, path: str) -> str:
+        status = os.stat(path)
+        key = (os.path.realpath(path), status.st_size, status.st_mtime_ns)
+        with self._lock:
+            digest = self._files.get(key)
+        if digest is not None:
+            encoded = self._lookup(digest)
+            if encoded is not None:
+                return encoded
+
+        with open(path, "rb") as file:
+            digest, encoded = self._encode_file(file)
+        with self._lock:
+            self._files[key] = digest
+            while len(self._files) > max(self.max_entries, 1) * 4:
+                self._files.popitem(last=False)
+        return encoded
+
+    def _encode_file(self, file: BinaryIO) -> tuple[str, str]:
+        try:
+            fileno = file.fileno()
+            mappable = file.tell() == 0 and os.fstat(fileno).st_size > 0
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            mappable = False
+
+        if mappable:
+            with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as mapped:
+                file.seek(0, io.SEEK_END)
+                digest = _digest(mapped)
+                encoded = self._lookup(digest)
+                if encoded is None:
+                    encoded = _encode_buffer(mapped)
+                    self._store(digest, encoded)
+                return digest, encoded
+
+        # Streams that cannot be mapped are hashed and encoded in a single pass
+        hasher = hashlib.blake2b(digest_size=16)
+        parts: list[bytes] = []
+        pending = b""
+        while True:
+            data = file.read(_CHUNK_SIZE)
+            if not data:
+                break
+            hasher.update(data)
+            pending += data
+            usable = len(pending) - len(pending) % 3
+            parts.append(binascii.b2a_base64(pending[:usable], newline=False))
+            pending = pending[usable:]
+        parts.append(binascii.b2a_base64(pending, newline=False))
+
+        digest = hasher.hexdigest()
+        encoded = self._lookup(digest)
+        if encoded is None:
+            encoded = b"".join(parts).decode("ascii")
+            self._store(digest, encoded)
+        return digest, encoded
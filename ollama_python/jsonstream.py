@@ -0,0 +1,234 @@
+"""Incremental parsing of JSON generated with format="json" """
+import json
+from typing import Any, Callable, Generator, Iterator, NamedTuple, Optional, Union
+
+from ollama_python.stopping import completion_text
+
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = ",:{}[]" + _WHITESPACE
+# What may follow in an open array or object, by the state of its frame
+_EXPECTED = {
+    (list, "first"): "a value or ']'",
+    (list, "member"): "a value",
+    (list, "comma"): "',' or ']'",
+    (dict, "first"): "a string key or '}'",
+    (dict, "member"): "a string key",
+    (dict, "colon"): "':'",
+    (dict, "value"): "a value",
+    (dict, "comma"): "',' or '}'",
+}
+
+
+class JsonEvent(NamedTuple):
+    """
+    A JSON value that has become syntactically complete
+    path: The keys and indexes leading to the value, empty for the top-level value
+    value: The completed value
+    document: The top-level value as parsed so far, with its completed members in place
+    """
+
+    path: tuple[Union[str, int], ...]
+    value: Any
+    document: Any
+
+
+class _Frame:
+    """An object or array that is still open"""
+
+    def __init__(self, container: Union[dict, list], path: tuple):
+        self.container = container
+        self.path = path
+        self.key: Optional[str] = None
+        # "first" right after the opening bracket, "member" after a comma, "colon" after a key,
+        # "value" after a colon and "comma" after a member
+        self.expect = "first"
+
+    def unexpected(self, token: str) -> ValueError:
+        expected = _EXPECTED[type(self.container), self.expect]
+        return ValueError(f"Expected {expected} in JSON document, got {token}")
+
+
+class IncrementalJSONParser:
+    """
+    Parse JSON text fed in arbitrary fragments, reporting every value as soon as it is complete.
+    Each character is examined once, and objects and arrays are built in place, so nothing is
+    re-parsed when more text arrives.
+    """
+
+    def __init__(self, max_depth: Optional[int] = None):
+        """
+        Initialize the parser
+        :param max_depth: Only report values at most this many keys or indexes deep, None reports every value
+        """
+        self.max_depth = max_depth
+        self.complete = False
+        self._stack: list[_Frame] = []
+        self._document: Any = None
+        self._events: list[JsonEvent] = []
+        self._string: Optional[list[str]] = None
+        self._escaped = False
+        self._scalar: list[str] = []
+        # Set once the top-level value is complete, only whitespace may follow until close
+        self._ended = False
+
+    def feed(self, text: str) -> list[JsonEvent]:
+        """
+        Parse the next fragment of text
+        :param text: The fragment
+        :return: The values completed by the fragment, innermost first
+        :raises ValueError: If the text is not valid JSON
+        """
+        for character in text:
+            if self._string is not None:
+                self._string.append(character)
+                if self._escaped:
+                    self._escaped = False
+                elif character == "\\":
+                    self._escaped = True
+                elif character == '"':
+                    raw, self._string = "".join(self._string), None
+                    self._value(json.loads(raw))
+            elif self._ended and character not in _WHITESPACE:
+                raise ValueError(
+                    f"Unexpected {character!r} after the end of the JSON document"
+                )
+            elif character in _DELIMITERS:
+                if self._scalar:
+                    self._flush_scalar()
+                if character == "{" or character == "[":
+                    self._open({} if character == "{" else [])
+                elif character == "}" or character == "]":
+                    self._close(character)
+                elif character == "," or character == ":":
+                    self._separator(character)
+            elif character == '"':
+                self._string = ['"']
+            else:
+                self._scalar.append(character)
+
+        events, self._events = self._events, []
+        return events
+
+    def close(self) -> list[JsonEvent]:
+        """
+        Finish parsing, completing a trailing top-level number or literal. The parser then accepts
+        the next document
+        :return: The values completed by the end of the text
+        :raises ValueError: If a value is still incomplete
+        """
+        if self._scalar:
+            self._flush_scalar()
+        if self._stack or self._string is not None:
+            raise ValueError("Incomplete JSON document")
+        self._ended = False
+        events, self._events = self._events, []
+        return events
+
+    def _flush_scalar(self) -> None:
+        raw, self._scalar = "".join(self._scalar), []
+        self._value(json.loads(raw))
+
+    def _child_path(self) -> tuple:
+        frame = self._stack[-1]
+        if isinstance(frame.container, list):
+            if frame.expect == "comma":
+                raise frame.unexpected("a value")
+            return frame.path + (len(frame.container),)
+        if frame.expect != "value":
+            raise frame.unexpected("a value")
+        return frame.path + (frame.key,)
+
+    def _separator(self, character: str) -> None:
+        frame = self._stack[-1] if self._stack else None
+        if frame is None:
+            raise ValueError(f"Unexpected {character!r} outside of a JSON value")
+        if character == "," and frame.expect == "comma":
+            frame.expect = "member"
+        elif character == ":" and frame.expect == "colon":
+            frame.expect = "value"
+        else:
+            raise frame.unexpected(repr(character))
+
+    def _open(self, container: Union[dict, list]) -> None:
+        if self._stack:
+            path = self._child_path()
+            # Attach the container right away so the partial document shows it
+            parent = self._stack[-1]
+            if isinstance(parent.container, list):
+                parent.container.append(container)
+            else:
+                parent.container[parent.key] = container
+        else:
+            path = ()
+            self._document = container
+            self.complete = False
+        self._stack.append(_Frame(container, path))
+
+    def _close(self, character: str) -> None:
+        if not self._stack:
+            raise ValueError(f"Unexpected {character!r} outside of a JSON value")
+        frame = self._stack.pop()
+        if isinstance(frame.container, dict) != (character == "}"):
+            raise ValueError(f"Mismatched {character!r} in JSON document")
+        if frame.expect != "first" and frame.expect != "comma":
+            raise frame.unexpected(repr(character))
+        if self._stack:
+            parent = self._stack[-1]
+            parent.key = None
+            parent.expect = "comma"
+        else:
+            self.complete = self._ended = True
+        self._emit(frame.path, frame.container)
+
+    def _value(self, value: Any) -> None:
+        if not self._stack:
+            self._document = value
+            self.complete = self._ended = True
+            self._emit((), value)
+            return
+        frame = self._stack[-1]
+        if isinstance(frame.container, dict) and frame.expect in ("first", "member"):
+            if not isinstance(value, str):
+                raise frame.unexpected("a value")
+            frame.key = value
+            frame.expect = "colon"
+            return
+        path = self._child_path()
+        if isinstance(frame.container, list):
+            frame.container.append(value)
+        else:
+            frame.container[frame.key] = value
+            frame.key = None
+        frame.expect = "comma"
+        self._emit(path, value)
+
+    def _emit(self, path: tuple, value: Any) -> None:
+        if self.max_depth is None or len(path) <= self.max_depth:
+            self._events.append(JsonEvent(path, value, self._document))
+
+
+def parse_json_stream(
+    stream: Iterator,
+    max_depth: Optional[int] = None,
+    stop_at_end: bool = True,
+    text: Callable[[Any], str] = completion_text,
+) -> Generator[JsonEvent, None, None]:
+    """
+    Parse the JSON generated by a streamed generate or chat call as it arrives
+    :param stream: The stream returned by generate(stream=True, format="json") or generate_chat_completion
+    :param max_depth: Only report values at most this many keys or indexes deep, None reports every value
+    :param stop_at_end: Close the stream, and its connection, as soon as the top-level value is complete
+    :param text: A function returning the text fragment of a streamed item
+    :return: A generator of the values in the order they complete, the top-level value last
+    """
+    parser = IncrementalJSONParser(max_depth=max_depth)
+    try:
+        for item in stream:
+            yield from parser.feed(text(item))
+            if stop_at_end and parser.complete:
+                return
+        yield from parser.close()
+    finally:
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
@@ -0,0 +1,360 @@
+"""Adaptive per-host concurrency limits driven by observed latency"""
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Iterator, Literal, Optional
+
+from ollama_python.models.metrics import HostLimitStats, LimiterStats
+
+Algorithm = Literal["aimd", "gradient"]
+# Weights of the short and long moving averages of the latency signal
+_SHORT_WEIGHT = 0.2
+_LONG_WEIGHT = 0.02
+# Guards the gradient against a signal averaged down to nothing
+_MIN_SIGNAL = 1e-12
+
+
+class LimitExceeded(RuntimeError):
+    """Raised when a request is rejected because the queue of its host is full"""
+
+
+class _Signal:
+    """Short and long moving averages of the latency signal of one kind of request"""
+
+    __slots__ = ("short", "long")
+
+    def __init__(self, value: float):
+        self.short = value
+        self.long = value
+
+    def add(self, value: float) -> None:
+        self.short += (value - self.short) * _SHORT_WEIGHT
+        self.long += (value - self.long) * _LONG_WEIGHT
+
+
+class _Host:
+    """The limit, requests in flight and queue of one host"""
+
+    def __init__(self, limit: float):
+        self.limit = limit
+        self.in_flight = 0
+        self.waiters: deque = deque()
+        self.admitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.overloads = 0
+        self.samples = 0
+        # Requests sent before the last backoff saw the old limit and must not back off again
+        self.backed_off_at = float("-inf")
+
+
+class Permit:
+    """A slot held by one request, completions passed to :meth:`observe` refine its sample"""
+
+    __slots__ = ("host", "key", "started", "completion")
+
+    def __init__(self, host: str, key: tuple, started: float):
+        self.host = host
+        self.key = key
+        self.started = started
+        self.completion: Any = None
+
+    def observe(self, item: Any) -> None:
+        """
+        Look at a response or streamed chunk, keeping the final one with its server timings
+        :param item: The parsed response or chunk
+        """
+        if getattr(item, "done", False):
+            self.completion = item
+
+
+class AdaptiveLimiter:
+    """
+    Limit the requests in flight per host, adjusting every limit to the latency the host
+    delivers instead of a fixed cap.
+
+    Each finished request gives a sample: the generation time per token reported by the server
+    when the response carries timings, otherwise the latency seen by the client, tracked per
+    model and endpoint so different models do not distort each other. The time the server kept
+    the request queued (``total_duration`` minus the load, prompt and generation durations) is
+    used as a direct congestion signal.
+
+    ``aimd`` adds ``1 / limit`` per sample while the host keeps up and multiplies the limit by
+    ``backoff``, once per round of requests, when the short-term average of the signal exceeds ``tolerance`` times its
+    long-term average, the server queued the request for more than ``queue_threshold`` of its
+    duration, or the request timed out or failed with a server error. ``gradient`` moves the
+    limit towards ``limit * long / short`` scaled down by the queued share, plus ``sqrt(limit)``
+    of headroom. Limits only grow while at least half of them is in use.
+
+    Requests over the limit wait in a FIFO queue of at most ``max_queue`` requests per host,
+    further requests are rejected at once with :class:`LimitExceeded`; ``max_queue=0`` rejects
+    every request over the limit.
+    """
+
+    def __init__(
+        self,
+        algorithm: Algorithm = "gradient",
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        max_queue: Optional[int] = None,
+        backoff: float = 0.9,
+        tolerance: float = 2.0,
+        queue_threshold: float = 0.1,
+        smoothing: float = 0.2,
+    ):
+        """
+        Initialize the limiter
+        :param algorithm: "aimd" or "gradient"
+        :param initial_limit: The limit of a host before any sample
+        :param min_limit: The lowest limit of a host
+        :param max_limit: The highest limit of a host
+        :param max_queue: The number of requests that may wait per host, None for no limit
+        :param backoff: The factor the limit is multiplied by on congestion
+        :param tolerance: How many times its long-term average the short-term signal may reach before it counts as
+                          congestion (aimd)
+        :param queue_threshold: The share of its duration a request may spend queued on the server before it counts
+                                as congestion (aimd)
+        :param smoothing: How far the limit moves towards the new gradient limit per sample (gradient)
+        """
+        if algorithm not in ("aimd", "gradient"):
+            raise ValueError('algorithm must be "aimd" or "gradient"')
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError(
+                "Limits must satisfy 1 <= min_limit <= initial_limit <= max_limit"
+            )
+
+        self.algorithm = algorithm
+        self.initial_limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.queue_threshold = queue_threshold
+        self.smoothing = smoothing
+        self._cond = threading.Condition()
+        self._hosts: dict[str, _Host] = {}
+        self._signals: dict[tuple, _Signal] = {}
+
+    def acquire(
+        self,
+        host: str,
+        model: Optional[str] = None,
+        endpoint: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> Permit:
+        """
+        Wait for a slot on the given host
+        :param host: The host the request is sent to
+        :param model: The model of the request, the latency signal is tracked per model
+        :param endpoint: The endpoint of the request, the latency signal is tracked per endpoint
+        :param timeout: The longest time in seconds to wait, waits forever when omitted
+        :return: The permit to release once the request is done
+        :raises LimitExceeded: If the queue of the host is full
+        :raises TimeoutError: If no slot was granted within the timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            state = self._host(host)
+            if state.in_flight < int(state.limit) and not state.waiters:
+                state.in_flight += 1
+            else:
+                if self.max_queue is not None and len(state.waiters) >= self.max_queue:
+                    state.rejected += 1
+                    raise LimitExceeded(
+                        f"{host} is at its limit of {int(state.limit)} requests in flight"
+                    )
+                waiter = [False]
+                state.waiters.append(waiter)
+                while not waiter[0]:
+                    remaining = (
+                        None if deadline is None else deadline - time.monotonic()
+                    )
+                    if remaining is not None and remaining <= 0:
+                        state.waiters.remove(waiter)
+                        state.timeouts += 1
+                        raise TimeoutError(
+                            f"No slot on {host} within {timeout} seconds"
+                        )
+                    self._cond.wait(remaining)
+            state.admitted += 1
+        return Permit(host, (host, model, endpoint), time.monotonic())
+
+    def release(
+        self, permit: Permit, overloaded: bool = False, sample: bool = True
+    ) -> None:
+        """
+        Free the slot of a finished request and adjust the limit of its host
+        :param permit: The permit returned by acquire
+        :param overloaded: Whether the request timed out or failed with a server error
+        :param sample: Whether the latency of the request is a sample of the load, False for requests cut short
+        """
+        latency = time.monotonic() - permit.started
+        with self._cond:
+            state = self._hosts[permit.host]
+            utilized = state.in_flight >= state.limit / 2
+            state.in_flight -= 1
+            try:
+                if overloaded:
+                    state.overloads += 1
+                    self._back_off(state, permit)
+                elif sample:
+                    self._sample(state, permit, latency, utilized)
+            finally:
+                # The freed slot must reach the waiters whatever the sample did
+                self._dispatch(state)
+
+    @contextmanager
+    def slot(
+        self,
+        host: str,
+        model: Optional[str] = None,
+        endpoint: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> Iterator[Permit]:
+        """
+        Hold a slot for the duration of the block, errors raised in the block count as overload
+        when they are timeouts, connection errors or server errors, other errors are not sampled
+        :param host: The host the request is sent to
+        :param model: The model of the request
+        :param endpoint: The endpoint of the request
+        :param timeout: The longest time in seconds to wait for the slot
+        """
+        permit = self.acquire(
+            host=host, model=model, endpoint=endpoint, timeout=timeout
+        )
+        try:
+            yield permit
+        except BaseException as exc:
+            self.release(permit, overloaded=is_overload(exc), sample=False)
+            raise
+        self.release(permit)
+
+    def limit(self, host: str) -> int:
+        """
+        Get the current limit of a host
+        :param host: The host
+        :return: The number of requests allowed in flight
+        """
+        with self._cond:
+            return int(self._host(host).limit)
+
+    def stats(self) -> LimiterStats:
+        """
+        Get a snapshot of the limits, requests in flight and queues of every host
+        :return: The limiter statistics
+        """
+        with self._cond:
+            return LimiterStats(
+                algorithm=self.algorithm,
+                hosts=[
+                    HostLimitStats(
+                        base_url=host,
+                        limit=int(state.limit),
+                        in_flight=state.in_flight,
+                        queued=len(state.waiters),
+                        admitted=state.admitted,
+                        rejected=state.rejected,
+                        timeouts=state.timeouts,
+                        overloads=state.overloads,
+                        samples=state.samples,
+                    )
+                    for host, state in self._hosts.items()
+                ],
+            )
+
+    def _host(self, host: str) -> _Host:
+        """Get the state of a host, the lock must be held"""
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _Host(float(self.initial_limit))
+        return state
+
+    def _sample(
+        self, state: _Host, permit: Permit, latency: float, utilized: bool
+    ) -> None:
+        """Adjust the limit of a host to the sample of a finished request, the lock must be held"""
+        completion = permit.completion
+        value, queued = latency, 0.0
+        key = permit.key
+        total = getattr(completion, "total_duration", None)
+        evaluation = getattr(completion, "eval_duration", None)
+        tokens = getattr(completion, "eval_count", None)
+        if total and evaluation and tokens:
+            value = evaluation / tokens / 1e9
+            key = (permit.key[0], permit.key[1], "token")
+            load = completion.load_duration or 0
+            prompt_eval = completion.prompt_eval_duration or 0
+            queued = max(0, total - load - prompt_eval - evaluation) / total
+
+        if value <= 0:
+            # A coarse clock can measure no time at all, which says nothing about the latency
+            return
+
+        signal = self._signals.get(key)
+        if signal is None:
+            signal = self._signals[key] = _Signal(value)
+        else:
+            signal.add(value)
+        state.samples += 1
+
+        if self.algorithm == "aimd":
+            congested = (
+                signal.short > signal.long * self.tolerance
+                or queued > self.queue_threshold
+            )
+            if congested:
+                self._back_off(state, permit)
+                return
+            if utilized:
+                limit = state.limit + 1 / state.limit
+            else:
+                limit = state.limit
+        else:
+            ratio = signal.long / max(signal.short, _MIN_SIGNAL)
+            gradient = max(0.5, min(1.0, ratio)) * (1 - queued)
+            target = state.limit * gradient + math.sqrt(state.limit)
+            if not utilized:
+                target = min(target, state.limit)
+            limit = state.limit + (target - state.limit) * self.smoothing
+        state.limit = max(self.min_limit, min(self.max_limit, limit))
+
+    def _back_off(self, state: _Host, permit: Permit) -> None:
+        """Lower the limit of a host once per round of requests, the lock must be held"""
+        if permit.started > state.backed_off_at:
+            state.limit = max(self.min_limit, state.limit * self.backoff)
+            state.backed_off_at = time.monotonic()
+
+    def _dispatch(self, state: _Host) -> None:
+        """Grant free slots to the waiters in order, the lock must be held"""
+        granted = False
+        while state.waiters and state.in_flight < int(state.limit):
+            state.waiters.popleft()[0] = True
+            state.in_flight += 1
+            granted = True
+        if granted:
+            self._cond.notify_all()
+
+
+def is_overload(error: BaseException) -> bool:
+    """
+    Whether an error raised while sending a request is a sign of an overloaded host
+    :param error: The error
+    :return: True for timeouts, connection errors and server errors
+    """
+    import requests
+
+    if isinstance(error, requests.exceptions.HTTPError):
+        response = error.response
+        return response is not None and response.status_code >= 500
+    return isinstance(
+        error,
+        (
+            requests.exceptions.Timeout,
+            requests.exceptions.ConnectionError,
+            TimeoutError,
+        ),
+    )
@@ -0,0 +1,422 @@
+"""
+Open-loop load generator for capacity testing an Ollama deployment.
+
+Requests are sent at the times of a Poisson process, or of a trace, whether or not earlier
+requests have completed, so a saturated server shows up as growing latencies instead of a
+lower request rate. Latencies are measured from the scheduled send time.
+
+    python -m ollama_python.loadtest --model mistral --rate 2 --duration 60 --stream-ratio 0.5
+    python -m ollama_python.loadtest --fake --rate 50 --duration 10
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Iterable, Optional
+
+from ollama_python.endpoints.embedding import EmbeddingAPI
+from ollama_python.endpoints.generate import GenerateAPI
+from ollama_python.fakeserver import FakeServer
+
+if TYPE_CHECKING:  # pragma: no cover
+    from ollama_python.models.metrics import DistributionStats, LoadTestReport
+
+KINDS = ("generate", "stream", "embedding")
+_WORDS = (
+    "the quick brown fox jumps over lazy dog model token stream latency server request "
+    "answer question river mountain ocean forest city light sound number story"
+).split()
+
+
+class Arrival:
+    """A request scheduled by the load generator"""
+
+    __slots__ = ("at", "kind", "prompt")
+
+    def __init__(self, at: float, kind: str, prompt: str):
+        self.at = at
+        self.kind = kind
+        self.prompt = prompt
+
+
+class _Mix:
+    """Draws the kind and prompt of requests"""
+
+    def __init__(
+        self,
+        prompt_sizes: list[int],
+        stream_ratio: float,
+        embedding_ratio: float,
+        rng: random.Random,
+    ):
+        self.prompt_sizes = prompt_sizes
+        self.stream_ratio = stream_ratio
+        self.embedding_ratio = embedding_ratio
+        self.rng = rng
+
+    def kind(self) -> str:
+        if self.rng.random() < self.embedding_ratio:
+            return "embedding"
+        return "stream" if self.rng.random() < self.stream_ratio else "generate"
+
+    def prompt(self, words: Optional[int] = None) -> str:
+        words = words or self.rng.choice(self.prompt_sizes)
+        # Random words, so the server cannot reuse the evaluation of an earlier prompt
+        return " ".join(self.rng.choices(_WORDS, k=words))
+
+
+def poisson_arrivals(rate: float, duration: float, mix: _Mix) -> list[Arrival]:
+    """
+    Schedule requests at the times of a Poisson process
+    :param rate: The mean number of requests per second
+    :param duration: The length of the schedule in seconds
+    :param mix: Draws the kind and prompt of every request
+    :return: The scheduled requests
+    """
+    if rate <= 0:
+        raise ValueError("rate must be positive")
+    arrivals = []
+    at = mix.rng.expovariate(rate)
+    while at < duration:
+        arrivals.append(Arrival(at, mix.kind(), mix.prompt()))
+        at += mix.rng.expovariate(rate)
+    return arrivals
+
+
+def trace_arrivals(lines: Iterable[str], mix: _Mix) -> list[Arrival]:
+    """
+    Schedule requests from a trace of JSON lines such as {"at": 0.5, "kind": "stream", "prompt_words": 200}
+    :param lines: The lines of the trace, only "at" (seconds from the start) is required
+    :param mix: Draws the kind and prompt of requests the trace does not describe
+    :return: The scheduled requests, in the order of their times
+    """
+    arrivals = []
+    for line in lines:
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        kind = entry.get("kind") or mix.kind()
+        if kind not in KINDS:
+            raise ValueError(f"kind must be one of {', '.join(KINDS)}")
+        prompt = entry.get("prompt") or mix.prompt(entry.get("prompt_words"))
+        arrivals.append(Arrival(float(entry["at"]), kind, prompt))
+    return sorted(arrivals, key=lambda arrival: arrival.at)
+
+
+class _Result:
+    __slots__ = ("kind", "error", "latency", "first_token", "tokens", "token_seconds")
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.error: Optional[str] = None
+        self.latency = 0.0
+        self.first_token: Optional[float] = None
+        self.tokens = 0
+        self.token_seconds = 0.0
+
+
+def _distribution(samples: list[float]) -> DistributionStats:
+    from ollama_python.models.metrics import DistributionStats
+
+    if not samples:
+        return DistributionStats()
+    ordered = sorted(samples)
+
+    def quantile(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return DistributionStats(
+        count=len(ordered),
+        mean=sum(ordered) / len(ordered),
+        p50=quantile(0.5),
+        p90=quantile(0.9),
+        p99=quantile(0.99),
+    )
+
+
+class LoadTest:
+    """
+    Send scheduled requests open-loop through GenerateAPI and EmbeddingAPI clients and
+    summarize latencies, time to first token, generation speed and errors per kind of request.
+    Every worker thread has its own clients, so connections are not shared between threads.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        embedding_model: Optional[str] = None,
+        num_predict: Optional[int] = None,
+        max_in_flight: int = 256,
+        clock: Callable[[], float] = time.perf_counter,
+        **kwargs,
+    ):
+        """
+        Initialize the load test
+        :param base_url: The base URL of the API under test
+        :param model: The model generating completions
+        :param embedding_model: The model generating embeddings, defaults to model
+        :param num_predict: The number of tokens to generate per request, the model decides when omitted
+        :param max_in_flight: Requests arriving while this many are in flight are dropped and counted
+        :param clock: The clock used to schedule and time requests, in seconds
+        :param kwargs: Transport settings of the clients e.g. timeouts or socket_path
+        """
+        self.base_url = base_url
+        self.model = model
+        self.embedding_model = embedding_model or model
+        self.num_predict = num_predict
+        self.max_in_flight = max_in_flight
+        self.clock = clock
+        self.client_settings = kwargs
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    def run(self, arrivals: list[Arrival]) -> LoadTestReport:
+        """
+        Send the scheduled requests and wait for all of them to complete
+        :param arrivals: The scheduled requests, in the order of their times
+        :return: The report of the run
+        """
+        from ollama_python.models.metrics import LoadTestReport
+
+        results: list[_Result] = []
+        dropped = 0
+        max_lag = 0.0
+        start = self.clock()
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            for arrival in arrivals:
+                delay = start + arrival.at - self.clock()
+                if delay > 0:
+                    time.sleep(delay)
+                max_lag = max(max_lag, self.clock() - start - arrival.at)
+                with self._lock:
+                    if self._in_flight >= self.max_in_flight:
+                        dropped += 1
+                        continue
+                    self._in_flight += 1
+                executor.submit(self._send, arrival, start + arrival.at, results)
+        elapsed = self.clock() - start
+
+        tokens = sum(result.tokens for result in results if result.error is None)
+        errors: dict[str, int] = {}
+        for result in results:
+            if result.error is not None:
+                errors[result.error] = errors.get(result.error, 0) + 1
+        return LoadTestReport(
+            duration_seconds=elapsed,
+            scheduled=len(arrivals),
+            completed=len(results),
+            dropped=dropped,
+            offered_rate=(
+                len(arrivals) / arrivals[-1].at if arrivals and arrivals[-1].at else 0.0
+            ),
+            achieved_rate=len(results) / elapsed if elapsed else 0.0,
+            output_tokens_per_second=tokens / elapsed if elapsed else 0.0,
+            max_dispatch_lag_seconds=max_lag,
+            errors=errors,
+            kinds=[
+                self._summary(
+                    kind, [result for result in results if result.kind == kind]
+                )
+                for kind in KINDS
+                if any(result.kind == kind for result in results)
+            ],
+        )
+
+    def _summary(self, kind: str, results: list[_Result]):
+        from ollama_python.models.metrics import LoadTestKindStats
+
+        succeeded = [result for result in results if result.error is None]
+        return LoadTestKindStats(
+            kind=kind,
+            requests=len(results),
+            errors=len(results) - len(succeeded),
+            error_rate=(len(results) - len(succeeded)) / len(results),
+            latency_seconds=_distribution([result.latency for result in succeeded]),
+            time_to_first_token_seconds=_distribution(
+                [
+                    result.first_token
+                    for result in succeeded
+                    if result.first_token is not None
+                ]
+            ),
+            tokens_per_second=_distribution(
+                [
+                    result.tokens / result.token_seconds
+                    for result in succeeded
+                    if result.tokens and result.token_seconds
+                ]
+            ),
+        )
+
+    def _clients(self) -> tuple[GenerateAPI, EmbeddingAPI]:
+        clients = getattr(self._local, "clients", None)
+        if clients is None:
+            clients = self._local.clients = (
+                GenerateAPI(self.model, self.base_url, **self.client_settings),
+                EmbeddingAPI(
+                    self.embedding_model, self.base_url, **self.client_settings
+                ),
+            )
+        return clients
+
+    def _send(self, arrival: Arrival, scheduled: float, results: list) -> None:
+        result = _Result(arrival.kind)
+        generate, embedding = self._clients()
+        options = {"num_predict": self.num_predict} if self.num_predict else None
+        try:
+            if arrival.kind == "embedding":
+                embedding.get_embedding(prompt=arrival.prompt)
+            elif arrival.kind == "generate":
+                completion = generate.generate(prompt=arrival.prompt, options=options)
+                result.tokens = completion.eval_count
+                result.token_seconds = completion.eval_duration / 1e9
+            else:
+                self._consume(
+                    generate.generate(
+                        prompt=arrival.prompt, options=options, stream=True
+                    ),
+                    scheduled,
+                    result,
+                )
+        except Exception as exc:
+            result.error = type(exc).__name__
+        result.latency = self.clock() - scheduled
+        with self._lock:
+            self._in_flight -= 1
+            results.append(result)
+
+    def _consume(self, stream: Iterable, scheduled: float, result: _Result) -> None:
+        chunks = 0
+        first = None
+        for item in stream:
+            if first is None:
+                first = self.clock()
+                result.first_token = first - scheduled
+            chunks += 1
+            if item.done and item.eval_count and item.eval_duration:
+                result.tokens = item.eval_count
+                result.token_seconds = item.eval_duration / 1e9
+                return
+        # Without server timings count the chunks, each of which is usually one token
+        result.tokens = chunks
+        result.token_seconds = self.clock() - first if first is not None else 0.0
+
+
+def format_report(report: LoadTestReport) -> str:
+    """
+    Format a report as a table
+    :param report: The report of a run
+    :return: The text of the table
+    """
+    lines = [
+        f"duration {report.duration_seconds:.1f}s, scheduled {report.scheduled}, "
+        f"completed {report.completed}, dropped {report.dropped}",
+        f"offered {report.offered_rate:.2f} req/s, achieved {report.achieved_rate:.2f} req/s, "
+        f"output {report.output_tokens_per_second:.1f} tokens/s, "
+        f"max dispatch lag {report.max_dispatch_lag_seconds * 1000:.1f}ms",
+        "",
+        f"{'kind':<10}{'requests':>9}{'errors':>8}"
+        f"{'p50 s':>9}{'p90 s':>9}{'p99 s':>9}{'ttft p50':>10}{'ttft p99':>10}{'tok/s p50':>11}",
+    ]
+    for kind in report.kinds:
+        columns = [
+            kind.latency_seconds.p50,
+            kind.latency_seconds.p90,
+            kind.latency_seconds.p99,
+            kind.time_to_first_token_seconds.p50,
+            kind.time_to_first_token_seconds.p99,
+        ]
+        widths = [9, 9, 9, 10, 10]
+        if not kind.latency_seconds.count:
+            columns[:3] = [None] * 3
+        if not kind.time_to_first_token_seconds.count:
+            columns[3:] = [None] * 2
+        row = [
+            f"{'-':>{width}}" if value is None else f"{value:>{width}.3f}"
+            for value, width in zip(columns, widths)
+        ]
+        speed = kind.tokens_per_second
+        row.append(f"{speed.p50:>11.1f}" if speed.count else f"{'-':>11}")
+        lines.append(
+            f"{kind.kind:<10}{kind.requests:>9}{kind.error_rate:>8.1%}" + "".join(row)
+        )
+    for error, count in sorted(report.errors.items()):
+        lines.append(f"error {error}: {count}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m ollama_python.loadtest",
+        description="Open-loop load generator for capacity testing an Ollama deployment",
+    )
+    parser.add_argument("--base-url", default="http://localhost:11434/api")
+    parser.add_argument("--model", default="mistral")
+    parser.add_argument("--embedding-model", help="defaults to --model")
+    parser.add_argument("--rate", type=float, default=1.0, help="requests per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument(
+        "--trace", help="JSON lines with the send time 'at' of every request"
+    )
+    parser.add_argument(
+        "--prompt-sizes",
+        default="16,128,1024",
+        help="comma separated prompt lengths in words, drawn uniformly",
+    )
+    parser.add_argument("--stream-ratio", type=float, default=0.5)
+    parser.add_argument("--embedding-ratio", type=float, default=0.0)
+    parser.add_argument("--num-predict", type=int, help="tokens generated per request")
+    parser.add_argument("--max-in-flight", type=int, default=256)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument(
+        "--fake", action="store_true", help="test against a built-in fake server"
+    )
+    parser.add_argument("--fake-tokens", type=int, default=32)
+    parser.add_argument("--fake-token-delay", type=float, default=0.005)
+    parser.add_argument("--fake-error-rate", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    mix = _Mix(
+        [int(size) for size in args.prompt_sizes.split(",")],
+        args.stream_ratio,
+        args.embedding_ratio,
+        random.Random(args.seed),
+    )
+    if args.trace:
+        with open(args.trace) as trace:
+            arrivals = trace_arrivals(trace, mix)
+    else:
+        arrivals = poisson_arrivals(args.rate, args.duration, mix)
+
+    def run(base_url: str) -> LoadTestReport:
+        return LoadTest(
+            base_url,
+            args.model,
+            embedding_model=args.embedding_model,
+            num_predict=args.num_predict,
+            max_in_flight=args.max_in_flight,
+        ).run(arrivals)
+
+    if args.fake:
+        with FakeServer(
+            tokens=args.fake_tokens,
+            token_delay=args.fake_token_delay,
+            error_rate=args.fake_error_rate,
+            seed=args.seed,
+        ) as server:
+            report = run(server.base_url)
+    else:
+        report = run(args.base_url)
+
+    print(report.model_dump_json(indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,63 @@
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # pragma: no cover
+    from ollama_python.models.embedding import *  # noqa
+    from ollama_python.models.generate import *  # noqa
+    from ollama_python.models.metrics import *  # noqa
+    from ollama_python.models.model_management import *  # noqa
+    from ollama_python.models.transport import *  # noqa
+
+# Building the pydantic models is the bulk of the import cost, so the modules are only imported
+# when one of their models is first used
+_EXPORTS = {
+    "Embedding": "ollama_python.models.embedding",
+    "Embeddings": "ollama_python.models.embedding",
+    "Message": "ollama_python.models.generate",
+    "BaseCompletion": "ollama_python.models.generate",
+    "Completion": "ollama_python.models.generate",
+    "ChatCompletion": "ollama_python.models.generate",
+    "StreamCompletion": "ollama_python.models.generate",
+    "StreamChatCompletion": "ollama_python.models.generate",
+    "Options": "ollama_python.models.generate",
+    "WarmupTargetStats": "ollama_python.models.metrics",
+    "WarmupStats": "ollama_python.models.metrics",
+    "SingleFlightStats": "ollama_python.models.metrics",
+    "BatcherStats": "ollama_python.models.metrics",
+    "LaneStats": "ollama_python.models.metrics",
+    "AdmissionStats": "ollama_python.models.metrics",
+    "ImageCacheStats": "ollama_python.models.metrics",
+    "DistributionStats": "ollama_python.models.metrics",
+    "ModelPerformanceStats": "ollama_python.models.metrics",
+    "PerformanceStats": "ollama_python.models.metrics",
+    "PrefixStats": "ollama_python.models.metrics",
+    "MulticastStats": "ollama_python.models.metrics",
+    "ReadAheadStats": "ollama_python.models.metrics",
+    "SegmentStats": "ollama_python.models.metrics",
+    "LoadTestKindStats": "ollama_python.models.metrics",
+    "LoadTestReport": "ollama_python.models.metrics",
+    "HostLimitStats": "ollama_python.models.metrics",
+    "LimiterStats": "ollama_python.models.metrics",
+    "SemanticCacheStats": "ollama_python.models.metrics",
+    "AuditLogStats": "ollama_python.models.metrics",
+    "ResponsePayload": "ollama_python.models.model_management",
+    "ModelDetails": "ollama_python.models.model_management",
+    "ModelTag": "ollama_python.models.model_management",
+    "ModelInformation": "ollama_python.models.model_management",
+    "ModelTagList": "ollama_python.models.model_management",
+    "Timeouts": "ollama_python.models.transport",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + __all__)
@@ -5,3 +5,11 @@ class Embedding(BaseModel):
     """A model embedding"""
 
     embedding: list[float] = Field(..., description="The embedding of the text")
+
+
+class Embeddings(BaseModel):
+    """A batch of model embeddings, in the same order as the inputs"""
+
+    embeddings: list[list[float]] = Field(
+        ..., description="The embeddings of the texts"
+    )
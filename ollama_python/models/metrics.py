@@ -0,0 +1,326 @@
+"""Models for the client-side metrics snapshots"""
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class WarmupTargetStats(BaseModel):
+    """Warm-up statistics for a single model on a single host"""
+
+    base_url: str = Field(..., description="The base URL of the host")
+    model: str = Field(..., description="The model kept resident")
+    warmups: int = Field(0, description="Number of warm-up calls issued")
+    failures: int = Field(0, description="Number of warm-up calls that failed")
+    observed: int = Field(0, description="Number of observed real requests")
+    cold_starts: int = Field(
+        0, description="Number of observed requests with a load_duration spike"
+    )
+    evictions: int = Field(
+        0, description="Number of warm-up calls that found the model unloaded"
+    )
+    last_load_duration: int = Field(
+        0, description="The last load_duration seen in nanoseconds"
+    )
+    next_warmup_at: float = Field(
+        ..., description="Clock time at which the next warm-up is due"
+    )
+
+
+class WarmupStats(BaseModel):
+    """A snapshot of the warm-up scheduler spend and hit rate"""
+
+    warmups: int = Field(0, description="Number of warm-up calls issued")
+    failures: int = Field(0, description="Number of warm-up calls that failed")
+    warmup_seconds: float = Field(
+        0.0, description="Server time spent on warm-up calls (total_duration)"
+    )
+    warmup_tokens: int = Field(
+        0, description="Prompt and generated tokens spent on warm-up calls"
+    )
+    observed: int = Field(0, description="Number of observed real requests")
+    cold_starts: int = Field(
+        0, description="Number of observed requests with a load_duration spike"
+    )
+    evictions: int = Field(
+        0, description="Number of warm-up calls that found the model unloaded"
+    )
+    hit_rate: float = Field(
+        1.0, description="Fraction of observed requests that found the model loaded"
+    )
+    targets: list[WarmupTargetStats] = Field(
+        default_factory=list, description="Per host and model statistics"
+    )
+
+
+class SingleFlightStats(BaseModel):
+    """A snapshot of the requests coalesced by a single-flight group"""
+
+    upstream: int = Field(0, description="Number of requests sent upstream")
+    shared: int = Field(
+        0, description="Number of requests that shared an in-flight upstream request"
+    )
+    in_flight: int = Field(0, description="Number of upstream requests in flight")
+
+
+class BatcherStats(BaseModel):
+    """A snapshot of the embedding micro-batcher"""
+
+    requests: int = Field(0, description="Number of embedding requests submitted")
+    batches: int = Field(0, description="Number of batched requests sent upstream")
+    batched_inputs: int = Field(
+        0, description="Number of inputs sent through batched requests"
+    )
+    fallbacks: int = Field(
+        0, description="Number of inputs sent to the single-prompt endpoint"
+    )
+    queued: int = Field(0, description="Number of requests waiting to be flushed")
+    mean_batch_size: float = Field(0.0, description="Mean size of the batches sent")
+    batch_supported: Optional[bool] = Field(
+        None, description="Whether the server supports batching, None until known"
+    )
+
+
+class LaneStats(BaseModel):
+    """Queue statistics of one admission priority lane"""
+
+    lane: str = Field(..., description="The name of the lane")
+    weight: float = Field(..., description="The weighted fair queuing weight")
+    queued: int = Field(0, description="Number of requests waiting for a slot")
+    admitted: int = Field(0, description="Number of requests granted a slot")
+    timeouts: int = Field(0, description="Number of requests that gave up waiting")
+    mean_wait_seconds: float = Field(
+        0.0, description="Mean time admitted requests waited for a slot"
+    )
+    max_wait_seconds: float = Field(
+        0.0, description="Longest time an admitted request waited for a slot"
+    )
+
+
+class AdmissionStats(BaseModel):
+    """A snapshot of the admission controller"""
+
+    lanes: list[LaneStats] = Field(..., description="Per lane statistics")
+    in_flight: dict[str, int] = Field(
+        default_factory=dict, description="Number of requests in flight per host"
+    )
+
+
+class ImageCacheStats(BaseModel):
+    """A snapshot of the encoded image cache"""
+
+    hits: int = Field(0, description="Number of images served from the cache")
+    misses: int = Field(0, description="Number of images that had to be encoded")
+    entries: int = Field(0, description="Number of encoded images in the cache")
+    cached_bytes: int = Field(0, description="Size of the cached base64 payloads")
+    evictions: int = Field(0, description="Number of payloads evicted from the cache")
+
+
+class DistributionStats(BaseModel):
+    """A summary of a rolling histogram, quantiles are accurate to about 5%"""
+
+    count: int = Field(0, description="Number of samples in the window")
+    mean: float = Field(0.0, description="Mean of the samples")
+    p50: float = Field(0.0, description="Estimated median")
+    p90: float = Field(0.0, description="Estimated 90th percentile")
+    p99: float = Field(0.0, description="Estimated 99th percentile")
+
+
+class ModelPerformanceStats(BaseModel):
+    """Rolling server-side performance of a single model on a single host"""
+
+    base_url: str = Field(..., description="The base URL of the host")
+    model: str = Field(..., description="The model that served the requests")
+    requests: int = Field(0, description="Number of completions in the window")
+    loads: int = Field(
+        0, description="Number of completions that had to load the model first"
+    )
+    load_rate: float = Field(
+        0.0, description="Fraction of completions that had to load the model first"
+    )
+    prompt_tokens_per_second: DistributionStats = Field(
+        default_factory=DistributionStats, description="Prompt evaluation speed"
+    )
+    generation_tokens_per_second: DistributionStats = Field(
+        default_factory=DistributionStats, description="Generation speed"
+    )
+    queue_seconds: DistributionStats = Field(
+        default_factory=DistributionStats,
+        description="Time not spent loading, evaluating or generating, mostly queueing",
+    )
+
+
+class PerformanceStats(BaseModel):
+    """A snapshot of the rolling performance analytics"""
+
+    window_seconds: float = Field(..., description="The length of the rolling window")
+    models: list[ModelPerformanceStats] = Field(
+        default_factory=list, description="Per host and model statistics"
+    )
+
+
+class PrefixStats(BaseModel):
+    """A snapshot of the prompt prefix registry"""
+
+    prefixes: int = Field(0, description="Number of registered prefixes")
+    entries: int = Field(
+        0, description="Number of prefix contexts evaluated per model and host"
+    )
+    hits: int = Field(0, description="Number of calls that reused an evaluated context")
+    evaluations: int = Field(0, description="Number of prefix evaluations sent")
+    invalidations: int = Field(
+        0, description="Number of contexts dropped, e.g. after a model digest changed"
+    )
+    prompt_tokens_saved: int = Field(
+        0, description="Prompt tokens the server did not have to evaluate again"
+    )
+
+
+class MulticastStats(BaseModel):
+    """A snapshot of a stream multicast"""
+
+    subscribers: int = Field(0, description="Number of attached subscribers")
+    published: int = Field(0, description="Number of upstream items published")
+    dropped: int = Field(
+        0, description="Number of items dropped from the buffers of slow subscribers"
+    )
+    detached: int = Field(0, description="Number of slow subscribers detached")
+    done: bool = Field(False, description="Whether the upstream stream has ended")
+
+
+class ReadAheadStats(BaseModel):
+    """A snapshot of the read-ahead queue of a stream"""
+
+    capacity: int = Field(..., description="The number of items that can be read ahead")
+    queued: int = Field(0, description="Number of items waiting for the consumer")
+    high_water: int = Field(
+        0, description="The largest number of items that waited for the consumer"
+    )
+    items: int = Field(0, description="Number of items read from the stream")
+    stalls: int = Field(
+        0, description="Number of times reading waited for the consumer to make room"
+    )
+    done: bool = Field(False, description="Whether the stream has ended")
+
+
+class SegmentStats(BaseModel):
+    """A snapshot of a stream re-segmented into sentences, lines or custom segments"""
+
+    segments: int = Field(0, description="Number of segments yielded")
+    forced: int = Field(
+        0, description="Number of segments flushed by the latency limit, not a boundary"
+    )
+    time_to_first_fragment: Optional[float] = Field(
+        None, description="Seconds from the first read until the first text fragment"
+    )
+    time_to_first_segment: Optional[float] = Field(
+        None, description="Seconds from the first read until the first segment"
+    )
+    done: bool = Field(False, description="Whether the stream has ended")
+
+
+class LoadTestKindStats(BaseModel):
+    """The results of one kind of request in a load test"""
+
+    kind: str = Field(..., description="generate, stream or embedding")
+    requests: int = Field(0, description="Number of completed requests")
+    errors: int = Field(0, description="Number of failed requests")
+    error_rate: float = Field(0.0, description="The share of failed requests")
+    latency_seconds: DistributionStats = Field(
+        ...,
+        description="Seconds from the scheduled send time to the end of the response",
+    )
+    time_to_first_token_seconds: DistributionStats = Field(
+        ...,
+        description="Seconds from the scheduled send time to the first streamed chunk",
+    )
+    tokens_per_second: DistributionStats = Field(
+        ..., description="Generation speed of every request"
+    )
+
+
+class LoadTestReport(BaseModel):
+    """The report of an open-loop load test"""
+
+    duration_seconds: float = Field(..., description="The length of the run")
+    scheduled: int = Field(0, description="Number of requests scheduled")
+    completed: int = Field(0, description="Number of requests sent and completed")
+    dropped: int = Field(
+        0, description="Number of requests not sent because too many were in flight"
+    )
+    offered_rate: float = Field(0.0, description="Scheduled requests per second")
+    achieved_rate: float = Field(0.0, description="Completed requests per second")
+    output_tokens_per_second: float = Field(
+        0.0, description="Tokens generated per second over the whole run"
+    )
+    max_dispatch_lag_seconds: float = Field(
+        0.0, description="The longest a request was sent after its scheduled time"
+    )
+    errors: dict[str, int] = Field(
+        default_factory=dict, description="Number of failed requests per error type"
+    )
+    kinds: list[LoadTestKindStats] = Field(
+        default_factory=list, description="The results per kind of request"
+    )
+
+
+class HostLimitStats(BaseModel):
+    """The adaptive concurrency limit of a single host"""
+
+    base_url: str = Field(..., description="The base URL of the host")
+    limit: int = Field(
+        ..., description="The current number of requests allowed in flight"
+    )
+    in_flight: int = Field(0, description="Number of requests in flight")
+    queued: int = Field(0, description="Number of requests waiting for a slot")
+    admitted: int = Field(0, description="Number of requests granted a slot")
+    rejected: int = Field(0, description="Number of requests rejected by a full queue")
+    timeouts: int = Field(0, description="Number of requests that gave up waiting")
+    overloads: int = Field(
+        0, description="Number of requests that timed out or failed with a server error"
+    )
+    samples: int = Field(0, description="Number of latency samples taken")
+
+
+class LimiterStats(BaseModel):
+    """A snapshot of an adaptive concurrency limiter"""
+
+    algorithm: str = Field(..., description="The algorithm adjusting the limits")
+    hosts: list[HostLimitStats] = Field(
+        default_factory=list, description="Per host limits and queues"
+    )
+
+
+class SemanticCacheStats(BaseModel):
+    """A snapshot of a semantic response cache"""
+
+    entries: int = Field(0, description="Number of cached completions")
+    lookups: int = Field(0, description="Number of requests looked up")
+    hits: int = Field(
+        0,
+        description="Number of requests answered with the completion of a similar prompt",
+    )
+    hit_rate: float = Field(0.0, description="The share of lookups that hit")
+    evictions: int = Field(0, description="Number of completions evicted")
+    embedding_errors: int = Field(
+        0, description="Number of lookups that generated because the embedding failed"
+    )
+    saved_seconds: float = Field(
+        0.0,
+        description="Server time (total_duration) of the completions served from the cache",
+    )
+
+
+class AuditLogStats(BaseModel):
+    """A snapshot of an audit log"""
+
+    overflow: str = Field(..., description="The policy applied when the queue is full")
+    queued: int = Field(0, description="Number of records waiting for the writer")
+    submitted: int = Field(0, description="Number of records submitted by calls")
+    written: int = Field(0, description="Number of records written to the log files")
+    dropped: int = Field(
+        0,
+        description="Number of records dropped by the overflow policy or a failed write",
+    )
+    batches: int = Field(0, description="Number of batches written")
+    files: int = Field(0, description="Number of log files kept")
+    bytes_written: int = Field(0, description="Compressed bytes written")
+    write_errors: int = Field(0, description="Number of batches that failed to write")
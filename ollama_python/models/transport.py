@@ -0,0 +1,28 @@
+"""Models for the transport settings of requests sent to OLLAMA"""
+from pydantic import BaseModel, Field, ConfigDict
+from typing import Optional
+
+
+class Timeouts(BaseModel):
+    """Timeouts in seconds applied to a request, None disables the timeout"""
+
+    connect: Optional[float] = Field(
+        None, description="Time allowed to establish the connection", gt=0
+    )
+    first_token: Optional[float] = Field(
+        None,
+        description="Time allowed between sending a streaming request and receiving the first chunk",
+        gt=0,
+    )
+    inter_token: Optional[float] = Field(
+        None,
+        description="Time allowed between two chunks of a streaming response",
+        gt=0,
+    )
+    deadline: Optional[float] = Field(
+        None,
+        description="Total time allowed for the call, including admission and reading the whole stream",
+        gt=0,
+    )
+
+    model_config = ConfigDict(extra="forbid")
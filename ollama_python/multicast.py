@@ -0,0 +1,262 @@
+"""Fan one upstream stream out to many subscribers with bounded buffers"""
+import threading
+import time
+from collections import deque
+from typing import Any, Iterator, Literal, Optional
+
+from ollama_python.models.metrics import MulticastStats
+
+Policy = Literal["block", "drop", "detach"]
+_POLICIES = ("block", "drop", "detach")
+
+
+class SubscriberDetached(RuntimeError):
+    """Raised to a subscriber that fell too far behind and was detached from the stream"""
+
+
+class Subscription:
+    """
+    The iterator of one subscriber. It replays the items published before it joined, when the
+    multicast keeps them, and then yields the live items from its own bounded buffer.
+    """
+
+    def __init__(self, multicast: "StreamMulticast", policy: Policy, replay_end: int):
+        self._multicast = multicast
+        self.policy = policy
+        self._replay_index = 0
+        self._replay_end = replay_end
+        self._buffer: deque = deque()
+        self.dropped = 0
+        self.detached = False
+        self.closed = False
+
+    def __iter__(self) -> "Subscription":
+        return self
+
+    def __next__(self) -> Any:
+        multicast = self._multicast
+        with multicast._cond:
+            while True:
+                if self.closed:
+                    raise StopIteration
+                if self._replay_index < self._replay_end:
+                    item = multicast._history[self._replay_index]
+                    self._replay_index += 1
+                    return item
+                if self._buffer:
+                    item = self._buffer.popleft()
+                    # A blocked upstream may be waiting for the space just freed
+                    multicast._cond.notify_all()
+                    return item
+                if self.detached:
+                    raise SubscriberDetached("The subscriber fell too far behind")
+                if multicast._done or multicast._closed:
+                    if multicast._error is not None:
+                        raise multicast._error
+                    raise StopIteration
+                multicast._cond.wait()
+
+    def close(self) -> None:
+        """Stop receiving items, the other subscribers are not affected"""
+        self._multicast._unsubscribe(self)
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class StreamMulticast:
+    """
+    Consume one upstream stream, e.g. from ``generate(stream=True)``, on a background thread and
+    publish every item to any number of subscribers.
+
+    Every subscriber has a buffer of at most ``buffer_size`` live items. When a buffer is full the
+    policy of the subscriber decides: ``block`` holds the upstream back until there is space (for
+    at most ``block_timeout`` seconds, after which the subscriber is detached), ``drop`` drops the
+    oldest buffered item and ``detach`` detaches the subscriber, which receives
+    :class:`SubscriberDetached` once it has drained its buffer. With ``drop`` and ``detach`` a
+    slow subscriber never holds the upstream back.
+
+    With ``replay`` every published item is also kept, so subscribers joining late start from the
+    first item. A generation is finite, but disable replay for long-lived streams.
+    """
+
+    def __init__(
+        self,
+        source: Iterator,
+        buffer_size: int = 256,
+        policy: Policy = "drop",
+        replay: bool = True,
+        block_timeout: Optional[float] = 5.0,
+    ):
+        """
+        Initialize the multicast, the upstream is read once the first subscriber joins
+        :param source: The upstream stream
+        :param buffer_size: The number of live items buffered per subscriber
+        :param policy: The default policy for subscribers whose buffer is full
+        :param replay: Keep every item so subscribers joining late can replay the stream from the start
+        :param block_timeout: How long a blocking subscriber may hold the upstream back, None waits forever
+        """
+        if buffer_size < 1:
+            raise ValueError("buffer_size must be at least 1")
+        if policy not in _POLICIES:
+            raise ValueError(f"policy must be one of {', '.join(_POLICIES)}")
+
+        self.source = source
+        self.buffer_size = buffer_size
+        self.policy = policy
+        self.replay = replay
+        self.block_timeout = block_timeout
+        self._cond = threading.Condition()
+        self._subscribers: list[Subscription] = []
+        self._history: list = []
+        self._published = 0
+        self._dropped = 0
+        self._detached = 0
+        self._done = False
+        self._closed = False
+        self._error: Optional[BaseException] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, policy: Optional[Policy] = None) -> Subscription:
+        """
+        Add a subscriber
+        :param policy: The policy applied when the buffer of this subscriber is full, defaults to the multicast policy
+        :return: An iterator over the items of the stream
+        """
+        policy = policy or self.policy
+        if policy not in _POLICIES:
+            raise ValueError(f"policy must be one of {', '.join(_POLICIES)}")
+        with self._cond:
+            subscription = Subscription(self, policy, len(self._history))
+            if not self._done:
+                self._subscribers.append(subscription)
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._pump, daemon=True)
+                self._thread.start()
+        return subscription
+
+    def close(self) -> None:
+        """
+        Stop reading the upstream and end the stream for every subscriber. A read already in
+        progress finishes first, use a CancelHandle on the upstream call to interrupt it
+        """
+        with self._cond:
+            self._closed = True
+            started = self._thread is not None
+            self._done = self._done or not started
+            self._cond.notify_all()
+        if not started:
+            self._close_source()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """
+        Wait for the upstream stream to end
+        :param timeout: The longest time to wait in seconds
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self) -> MulticastStats:
+        """
+        Get a snapshot of the multicast
+        :return: The multicast statistics
+        """
+        with self._cond:
+            return MulticastStats(
+                subscribers=len(self._subscribers),
+                published=self._published,
+                dropped=self._dropped,
+                detached=self._detached,
+                done=self._done,
+            )
+
+    def __enter__(self) -> "StreamMulticast":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _pump(self) -> None:
+        error = None
+        try:
+            for item in self.source:
+                if not self._publish(item):
+                    break
+        except BaseException as exc:
+            error = exc
+        finally:
+            self._close_source()
+            with self._cond:
+                self._done, self._error = True, error
+                self._subscribers.clear()
+                self._cond.notify_all()
+
+    def _publish(self, item: Any) -> bool:
+        """Hand an item to every subscriber, returns False once the multicast is closed"""
+        with self._cond:
+            if self._closed:
+                return False
+            if self.replay:
+                self._history.append(item)
+            self._published += 1
+            deadline = None
+            for subscription in list(self._subscribers):
+                buffer = subscription._buffer
+                if len(buffer) >= self.buffer_size:
+                    if subscription.policy == "drop":
+                        buffer.popleft()
+                        subscription.dropped += 1
+                        self._dropped += 1
+                    elif subscription.policy == "detach":
+                        self._detach(subscription)
+                        continue
+                    else:
+                        if deadline is None and self.block_timeout is not None:
+                            deadline = time.monotonic() + self.block_timeout
+                        if not self._wait_for_space(subscription, deadline):
+                            continue
+                        if self._closed:
+                            return False
+                buffer.append(item)
+            self._cond.notify_all()
+            return True
+
+    def _wait_for_space(
+        self, subscription: Subscription, deadline: Optional[float]
+    ) -> bool:
+        """Wait until a blocking subscriber has space, the lock must be held"""
+        self._cond.notify_all()
+        while (
+            len(subscription._buffer) >= self.buffer_size
+            and subscription in self._subscribers
+            and not self._closed
+        ):
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                self._detach(subscription)
+                return False
+            self._cond.wait(remaining)
+        return subscription in self._subscribers
+
+    def _detach(self, subscription: Subscription) -> None:
+        """Detach a slow subscriber, the lock must be held"""
+        subscription.detached = True
+        self._subscribers.remove(subscription)
+        self._detached += 1
+        self._cond.notify_all()
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        with self._cond:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+            subscription.closed = True
+            subscription._buffer.clear()
+            self._cond.notify_all()
+
+    def _close_source(self) -> None:
+        close = getattr(self.source, "close", None)
+        if close is not None:
+            close()
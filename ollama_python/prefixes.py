@@ -0,0 +1,213 @@
+"""Registry of shared prompt prefixes whose evaluated context is reused across generate calls"""
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Optional
+
+from ollama_python.endpoints.model_management import ModelManagementAPI
+from ollama_python.models.metrics import PrefixStats
+from ollama_python.singleflight import SingleFlight
+
+if TYPE_CHECKING:  # pragma: no cover
+    from ollama_python.endpoints.generate import GenerateAPI
+    from ollama_python.models.model_management import ModelTagList
+
+
+def _tag(model: str) -> str:
+    """Model names without a tag refer to the latest tag, as in the list of local models"""
+    return model if ":" in model else f"{model}:latest"
+
+
+class _Prefix:
+    """A registered prefix"""
+
+    def __init__(self, prompt: str, system: Optional[str]):
+        self.prompt = prompt
+        self.system = system
+
+
+class _Entry:
+    """The context of a prefix evaluated by one model on one host"""
+
+    def __init__(self, context: list[int], digest: Optional[str], prompt_tokens: int):
+        self.context = context
+        self.digest = digest
+        self.prompt_tokens = prompt_tokens
+
+
+class PrefixRegistry:
+    """
+    Evaluate long shared prompt prefixes, such as a system prompt or preamble, once per model and
+    host, and pass the resulting ``context`` to later generate calls using the prefix, so the
+    server does not evaluate the prefix again.
+
+    The digest of every model is checked against the list of local models at most every
+    ``check_interval`` seconds, and the contexts of a model are re-evaluated when its digest
+    changes. Lists fetched elsewhere can be fed in with :meth:`observe_models`.
+    """
+
+    def __init__(
+        self,
+        check_interval: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the registry
+        :param check_interval: How often in seconds the digests of the models are checked, None never checks
+        :param clock: The clock used to schedule the digest checks, in seconds
+        """
+        self.check_interval = check_interval
+        self.clock = clock
+        self._prefixes: dict[str, _Prefix] = {}
+        self._entries: dict[tuple[str, str, str], _Entry] = {}
+        # (host, model) -> (digest, clock time of the check)
+        self._digests: dict[tuple[str, str], tuple[Optional[str], float]] = {}
+        self._flights = SingleFlight()
+        # One client, and its connection pool, per host for the digest checks
+        self._model_apis: dict[str, ModelManagementAPI] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._evaluations = 0
+        self._invalidations = 0
+        self._prompt_tokens_saved = 0
+
+    def register(self, name: str, prompt: str, system: Optional[str] = None) -> None:
+        """
+        Register a named prefix, replacing any prefix registered under the same name
+        :param name: The name generate calls refer to the prefix by
+        :param prompt: The text of the prefix
+        :param system: The system message the prefix is evaluated with
+        """
+        with self._lock:
+            self._prefixes[name] = _Prefix(prompt, system)
+            self._drop(lambda key: key[2] == name)
+
+    def invalidate(
+        self, model: Optional[str] = None, base_url: Optional[str] = None
+    ) -> None:
+        """
+        Drop evaluated contexts so they are evaluated again on next use
+        :param model: Only drop the contexts of this model, all models when omitted
+        :param base_url: Only drop the contexts on this host, all hosts when omitted
+        """
+        with self._lock:
+            self._drop(
+                lambda key: (base_url is None or key[0] == base_url.rstrip("/"))
+                and (model is None or key[1] == _tag(model))
+            )
+
+    def observe_models(self, models: "ModelTagList", base_url: str) -> None:
+        """
+        Check the digests of a list of local models, dropping the contexts of changed models
+        :param models: The list returned by ModelManagementAPI.list_local_models
+        :param base_url: The base URL of the host the list was fetched from
+        """
+        host = base_url.rstrip("/")
+        now = self.clock()
+        digests = {tag.name: tag.digest for tag in models.models}
+        with self._lock:
+            known = {key[1] for key in self._digests if key[0] == host}
+            for model in known | set(digests):
+                self._update_digest(host, model, digests.get(model), now)
+
+    def context(self, api: "GenerateAPI", name: str) -> list[int]:
+        """
+        Get the context of a prefix for the model and host of a client, evaluating it if needed
+        :param api: The client the context will be used with
+        :param name: The name of the prefix
+        :return: The context tokens of the evaluated prefix
+        """
+        host, model = api.base_url, _tag(api.model)
+        with self._lock:
+            prefix = self._prefixes.get(name)
+            if prefix is None:
+                raise KeyError(f"Unknown prefix {name!r}")
+        digest = self._current_digest(api, host, model)
+
+        with self._lock:
+            entry = self._entries.get((host, model, name))
+            if entry is not None and entry.digest == digest:
+                self._hits += 1
+                self._prompt_tokens_saved += entry.prompt_tokens
+                return entry.context
+
+        return self._flights.do(
+            (host, model, name), lambda: self._evaluate(api, name, prefix, digest)
+        )
+
+    def stats(self) -> PrefixStats:
+        """
+        Get a snapshot of the registry
+        :return: The registry statistics
+        """
+        with self._lock:
+            return PrefixStats(
+                prefixes=len(self._prefixes),
+                entries=len(self._entries),
+                hits=self._hits,
+                evaluations=self._evaluations,
+                invalidations=self._invalidations,
+                prompt_tokens_saved=self._prompt_tokens_saved,
+            )
+
+    def _evaluate(
+        self, api: "GenerateAPI", name: str, prefix: _Prefix, digest: Optional[str]
+    ) -> list[int]:
+        from ollama_python.models.generate import Completion
+
+        # Sent directly, past the semantic cache and the performance tracker of the client.
+        # Ollama reads num_predict <= 0 as no limit, so at most one token is generated and the
+        # context is the prefix followed by that token
+        completion = api._post(
+            "generate",
+            {
+                "model": api.model,
+                "prompt": prefix.prompt,
+                "system": prefix.system,
+                "stream": False,
+                "options": {"num_predict": 1},
+            },
+            return_type=Completion,
+        )
+        with self._lock:
+            self._evaluations += 1
+            if self._prefixes.get(name) is prefix:
+                self._entries[(api.base_url, _tag(api.model), name)] = _Entry(
+                    completion.context, digest, completion.prompt_eval_count or 0
+                )
+        return completion.context
+
+    def _current_digest(
+        self, api: "GenerateAPI", host: str, model: str
+    ) -> Optional[str]:
+        with self._lock:
+            digest, checked_at = self._digests.get((host, model), (None, None))
+            due = self.check_interval is not None and (
+                checked_at is None or self.clock() - checked_at >= self.check_interval
+            )
+        if due:
+            with self._lock:
+                model_api = self._model_apis.get(host)
+                if model_api is None:
+                    model_api = self._model_apis[host] = ModelManagementAPI(
+                        base_url=host, timeouts=api.timeouts
+                    )
+            models = model_api.list_local_models()
+            self.observe_models(models, host)
+            with self._lock:
+                digest = self._digests.get((host, model), (None, None))[0]
+        return digest
+
+    def _update_digest(
+        self, host: str, model: str, digest: Optional[str], now: float
+    ) -> None:
+        """Record the digest of a model, the lock must be held"""
+        previous = self._digests.get((host, model))
+        if previous is not None and previous[0] != digest:
+            self._drop(lambda key: key[0] == host and key[1] == model)
+        self._digests[(host, model)] = (digest, now)
+
+    def _drop(self, matches: Callable[[tuple[str, str, str]], bool]) -> None:
+        """Drop the entries whose key matches, the lock must be held"""
+        for key in [key for key in self._entries if matches(key)]:
+            del self._entries[key]
+            self._invalidations += 1
@@ -0,0 +1,145 @@
+"""Read streams ahead of their consumer on a background thread"""
+from __future__ import annotations
+
+import threading
+from collections import deque
+from typing import TYPE_CHECKING, Any, Iterator, Optional
+
+if TYPE_CHECKING:  # pragma: no cover
+    from ollama_python.models.metrics import ReadAheadStats
+
+
+class _Pump:
+    """The state shared by the consumer and the background reader"""
+
+    def __init__(self, source: Iterator, max_items: int):
+        self.source = source
+        self.max_items = max_items
+        self.cond = threading.Condition()
+        self.queue: deque = deque()
+        self.high_water = 0
+        self.items = 0
+        self.stalls = 0
+        self.done = False
+        self.closed = False
+        self.error: Optional[BaseException] = None
+
+    def run(self) -> None:
+        error = None
+        try:
+            for item in self.source:
+                with self.cond:
+                    if len(self.queue) >= self.max_items and not self.closed:
+                        self.stalls += 1
+                        while len(self.queue) >= self.max_items and not self.closed:
+                            self.cond.wait()
+                    if self.closed:
+                        break
+                    self.queue.append(item)
+                    self.items += 1
+                    self.high_water = max(self.high_water, len(self.queue))
+                    self.cond.notify_all()
+        except BaseException as exc:
+            error = exc
+        finally:
+            close = getattr(self.source, "close", None)
+            if close is not None:
+                close()
+            with self.cond:
+                self.done, self.error = True, error
+                self.cond.notify_all()
+
+
+class ReadAhead:
+    """
+    Read a stream, e.g. from ``_stream``, on a background thread into a queue of at most
+    ``max_items`` items, so the connection keeps being drained and decoded while the consumer is
+    busy with the previous items. Iterating a ReadAhead yields the items of the stream in order and
+    raises any error of the stream once the items read before it have been consumed.
+
+    Once the queue is full the reader waits, so a consumer that is slower than the server for the
+    whole stream is still held back, only bursts are absorbed. A high ``high_water`` in
+    :meth:`stats` shows the consumer falling behind, ``stalls`` shows the queue was too small.
+    """
+
+    def __init__(self, source: Iterator, max_items: int = 256):
+        """
+        Initialize the read-ahead, the stream is read once the first item is requested
+        :param source: The stream to read ahead
+        :param max_items: The number of items read ahead of the consumer
+        """
+        if max_items < 1:
+            raise ValueError("max_items must be at least 1")
+
+        # The thread only references the pump, so an abandoned ReadAhead is collected and closed
+        self._pump = _Pump(source, max_items)
+        self._thread: Optional[threading.Thread] = None
+
+    def __iter__(self) -> ReadAhead:
+        return self
+
+    def __next__(self) -> Any:
+        pump = self._pump
+        with pump.cond:
+            if self._thread is None and not pump.closed:
+                self._thread = threading.Thread(target=pump.run, daemon=True)
+                self._thread.start()
+            while True:
+                if pump.queue:
+                    item = pump.queue.popleft()
+                    pump.cond.notify_all()
+                    return item
+                if pump.closed:
+                    raise StopIteration
+                if pump.done:
+                    if pump.error is not None:
+                        error, pump.error = pump.error, None
+                        raise error
+                    raise StopIteration
+                pump.cond.wait()
+
+    def close(self) -> None:
+        """
+        Stop reading the stream and drop the items read ahead. A read already in progress finishes
+        first, use a CancelHandle on the call to interrupt it
+        """
+        pump = self._pump
+        with pump.cond:
+            if pump.closed:
+                return
+            pump.closed = True
+            pump.queue.clear()
+            started = self._thread is not None
+            pump.cond.notify_all()
+        if not started:
+            close = getattr(pump.source, "close", None)
+            if close is not None:
+                close()
+
+    def stats(self) -> ReadAheadStats:
+        """
+        Get a snapshot of the read-ahead queue
+        :return: The read-ahead statistics
+        """
+        from ollama_python.models.metrics import ReadAheadStats
+
+        pump = self._pump
+        with pump.cond:
+            return ReadAheadStats(
+                capacity=pump.max_items,
+                queued=len(pump.queue),
+                high_water=pump.high_water,
+                items=pump.items,
+                stalls=pump.stalls,
+                done=pump.done,
+            )
+
+    def __enter__(self) -> ReadAhead:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __del__(self) -> None:
+        if hasattr(self, "_pump"):
+            self.close()
@@ -0,0 +1,149 @@
+"""ASGI and WSGI responses relaying passthrough streams to clients without re-encoding"""
+import asyncio
+import contextlib
+from http import HTTPStatus
+from typing import TYPE_CHECKING, Awaitable, Callable, Iterable, Iterator, Optional
+
+if TYPE_CHECKING:  # pragma: no cover
+    from ollama_python.transport import CancelHandle
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+
+def _headers(media_type: str, sse: bool) -> list[tuple[bytes, bytes]]:
+    headers = [(b"content-type", media_type.encode())]
+    if sse:
+        # Stop proxies such as nginx from buffering the events
+        headers += [(b"cache-control", b"no-cache"), (b"x-accel-buffering", b"no")]
+    return headers
+
+
+def _close(stream: Iterator) -> None:
+    close = getattr(stream, "close", None)
+    if close is not None:
+        close()
+
+
+class ASGIStreamResponse:
+    """
+    An ASGI application streaming the bytes of a passthrough stream, e.g.
+    ``generate(stream=True, passthrough="sse")``, to the client.
+
+    The next chunk is only read from upstream once the previous one has been sent, so a slow
+    client slows the upstream read down instead of filling a buffer. The blocking reads run in
+    the default executor. When the client disconnects the upstream call is cancelled through
+    ``cancel`` if given, otherwise the stream is closed after the read in progress. The same
+    applies when the task running the response is cancelled.
+    """
+
+    def __init__(
+        self,
+        stream: Iterable[bytes],
+        passthrough: str = "ndjson",
+        status: int = 200,
+        cancel: Optional["CancelHandle"] = None,
+    ):
+        """
+        Initialize the response
+        :param stream: The passthrough stream to relay
+        :param passthrough: The passthrough mode of the stream, "ndjson" or "sse", used for the content type
+        :param status: The status code of the response
+        :param cancel: The cancel handle of the upstream call, cancelled when the client disconnects
+        """
+        self.stream = iter(stream)
+        self.media_type = MEDIA_TYPES[passthrough]
+        self.sse = passthrough == "sse"
+        self.status = status
+        self.cancel = cancel
+
+    async def __call__(
+        self,
+        scope: dict,
+        receive: Callable[[], Awaitable[dict]],
+        send: Callable[[dict], Awaitable[None]],
+    ) -> None:
+        disconnected = asyncio.Event()
+
+        async def watch_disconnect() -> None:
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+            if self.cancel is not None:
+                self.cancel.cancel(reason="client disconnected")
+
+        watcher = asyncio.ensure_future(watch_disconnect())
+        loop = asyncio.get_running_loop()
+        # The read running in the executor, it keeps running when this task is cancelled
+        pending: Optional[asyncio.Future] = None
+
+        async def read() -> Optional[bytes]:
+            nonlocal pending
+            pending = loop.run_in_executor(None, next, self.stream, None)
+            try:
+                return await asyncio.shield(pending)
+            except Exception:
+                if disconnected.is_set():
+                    # The read was interrupted by cancelling the upstream call
+                    return None
+                raise
+
+        try:
+            # Reading the first chunk before the headers lets upstream errors fail the response
+            chunk = await read()
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": self.status,
+                    "headers": _headers(self.media_type, self.sse),
+                }
+            )
+            while chunk is not None and not disconnected.is_set():
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
+                chunk = await read()
+            if not disconnected.is_set():
+                await send(
+                    {"type": "http.response.body", "body": b"", "more_body": False}
+                )
+        finally:
+            watcher.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await watcher
+            if pending is not None and not pending.done():
+                # Cancelled during a read: the stream cannot be closed while next() runs in it
+                if self.cancel is not None:
+                    self.cancel.cancel(reason="response cancelled")
+                with contextlib.suppress(Exception):
+                    await asyncio.shield(pending)
+            await loop.run_in_executor(None, _close, self.stream)
+
+
+class WSGIStreamResponse:
+    """
+    A WSGI application streaming the bytes of a passthrough stream to the client. WSGI servers
+    pull the next chunk once the previous one has been written, and close the iterable when the
+    client goes away, which closes the upstream connection.
+    """
+
+    def __init__(
+        self, stream: Iterable[bytes], passthrough: str = "ndjson", status: int = 200
+    ):
+        """
+        Initialize the response
+        :param stream: The passthrough stream to relay
+        :param passthrough: The passthrough mode of the stream, "ndjson" or "sse", used for the content type
+        :param status: The status code of the response
+        """
+        self.stream = stream
+        self.media_type = MEDIA_TYPES[passthrough]
+        self.sse = passthrough == "sse"
+        self.status = status
+
+    def __call__(self, environ: dict, start_response: Callable) -> Iterable[bytes]:
+        headers = [
+            (name.decode(), value.decode())
+            for name, value in _headers(self.media_type, self.sse)
+        ]
+        start_response(f"{self.status} {HTTPStatus(self.status).phrase}", headers)
+        return self.stream
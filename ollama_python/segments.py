@@ -0,0 +1,213 @@
+"""Re-segment streamed text into sentences, lines or custom segments as early as possible"""
+from __future__ import annotations
+
+import re
+import time
+from typing import TYPE_CHECKING, Callable, Generator, Iterator, Optional, Union
+
+from ollama_python.stopping import completion_text
+
+if TYPE_CHECKING:  # pragma: no cover
+    from ollama_python.models.metrics import SegmentStats
+
+# A run of sentence-ending punctuation and closing quotes or brackets, confirmed by the
+# whitespace after it so that e.g. "3.14" is not split
+SENTENCE = re.compile(r"[.!?…。！？]+[\"'”’)\]]*\s+|\n+")
+LINE = re.compile(r"\n")
+_BOUNDARIES = {"sentence": SENTENCE, "line": LINE}
+
+
+class Segment:
+    """A segment of the streamed text"""
+
+    __slots__ = ("text", "index", "forced", "elapsed")
+
+    def __init__(self, text: str, index: int, forced: bool, elapsed: float):
+        self.text = text
+        self.index = index
+        self.forced = forced
+        self.elapsed = elapsed
+
+    def __repr__(self) -> str:
+        return f"Segment({self.text!r}, index={self.index}, forced={self.forced})"
+
+
+def _item_text(item: object) -> str:
+    if isinstance(item, str):
+        return item
+    if isinstance(item, Segment):
+        return item.text
+    return completion_text(item)
+
+
+class SegmentStream:
+    """
+    Iterate the segments of a stream of completions, text fragments or segments of an earlier
+    stage, so stages can be chained e.g. lines, then sentences within every line.
+
+    Each fragment is only searched for boundaries together with the last ``lookback`` characters
+    before it, and the pending text is kept as a list of fragments that is joined once per
+    segment, so the work stays linear in the length of the text however long a segment gets.
+    With ``max_latency`` the pending text is flushed, up to its last whitespace if any, when it
+    has waited that long for a boundary. The wait is checked whenever a fragment arrives.
+    """
+
+    def __init__(
+        self,
+        stream: Iterator,
+        boundary: Union[str, re.Pattern] = "sentence",
+        max_latency: Optional[float] = None,
+        lookback: int = 16,
+        text: Callable[[object], str] = _item_text,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the stage, the stream is read once the first segment is requested
+        :param stream: The stream to re-segment
+        :param boundary: "sentence", "line" or a regular expression whose matches end a segment
+        :param max_latency: Flush the pending text after waiting this many seconds for a boundary
+        :param lookback: The number of pending characters searched together with each fragment, bounds the length
+                         of a boundary match spanning fragments
+        :param text: A function returning the text fragment of a streamed item
+        :param clock: The clock used to measure latencies, in seconds
+        """
+        self.stream = stream
+        self.pattern = _BOUNDARIES.get(boundary) or re.compile(boundary)
+        self.max_latency = max_latency
+        self.lookback = lookback
+        self.text = text
+        self.clock = clock
+        self._segments = self._run()
+        self._started: Optional[float] = None
+        self._first_fragment: Optional[float] = None
+        self._first_segment: Optional[float] = None
+        self._count = 0
+        self._forced = 0
+        self._done = False
+
+    def __iter__(self) -> SegmentStream:
+        return self
+
+    def __next__(self) -> Segment:
+        if self._started is None:
+            self._started = self.clock()
+        return next(self._segments)
+
+    def close(self) -> None:
+        """Stop reading and close the upstream stream"""
+        self._segments.close()
+        if self._started is None:
+            close = getattr(self.stream, "close", None)
+            if close is not None:
+                close()
+
+    def stats(self) -> SegmentStats:
+        """
+        Get the latencies and counts of the stream so far
+        :return: The segmentation statistics
+        """
+        from ollama_python.models.metrics import SegmentStats
+
+        return SegmentStats(
+            segments=self._count,
+            forced=self._forced,
+            time_to_first_fragment=self._first_fragment,
+            time_to_first_segment=self._first_segment,
+            done=self._done,
+        )
+
+    def __enter__(self) -> SegmentStream:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _segment(self, text: str, forced: bool = False) -> Segment:
+        elapsed = self.clock() - self._started
+        if self._first_segment is None:
+            self._first_segment = elapsed
+        self._count += 1
+        self._forced += forced
+        return Segment(text, self._count - 1, forced, elapsed)
+
+    def _run(self) -> Generator[Segment, None, None]:
+        pieces: list[str] = []
+        length = 0
+        tail = ""
+        waiting_since: Optional[float] = None
+        try:
+            for item in self.stream:
+                fragment = self.text(item)
+                if not fragment:
+                    continue
+                now = self.clock()
+                if self._first_fragment is None:
+                    self._first_fragment = now - self._started
+                if waiting_since is None:
+                    waiting_since = now
+
+                window = tail + fragment
+                # The position of the window in the pending text
+                offset = length - len(tail)
+                pieces.append(fragment)
+                length += len(fragment)
+                cuts = [
+                    offset + match.end()
+                    for match in self.pattern.finditer(window)
+                    if match.end() > len(tail)
+                ]
+                if cuts:
+                    pending = "".join(pieces)
+                    start = 0
+                    for cut in cuts:
+                        # Whitespace-only segments are kept for the next segment instead
+                        if not pending[start:cut].isspace():
+                            yield self._segment(pending[start:cut])
+                            start = cut
+                    rest = pending[start:]
+                    pieces, length = [rest] if rest else [], len(rest)
+                    tail = rest[-self.lookback :] if self.lookback else ""
+                    waiting_since = now if rest else None
+                else:
+                    tail = window[-self.lookback :] if self.lookback else ""
+
+                if (
+                    self.max_latency is not None
+                    and waiting_since is not None
+                    and now - waiting_since >= self.max_latency
+                ):
+                    pending = "".join(pieces)
+                    cut = max(pending.rfind(" "), pending.rfind("\n")) + 1
+                    if not pending[:cut].strip():
+                        cut = len(pending)
+                    if not pending.isspace():
+                        yield self._segment(pending[:cut], forced=True)
+                        rest = pending[cut:]
+                        pieces, length = [rest] if rest else [], len(rest)
+                        tail = rest[-self.lookback :] if self.lookback else ""
+                        waiting_since = now if rest else None
+
+            if pieces:
+                yield self._segment("".join(pieces))
+            self._done = True
+        finally:
+            close = getattr(self.stream, "close", None)
+            if close is not None:
+                close()
+
+
+def segments(
+    stream: Iterator,
+    boundary: Union[str, re.Pattern] = "sentence",
+    max_latency: Optional[float] = None,
+    **kwargs,
+) -> SegmentStream:
+    """
+    Re-segment a stream of completions, e.g. from ``generate(stream=True)``, into segments
+    :param stream: The stream to re-segment
+    :param boundary: "sentence", "line" or a regular expression whose matches end a segment
+    :param max_latency: Flush the pending text after waiting this many seconds for a boundary
+    :param kwargs: Further settings of the SegmentStream e.g. lookback or text
+    :return: An iterator over the segments
+    """
+    return SegmentStream(stream, boundary, max_latency, **kwargs)
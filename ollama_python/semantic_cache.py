@@ -0,0 +1,238 @@
+"""Cache of completions looked up by the embedding similarity of their prompts"""
+import itertools
+import math
+import operator
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+from ollama_python.endpoints.embedding import EmbeddingAPI
+from ollama_python.models.metrics import SemanticCacheStats
+
+# numpy is optional, None until the first search looked for it, False when it is not installed
+_numpy: Any = None
+
+
+def _numpy_module() -> Any:
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy
+
+
+class _Entry:
+    """A cached completion and the row of its embedding"""
+
+    __slots__ = ("id", "key", "row", "completion")
+
+    def __init__(self, id: int, key: tuple, completion: Any):
+        self.id = id
+        self.key = key
+        self.row = -1
+        self.completion = completion
+
+
+class _Matrix:
+    """
+    The normalized embeddings of one scope as the rows of one contiguous array. Rows are written
+    in place, the array is only replaced when it has to grow, so a search can scan a snapshot
+    without the lock and check afterwards that the entry it found is still cached.
+    """
+
+    __slots__ = ("dims", "rows", "slots", "free")
+
+    def __init__(self, dims: int):
+        self.dims = dims
+        self.rows = array("d")
+        self.slots: list[Optional[_Entry]] = []
+        self.free: list[int] = []
+
+    def add(self, vector: array, entry: _Entry) -> None:
+        if self.free:
+            entry.row = self.free.pop()
+        else:
+            entry.row = len(self.slots)
+            if entry.row * self.dims == len(self.rows):
+                # A new array, the current one may be exported to a search in progress
+                grown = max(1, len(self.slots)) * self.dims
+                self.rows = self.rows + array("d", bytes(8 * grown))
+            self.slots.append(None)
+        start = entry.row * self.dims
+        self.rows[start : start + self.dims] = vector
+        self.slots[entry.row] = entry
+
+    def remove(self, entry: _Entry) -> None:
+        self.slots[entry.row] = None
+        self.free.append(entry.row)
+
+    def __len__(self) -> int:
+        return len(self.slots) - len(self.free)
+
+    def snapshot(self) -> tuple[array, list[Optional[_Entry]]]:
+        """The rows and their entries as they are now, the lock must be held"""
+        return self.rows, list(self.slots)
+
+
+def _nearest(
+    dims: int, rows: array, slots: list[Optional[_Entry]], vector: array
+) -> tuple[Optional[_Entry], float]:
+    """Find the entry whose embedding has the largest dot product with the vector"""
+    numpy = _numpy_module()
+    if numpy:
+        matrix = numpy.frombuffer(rows, dtype=numpy.float64, count=len(slots) * dims)
+        similarities = matrix.reshape(len(slots), dims) @ numpy.frombuffer(
+            vector, dtype=numpy.float64
+        )
+        similarities[[entry is None for entry in slots]] = -numpy.inf
+        index = int(similarities.argmax())
+        return slots[index], float(similarities[index])
+
+    view = memoryview(rows)
+    best, best_similarity = None, -math.inf
+    for index, entry in enumerate(slots):
+        if entry is not None:
+            start = index * dims
+            similarity = sum(map(operator.mul, vector, view[start : start + dims]))
+            if similarity > best_similarity:
+                best, best_similarity = entry, similarity
+    return best, best_similarity
+
+
+def _normalize(embedding: list[float]) -> array:
+    norm = math.sqrt(sum(map(operator.mul, embedding, embedding))) or 1.0
+    return array("d", (value / norm for value in embedding))
+
+
+class SemanticCache:
+    """
+    Return the stored completion of an earlier prompt whose embedding is close enough to the
+    embedding of a new prompt, so paraphrased prompts are answered without generating again.
+
+    Prompts are only compared with prompts of the same scope: the same model, endpoint and
+    parameters other than the prompt. The normalized embeddings of a scope are kept as the rows
+    of one contiguous matrix, so the cosine similarity with every cached prompt is one
+    matrix-vector product, computed with numpy when it is installed and with C-level
+    ``map``/``sum`` otherwise. Lookups scan a snapshot of the matrix without holding the lock. The cache holds at most ``max_entries`` completions and evicts the
+    least recently used one. When the embedding request fails the completion is generated as if
+    there was no cache.
+    """
+
+    def __init__(
+        self,
+        embedding_api: EmbeddingAPI,
+        threshold: float = 0.95,
+        max_entries: int = 1024,
+    ):
+        """
+        Initialize the cache
+        :param embedding_api: The client embedding the prompts
+        :param threshold: The cosine similarity from which a cached completion is returned
+        :param max_entries: The number of completions to keep
+        """
+        if not -1 <= threshold <= 1:
+            raise ValueError("threshold must be between -1 and 1")
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+
+        self.embedding_api = embedding_api
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # Least recently used first
+        self._entries: OrderedDict[int, _Entry] = OrderedDict()
+        self._matrices: dict[tuple, _Matrix] = {}
+        self._ids = itertools.count()
+        self._lookups = 0
+        self._hits = 0
+        self._evictions = 0
+        self._embedding_errors = 0
+        self._saved_seconds = 0.0
+
+    def cached(self, scope: str, text: str, call: Callable[[], Any]) -> Any:
+        """
+        Return the completion of a similar prompt, or call for a new one and store it
+        :param scope: The parameters of the request other than its text, only prompts of the same scope are compared
+        :param text: The text whose embedding is compared
+        :param call: Generates the completion on a miss
+        :return: The cached or generated completion
+        """
+        try:
+            embedding = self.embedding_api.get_embedding(prompt=text).embedding
+        except Exception:
+            with self._lock:
+                self._embedding_errors += 1
+            return call()
+
+        vector = _normalize(embedding)
+        key = (scope, len(vector))
+        with self._lock:
+            self._lookups += 1
+            matrix = self._matrices.get(key)
+            if matrix is not None:
+                rows, slots = matrix.snapshot()
+
+        if matrix is not None:
+            entry, similarity = _nearest(len(vector), rows, slots, vector)
+            if similarity >= self.threshold:
+                with self._lock:
+                    # An entry evicted during the scan may have had its row overwritten
+                    if entry.id in self._entries:
+                        self._hits += 1
+                        self._saved_seconds += entry.completion.total_duration / 1e9
+                        self._entries.move_to_end(entry.id)
+                        return entry.completion.model_copy()
+
+        completion = call()
+        self.store(scope, vector, completion)
+        return completion
+
+    def store(self, scope: str, vector: array, completion: Any) -> None:
+        """
+        Store a completion
+        :param scope: The scope of the request
+        :param vector: The normalized embedding of the text of the request
+        :param completion: The completion to return for similar requests
+        """
+        key = (scope, len(vector))
+        with self._lock:
+            entry = _Entry(next(self._ids), key, completion)
+            self._entries[entry.id] = entry
+            matrix = self._matrices.get(key)
+            if matrix is None:
+                matrix = self._matrices[key] = _Matrix(len(vector))
+            matrix.add(vector, entry)
+            while len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                matrix = self._matrices[evicted.key]
+                matrix.remove(evicted)
+                if not len(matrix):
+                    del self._matrices[evicted.key]
+                self._evictions += 1
+
+    def clear(self) -> None:
+        """Drop every cached completion"""
+        with self._lock:
+            self._entries.clear()
+            self._matrices.clear()
+
+    def stats(self) -> SemanticCacheStats:
+        """
+        Get a snapshot of the cache
+        :return: The cache statistics
+        """
+        with self._lock:
+            return SemanticCacheStats(
+                entries=len(self._entries),
+                lookups=self._lookups,
+                hits=self._hits,
+                hit_rate=self._hits / self._lookups if self._lookups else 0.0,
+                evictions=self._evictions,
+                embedding_errors=self._embedding_errors,
+                saved_seconds=self._saved_seconds,
+            )
@@ -0,0 +1,196 @@
+"""Coalescing of identical in-flight requests"""
+
+import threading
+import time
+from typing import Any, Callable, Generator, Hashable, Iterator, Optional
+
+from ollama_python.models.metrics import SingleFlightStats
+
+
+class _Call:
+    """A unary call shared by every caller that asked for the same key"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class _StreamFlight:
+    """An upstream stream whose items are replayed to every subscriber"""
+
+    def __init__(self, source: Iterator, lock: threading.Lock):
+        self.source = source
+        self.items: list = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.reading = False
+        self.subscribers = 0
+        # The lock of the group, so joining and abandoning a flight cannot interleave
+        self.cond = threading.Condition(lock)
+
+
+def _deadline_exceeded() -> BaseException:
+    from ollama_python.transport import DeadlineExceeded
+
+    return DeadlineExceeded("The call did not finish before its deadline")
+
+
+class SingleFlight:
+    """
+    Share one upstream call between concurrent callers issuing the same request.
+
+    Results are only shared while the call is in flight, nothing is cached once it completes.
+    Every caller receives the same result object, which should be treated as read-only.
+    """
+
+    def __init__(self):
+        """Initialize an empty single-flight group"""
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+        self._streams: dict[Hashable, _StreamFlight] = {}
+        self._upstream = 0
+        self._shared = 0
+
+    def do(
+        self, key: Hashable, fn: Callable[[], Any], deadline: Optional[float] = None
+    ) -> Any:
+        """
+        Call ``fn`` unless a call for the same key is already in flight, in which case wait for it
+        :param key: The key identifying identical requests
+        :param fn: The function issuing the upstream request
+        :param deadline: The longest time in seconds to wait for a call already in flight
+        :return: The result of the (possibly shared) call
+        :raises DeadlineExceeded: If the call in flight did not complete within the deadline
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._upstream += 1
+            else:
+                self._shared += 1
+
+        if not leader:
+            if not call.event.wait(deadline):
+                raise _deadline_exceeded()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+    def stream(
+        self,
+        key: Hashable,
+        fn: Callable[[], Iterator],
+        deadline: Optional[float] = None,
+    ) -> Generator:
+        """
+        Fan the items of one upstream stream out to every subscriber with the same key.
+        Subscribers join when they start iterating and replay the items they missed. The
+        upstream stream is closed early if every subscriber stops iterating.
+        :param key: The key identifying identical requests
+        :param fn: The function opening the upstream stream
+        :param deadline: The longest time in seconds to wait for the stream, from the first item requested
+        :return: A generator that yields the items of the shared stream
+        :raises DeadlineExceeded: If the stream did not end within the deadline
+        """
+        expires = None if deadline is None else time.monotonic() + deadline
+        with self._lock:
+            flight = self._streams.get(key)
+            if flight is None or flight.done:
+                flight = self._streams[key] = _StreamFlight(fn(), self._lock)
+                self._upstream += 1
+            else:
+                self._shared += 1
+            flight.subscribers += 1
+
+        index = 0
+        try:
+            while True:
+                pull = False
+                with flight.cond:
+                    while (
+                        index >= len(flight.items)
+                        and not flight.done
+                        and flight.reading
+                    ):
+                        remaining = (
+                            None if expires is None else expires - time.monotonic()
+                        )
+                        if remaining is not None and remaining <= 0:
+                            raise _deadline_exceeded()
+                        flight.cond.wait(remaining)
+                    if index < len(flight.items):
+                        item = flight.items[index]
+                        index += 1
+                    elif flight.done:
+                        if flight.error is not None:
+                            raise flight.error
+                        return
+                    else:
+                        # Nobody is reading, this subscriber pulls the next item for everyone
+                        flight.reading = pull = True
+
+                if pull:
+                    self._pull(key, flight)
+                    continue
+                yield item
+        finally:
+            with flight.cond:
+                flight.subscribers -= 1
+                abandoned = flight.subscribers == 0 and not flight.done
+                if abandoned:
+                    flight.done = True
+                    self._forget(key, flight)
+            if abandoned:
+                close = getattr(flight.source, "close", None)
+                if close is not None:
+                    close()
+
+    def stats(self) -> SingleFlightStats:
+        """
+        Get a snapshot of how many requests were coalesced
+        :return: The single-flight statistics
+        """
+        with self._lock:
+            return SingleFlightStats(
+                upstream=self._upstream,
+                shared=self._shared,
+                in_flight=len(self._calls) + len(self._streams),
+            )
+
+    def _pull(self, key: Hashable, flight: _StreamFlight) -> None:
+        """Read the next upstream item into the shared buffer"""
+        done, error = False, None
+        try:
+            item = next(flight.source)
+        except StopIteration:
+            done = True
+        except BaseException as exc:
+            done, error = True, exc
+
+        with flight.cond:
+            if done:
+                flight.done, flight.error = True, error
+                self._forget(key, flight)
+            else:
+                flight.items.append(item)
+            flight.reading = False
+            flight.cond.notify_all()
+
+    def _forget(self, key: Hashable, flight: _StreamFlight) -> None:
+        """Stop sharing a finished flight, the lock must be held"""
+        if self._streams.get(key) is flight:
+            del self._streams[key]
@@ -0,0 +1,200 @@
+"""Client-side stop conditions that end a streamed generation early"""
+from __future__ import annotations
+
+import abc
+import re
+from collections import deque
+from typing import TYPE_CHECKING, Callable, Generator, Iterator, Optional, Union
+
+if TYPE_CHECKING:  # pragma: no cover
+    from ollama_python.models.generate import StreamChatCompletion, StreamCompletion
+
+
+class StopCondition(abc.ABC):
+    """
+    A condition checked against every streamed text fragment. Conditions keep state between
+    fragments, so use a new instance for every call.
+    """
+
+    @abc.abstractmethod
+    def feed(self, text: str) -> bool:
+        """
+        Consume the next text fragment of the stream
+        :param text: The text of the fragment
+        :return: Whether the stream should stop after this fragment
+        """
+
+
+class StopSequences(StopCondition):
+    """
+    Stop when any of the given sequences appears in the streamed text, including sequences split
+    across fragments. The sequences are matched together with an Aho-Corasick automaton whose
+    state carries over between fragments, so every character is examined once.
+    """
+
+    def __init__(self, sequences: list[str]):
+        """
+        Initialize the matcher
+        :param sequences: The sequences to stop on
+        """
+        if not sequences or not all(sequences):
+            raise ValueError("At least one non-empty stop sequence is required")
+
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[Optional[str]] = [None]
+        for sequence in sequences:
+            state = 0
+            for character in sequence:
+                if character not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(None)
+                    self._goto[state][character] = len(self._goto) - 1
+                state = self._goto[state][character]
+            self._output[state] = self._output[state] or sequence
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for character, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and character not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(character, 0)
+                self._output[child] = (
+                    self._output[child] or self._output[self._fail[child]]
+                )
+
+        self._state = 0
+        self.matched: Optional[str] = None
+
+    def feed(self, text: str) -> bool:
+        goto, fail, output = self._goto, self._fail, self._output
+        state = self._state
+        for character in text:
+            while state and character not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(character, 0)
+            if output[state] is not None:
+                self.matched = output[state]
+                self._state = state
+                return True
+        self._state = state
+        return False
+
+
+class RegexStop(StopCondition):
+    """
+    Stop when the regular expression matches the streamed text. Only the last ``window``
+    characters are kept between fragments, so matches longer than the window are not found.
+    """
+
+    def __init__(self, pattern: Union[str, re.Pattern], window: int = 256):
+        """
+        Initialize the condition
+        :param pattern: The regular expression to search for
+        :param window: The number of trailing characters searched together with each new fragment
+        """
+        self.pattern = re.compile(pattern)
+        self.window = window
+        self._tail = ""
+        self.match: Optional[re.Match] = None
+
+    def feed(self, text: str) -> bool:
+        haystack = self._tail + text
+        self.match = self.pattern.search(haystack)
+        self._tail = haystack[-self.window :]
+        return self.match is not None
+
+
+class JsonComplete(StopCondition):
+    """Stop as soon as the top-level JSON object or array in the streamed text is closed"""
+
+    def __init__(self):
+        """Initialize the condition"""
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, text: str) -> bool:
+        for character in text:
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif character == "\\":
+                    self._escaped = True
+                elif character == '"':
+                    self._in_string = False
+            elif character == '"':
+                self._in_string = True
+            elif character in "{[":
+                self._depth += 1
+            elif character in "}]" and self._depth:
+                self._depth -= 1
+                if self._depth == 0:
+                    return True
+        return False
+
+
+class TokenBudget(StopCondition):
+    """Stop after the given number of streamed fragments, each of which is usually one token"""
+
+    def __init__(self, max_tokens: int):
+        """
+        Initialize the condition
+        :param max_tokens: The number of fragments to read before stopping
+        """
+        if max_tokens < 1:
+            raise ValueError("max_tokens must be at least 1")
+        self.max_tokens = max_tokens
+        self.count = 0
+
+    def feed(self, text: str) -> bool:
+        self.count += 1
+        return self.count >= self.max_tokens
+
+
+def completion_text(completion: Union[StreamCompletion, StreamChatCompletion]) -> str:
+    """
+    Get the text fragment of a streamed completion
+    :param completion: A streamed generate or chat completion
+    :return: The generated text of the chunk
+    """
+    response = getattr(completion, "response", None)
+    if response is not None:
+        return response
+    return "".join(message.content for message in completion.message or [])
+
+
+def stop_early(
+    stream: Iterator,
+    conditions: list[Union[StopCondition, Callable[[str], bool]]],
+    text: Callable[[object], str] = completion_text,
+) -> Generator:
+    """
+    Yield the items of the stream until one of the conditions fires, then close the stream so
+    its connection is closed and the server stops generating. The item that fired the condition
+    is still yielded.
+    :param stream: The stream to read
+    :param conditions: Stop conditions, or callables receiving each text fragment and returning whether to stop
+    :param text: A function returning the text fragment of a streamed item
+    :return: A generator that yields the items of the stream
+    """
+    checks = [
+        condition.feed if isinstance(condition, StopCondition) else condition
+        for condition in conditions
+    ]
+    try:
+        for item in stream:
+            fragment = text(item)
+            # Every condition sees every fragment, so their states stay consistent
+            stop = [check(fragment) for check in checks]
+            yield item
+            if any(stop):
+                return
+    finally:
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
@@ -0,0 +1,332 @@
+"""HTTP transport with timeouts and cancellation for requests sent to Ollama"""
+import contextvars
+import socket
+import threading
+import time
+from typing import Callable, Optional
+from urllib.parse import quote, unquote, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.poolmanager import SSL_KEYWORDS
+from urllib3.exceptions import (
+    ConnectTimeoutError,
+    NewConnectionError,
+    ReadTimeoutError,
+)
+
+from ollama_python.models.transport import Timeouts
+
+
+class RequestCancelled(requests.exceptions.RequestException):
+    """The request was cancelled through its CancelHandle"""
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """The call did not finish before its deadline"""
+
+
+class FirstTokenTimeout(requests.exceptions.ReadTimeout):
+    """The first chunk of a streaming response did not arrive in time"""
+
+
+class InterTokenTimeout(requests.exceptions.ReadTimeout):
+    """The next chunk of a streaming response did not arrive in time"""
+
+
+_active_handle: contextvars.ContextVar[
+    Optional["CancelHandle"]
+] = contextvars.ContextVar("ollama_active_handle", default=None)
+
+
+class CancelHandle:
+    """
+    Cancel an in-flight request from any thread. Cancelling shuts the connection down at once,
+    which unblocks the reading thread and tells the server to stop generating.
+    """
+
+    def __init__(self):
+        """Initialize a handle that has not been cancelled"""
+        self._lock = threading.Lock()
+        self._connection: Optional[HTTPConnection] = None
+        self.reason: Optional[str] = None
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the handle has been cancelled"""
+        return self.reason is not None
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        """
+        Cancel the request, closing its connection
+        :param reason: Why the request was cancelled
+        """
+        with self._lock:
+            if self.reason is None:
+                self.reason = reason
+            connection = self._connection
+        if connection is not None:
+            _shutdown(connection)
+
+    def raise_if_cancelled(self) -> None:
+        """
+        Raise if the handle has been cancelled
+        :raises DeadlineExceeded: If the handle was cancelled by a deadline
+        :raises RequestCancelled: If the handle was cancelled explicitly
+        """
+        if self.reason == "deadline":
+            raise DeadlineExceeded("The call did not finish before its deadline")
+        if self.reason is not None:
+            raise RequestCancelled(f"The request was cancelled: {self.reason}")
+
+    def _attach(self, connection: HTTPConnection) -> None:
+        with self._lock:
+            self._connection = connection
+            cancelled = self.reason is not None
+        if cancelled:
+            _shutdown(connection)
+
+    def _detach(self) -> None:
+        with self._lock:
+            self._connection = None
+
+    def _set_read_timeout(self, timeout: Optional[float]) -> None:
+        sock = getattr(self._connection, "sock", None)
+        if sock is not None:
+            sock.settimeout(timeout)
+
+
+def _shutdown(connection: HTTPConnection) -> None:
+    """Shut the socket down so a blocked read returns immediately"""
+    sock = getattr(connection, "sock", None)
+    if sock is None:
+        return
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+class _CancellableConnectionMixin:
+    """Register the connection with the CancelHandle of the request being sent"""
+
+    def connect(self) -> None:
+        super().connect()
+        handle = _active_handle.get()
+        if handle is not None:
+            handle._attach(self)
+
+    def request(self, *args, **kwargs):
+        handle = _active_handle.get()
+        if handle is not None:
+            handle._attach(self)
+        return super().request(*args, **kwargs)
+
+
+class _CancellableHTTPConnection(_CancellableConnectionMixin, HTTPConnection):
+    pass
+
+
+class _CancellableHTTPSConnection(_CancellableConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _UnixHTTPConnection(_CancellableHTTPConnection):
+    """An HTTP connection over a Unix domain socket, whose path is the percent-encoded host"""
+
+    def _new_conn(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(self.timeout)
+            sock.connect(unquote(self.host))
+        except socket.timeout as exc:
+            sock.close()
+            raise ConnectTimeoutError(
+                self, f"Connection to {unquote(self.host)} timed out"
+            ) from exc
+        except OSError as exc:
+            sock.close()
+            raise NewConnectionError(
+                self, f"Failed to establish a new connection: {exc}"
+            ) from exc
+        return sock
+
+    def putrequest(self, method: str, url: str, *args, **kwargs) -> None:
+        # The socket path is no use to the server as a Host header
+        kwargs["skip_host"] = True
+        super().putrequest(method, url, *args, **kwargs)
+        self.putheader("Host", "localhost")
+
+
+class _CancellableHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _CancellableHTTPConnection
+
+
+class _CancellableHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _CancellableHTTPSConnection
+
+
+class _UnixHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _UnixHTTPConnection
+
+    def __init__(self, *args, **kwargs):
+        # The pool manager only strips the TLS settings requests passes for the http scheme
+        for keyword in SSL_KEYWORDS:
+            kwargs.pop(keyword, None)
+        super().__init__(*args, **kwargs)
+
+
+class CancellableAdapter(HTTPAdapter):
+    """
+    A requests adapter whose connections can be shut down through a CancelHandle. It also
+    connects to ``http+unix://`` URLs, whose host is the percent-encoded path of a Unix socket
+    """
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CancellableHTTPConnectionPool,
+            "https": _CancellableHTTPSConnectionPool,
+            UNIX_SCHEME: _UnixHTTPConnectionPool,
+        }
+        self.poolmanager.key_fn_by_scheme = {
+            **self.poolmanager.key_fn_by_scheme,
+            UNIX_SCHEME: self.poolmanager.key_fn_by_scheme["http"],
+        }
+
+
+UNIX_SCHEME = "http+unix"
+
+
+def unix_socket_url(socket_path: str, base_url: str = "http://localhost/api") -> str:
+    """
+    Build the URL of an API served on a Unix domain socket
+    :param socket_path: The path of the socket
+    :param base_url: A URL whose path, query and fragment are kept e.g. the base URL of the API
+    :return: The ``http+unix://`` URL, with the socket path percent-encoded as its host
+    """
+    parts = urlsplit(base_url)
+    return urlunsplit(
+        (UNIX_SCHEME, quote(socket_path, safe=""), parts.path, parts.query, "")
+    )
+
+
+def create_session() -> requests.Session:
+    """
+    Create the session used by the endpoints, pooling connections between requests
+    :return: The session
+    """
+    session = requests.Session()
+    adapter = CancellableAdapter()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.mount(f"{UNIX_SCHEME}://", adapter)
+    return session
+
+
+class Call:
+    """
+    Apply the timeouts and cancel handle of a single call, translating the resulting
+    connection errors into DeadlineExceeded, RequestCancelled or the token timeouts.
+    """
+
+    def __init__(
+        self,
+        timeouts: Optional[Timeouts] = None,
+        cancel: Optional[CancelHandle] = None,
+        streaming: bool = False,
+    ):
+        """
+        Initialize the call
+        :param timeouts: The timeouts of the call
+        :param cancel: The handle used to cancel the call
+        :param streaming: Whether the response is streamed
+        """
+        self.timeouts = timeouts or Timeouts()
+        self.handle = cancel or CancelHandle()
+        self.streaming = streaming
+        self.first_token_received = False
+        self._started = time.monotonic()
+        self._timer: Optional[threading.Timer] = None
+
+    def __enter__(self) -> "Call":
+        self.handle.raise_if_cancelled()
+        if self.timeouts.deadline is not None:
+            self._timer = threading.Timer(
+                self.timeouts.deadline,
+                self.handle.cancel,
+                kwargs={"reason": "deadline"},
+            )
+            self._timer.daemon = True
+            self._timer.start()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        # The connection goes back to the pool, a later cancel must not touch it
+        self.handle._detach()
+        if not isinstance(exc, Exception) or isinstance(
+            exc, (RequestCancelled, DeadlineExceeded)
+        ):
+            return
+        if self.handle.cancelled:
+            try:
+                self.handle.raise_if_cancelled()
+            except requests.exceptions.RequestException as error:
+                raise error from exc
+        if _is_read_timeout(exc):
+            if not self.streaming:
+                raise DeadlineExceeded(
+                    "The call did not finish before its deadline"
+                ) from exc
+            if self.first_token_received:
+                raise InterTokenTimeout(
+                    f"No chunk within {self.timeouts.inter_token} seconds"
+                ) from exc
+            raise FirstTokenTimeout(
+                f"No first chunk within {self.timeouts.first_token} seconds"
+            ) from exc
+
+    def remaining(self) -> Optional[float]:
+        """
+        The time left before the deadline
+        :return: The seconds left, None when the call has no deadline
+        """
+        if self.timeouts.deadline is None:
+            return None
+        return max(0.0, self.timeouts.deadline - (time.monotonic() - self._started))
+
+    def send(self, method: Callable, url: str, **kwargs) -> requests.Response:
+        """
+        Send the request with the connect and read timeouts of the call
+        :param method: The session method used to send the request e.g. session.post
+        :param url: The URL of the request
+        :param kwargs: Additional arguments passed to the method
+        :return: The response
+        """
+        self.handle.raise_if_cancelled()
+        read = self.timeouts.first_token if self.streaming else self.remaining()
+        if self.timeouts.connect is not None or read is not None:
+            kwargs["timeout"] = (self.timeouts.connect, read)
+        token = _active_handle.set(self.handle)
+        try:
+            return method(url, **kwargs)
+        finally:
+            _active_handle.reset(token)
+
+    def chunk_received(self) -> None:
+        """Switch to the inter-token timeout after the first chunk, stop if the call was cancelled"""
+        self.handle.raise_if_cancelled()
+        if not self.first_token_received:
+            self.first_token_received = True
+            self.handle._set_read_timeout(self.timeouts.inter_token)
+
+
+def _is_read_timeout(error: BaseException) -> bool:
+    """Whether the error, or the urllib3 error it wraps, is a read timeout"""
+    if isinstance(error, (requests.exceptions.ReadTimeout, socket.timeout)):
+        return True
+    return any(isinstance(arg, ReadTimeoutError) for arg in error.args)
@@ -0,0 +1,279 @@
+"""Background scheduler that keeps models resident on Ollama hosts"""
+
+import threading
+import time
+from typing import Callable, Optional, Union
+
+from ollama_python.endpoints.base import BaseAPI
+from ollama_python.endpoints.generate import GenerateAPI
+from ollama_python.models.generate import BaseCompletion
+from ollama_python.models.metrics import WarmupStats, WarmupTargetStats
+
+
+def _host(base_url: str) -> str:
+    """Normalize a base URL the same way the endpoints do"""
+    return BaseAPI(base_url=base_url).base_url
+
+
+class _Target:
+    """The scheduling state of a single model on a single host"""
+
+    def __init__(self, api: GenerateAPI, interval: float, next_due: float):
+        self.api = api
+        self.interval = interval
+        self.next_due = next_due
+        self.warmups = 0
+        self.failures = 0
+        self.observed = 0
+        self.cold_starts = 0
+        self.evictions = 0
+        self.last_load_duration = 0
+
+
+class WarmupScheduler:
+    """
+    Keep a set of models resident on each host by issuing minimal warm-up generate calls.
+
+    A target is warmed up when it has been idle for ``interval`` seconds. Real traffic fed
+    through :meth:`observe` pushes the next warm-up back, so busy models cost nothing. When a
+    warm-up or an observed request reports a ``load_duration`` spike the model had been
+    evicted, so the interval of that target is halved (down to ``min_interval``); quiet
+    warm-ups grow it back towards ``interval``.
+    """
+
+    def __init__(
+        self,
+        interval: float = 240.0,
+        min_interval: float = 15.0,
+        keep_alive: Union[int, str] = "5m",
+        load_threshold: float = 0.5,
+        preload_lead: float = 30.0,
+        prompt: str = ".",
+        tick: float = 1.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initialize the warm-up scheduler
+        :param interval: The longest time in seconds a target may stay idle before it is warmed up
+        :param min_interval: The shortest interval the scheduler will back off to after evictions
+        :param keep_alive: The keep_alive sent with every warm-up call
+        :param load_threshold: A load_duration in seconds above which a request counts as a cold start
+        :param preload_lead: How many seconds before a scheduled preload the warm-up is issued
+        :param prompt: The prompt used for warm-up calls, only a single token is generated
+        :param tick: How often in seconds the background thread checks for due targets
+        :param clock: The clock used for scheduling, in seconds since the epoch
+        """
+        if min_interval <= 0 or interval < min_interval:
+            raise ValueError(
+                "interval must be greater than or equal to min_interval > 0"
+            )
+
+        self.interval = interval
+        self.min_interval = min_interval
+        self.keep_alive = keep_alive
+        self.load_threshold = load_threshold
+        self.preload_lead = preload_lead
+        self.prompt = prompt
+        self.tick = tick
+        self.clock = clock
+
+        self._targets: dict[tuple[str, str], _Target] = {}
+        self._preloads: list[tuple[float, Optional[str], Optional[str]]] = []
+        self._warmup_nanoseconds = 0
+        self._warmup_tokens = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_target(
+        self, model: str, base_url: str = "http://localhost:11434/api"
+    ) -> None:
+        """
+        Keep the given model resident on the given host. The first warm-up is due immediately
+        :param model: The model to keep loaded
+        :param base_url: The base URL of the host
+        """
+        api = GenerateAPI(model=model, base_url=base_url)
+        with self._lock:
+            self._targets.setdefault(
+                (api.base_url, model), _Target(api, self.interval, self.clock())
+            )
+
+    def remove_target(
+        self, model: str, base_url: str = "http://localhost:11434/api"
+    ) -> None:
+        """
+        Stop keeping the given model resident on the given host
+        :param model: The model to stop warming up
+        :param base_url: The base URL of the host
+        """
+        with self._lock:
+            self._targets.pop((_host(base_url), model), None)
+
+    def add_preload(
+        self,
+        at: float,
+        model: Optional[str] = None,
+        base_url: Optional[str] = None,
+    ) -> None:
+        """
+        Warm up targets ``preload_lead`` seconds before known traffic arrives
+        :param at: The clock time at which the traffic is expected
+        :param model: Only preload this model, all models when omitted
+        :param base_url: Only preload on this host, all hosts when omitted
+        """
+        if base_url is not None:
+            base_url = _host(base_url)
+        with self._lock:
+            self._preloads.append((at, model, base_url))
+
+    def observe(self, completion: BaseCompletion, base_url: str) -> None:
+        """
+        Record a completion returned to real traffic
+        :param completion: A final Completion or ChatCompletion (streamed chunks without stats are ignored)
+        :param base_url: The base URL of the host that served the completion
+        """
+        if completion.load_duration is None:
+            return
+        key = (_host(base_url), completion.model)
+        with self._lock:
+            target = self._targets.get(key)
+            if target is None:
+                return
+            target.observed += 1
+            if self._record_load(target, completion.load_duration):
+                target.cold_starts += 1
+
+    def run_pending(self) -> int:
+        """
+        Issue the warm-up calls that are due now
+        :return: The number of warm-up calls issued
+        """
+        now = self.clock()
+        with self._lock:
+            self._apply_preloads(now)
+            due = [t for t in self._targets.values() if t.next_due <= now]
+            for target in due:
+                # Reserve the slot so a concurrent caller does not warm the same target
+                target.next_due = now + target.interval
+
+        for target in due:
+            self._warm(target)
+        return len(due)
+
+    def stats(self) -> WarmupStats:
+        """
+        Get a snapshot of the warm-up spend and hit rate
+        :return: The warm-up statistics
+        """
+        with self._lock:
+            targets = [
+                WarmupTargetStats(
+                    base_url=target.api.base_url,
+                    model=target.api.model,
+                    warmups=target.warmups,
+                    failures=target.failures,
+                    observed=target.observed,
+                    cold_starts=target.cold_starts,
+                    evictions=target.evictions,
+                    last_load_duration=target.last_load_duration,
+                    next_warmup_at=target.next_due,
+                )
+                for target in self._targets.values()
+            ]
+            warmup_seconds = self._warmup_nanoseconds / 1e9
+            warmup_tokens = self._warmup_tokens
+
+        observed = sum(t.observed for t in targets)
+        cold_starts = sum(t.cold_starts for t in targets)
+        return WarmupStats(
+            warmups=sum(t.warmups for t in targets),
+            failures=sum(t.failures for t in targets),
+            warmup_seconds=warmup_seconds,
+            warmup_tokens=warmup_tokens,
+            observed=observed,
+            cold_starts=cold_starts,
+            evictions=sum(t.evictions for t in targets),
+            hit_rate=1 - cold_starts / observed if observed else 1.0,
+            targets=targets,
+        )
+
+    def start(self) -> None:
+        """Start warming up targets on a background thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="ollama-warmup", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop the background thread
+        :param timeout: How long to wait for an in-flight warm-up to finish
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def __enter__(self) -> "WarmupScheduler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        while True:
+            self.run_pending()
+            if self._stop.wait(self.tick):
+                return
+
+    def _apply_preloads(self, now: float) -> None:
+        pending = []
+        for at, model, base_url in self._preloads:
+            if at - self.preload_lead > now:
+                pending.append((at, model, base_url))
+                continue
+            for (target_url, target_model), target in self._targets.items():
+                if model in (None, target_model) and base_url in (None, target_url):
+                    target.next_due = now
+        self._preloads = pending
+
+    def _warm(self, target: _Target) -> None:
+        try:
+            completion = target.api.generate(
+                prompt=self.prompt,
+                options={"num_predict": 1},
+                keep_alive=self.keep_alive,
+            )
+        except Exception:
+            with self._lock:
+                target.warmups += 1
+                target.failures += 1
+            return
+
+        with self._lock:
+            target.warmups += 1
+            self._warmup_nanoseconds += completion.total_duration
+            self._warmup_tokens += (
+                completion.prompt_eval_count or 0
+            ) + completion.eval_count
+            if self._record_load(target, completion.load_duration):
+                target.evictions += 1
+
+    def _record_load(self, target: _Target, load_duration: int) -> bool:
+        """
+        Adapt the interval of the target to the observed load duration, the lock must be held
+        :return: Whether the load duration was a cold start
+        """
+        target.last_load_duration = load_duration
+        cold = load_duration > self.load_threshold * 1e9
+        if cold:
+            target.interval = max(self.min_interval, target.interval / 2)
+        else:
+            target.interval = min(self.interval, target.interval * 1.25)
+        target.next_due = self.clock() + target.interval
+        return cold
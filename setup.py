@@ -16,6 +16,7 @@ setup(
         "requests>=2.31.0",
         "responses >=0.24.1",
     ],
+    extras_require={"numpy": ["numpy"]},
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
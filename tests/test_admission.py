@@ -0,0 +1,105 @@
+import threading
+import pytest
+import responses
+from ollama_python.admission import AdmissionController
+from ollama_python.endpoints.embedding import EmbeddingAPI
+from ollama_python.endpoints.generate import GenerateAPI
+from tests.utils.utils import mock_api_response
+
+HOST = "http://test-servers/api"
+
+
+def queued(controller: AdmissionController) -> int:
+    return sum(lane.queued for lane in controller.stats().lanes)
+
+
+def test_per_host_limit():
+    controller = AdmissionController(max_per_host=1)
+    controller.acquire(HOST, "model-a")
+
+    with pytest.raises(TimeoutError):
+        controller.acquire(HOST, "model-b", timeout=0.01)
+    controller.acquire("http://other-host/api", "model-a", timeout=0.01)
+
+    stats = controller.stats()
+    assert stats.in_flight == {HOST: 1, "http://other-host/api": 1}
+    assert stats.lanes[0].timeouts == 1
+    assert queued(controller) == 0
+
+
+def test_per_model_limit():
+    controller = AdmissionController(max_per_host=4, max_per_model=1)
+    controller.acquire(HOST, "model-a")
+
+    with pytest.raises(TimeoutError):
+        controller.acquire(HOST, "model-a", timeout=0.01)
+    controller.acquire(HOST, "model-b", timeout=0.01)
+
+
+def test_weighted_fair_queuing_between_lanes():
+    controller = AdmissionController(max_per_host=1)
+    controller.acquire(HOST)
+    order = []
+
+    def request(lane: str):
+        with controller.slot(HOST, lane=lane):
+            order.append(lane)
+
+    threads = []
+    for lane in ["bulk"] * 2 + ["interactive"] * 6:
+        thread = threading.Thread(target=request, args=(lane,))
+        thread.start()
+        threads.append(thread)
+        while queued(controller) < len(threads):
+            pass
+    controller.release(HOST)
+    for thread in threads:
+        thread.join()
+
+    assert order == ["interactive"] * 3 + ["bulk"] + ["interactive"] * 3 + ["bulk"]
+    stats = controller.stats()
+    assert stats.lanes[1].admitted == 2
+    assert stats.lanes[1].max_wait_seconds > 0
+    assert stats.in_flight == {}
+
+
+def test_invalid_configuration():
+    with pytest.raises(ValueError):
+        AdmissionController(max_per_host=0)
+    with pytest.raises(ValueError):
+        AdmissionController(lanes={"interactive": 0})
+    with pytest.raises(ValueError):
+        AdmissionController().acquire(HOST, lane="unknown")
+
+
+@responses.activate
+def test_endpoints_hold_a_slot_for_the_request():
+    controller = AdmissionController()
+    api = EmbeddingAPI(
+        model="test-model", base_url=HOST, admission=controller, priority="bulk"
+    )
+    mock_api_response("/embedding", {"embedding": [1.0]})
+    api.get_embedding(prompt="test")
+
+    stats = controller.stats()
+    assert stats.lanes[1].lane == "bulk"
+    assert stats.lanes[1].admitted == 1
+    assert stats.in_flight == {}
+
+
+@responses.activate
+def test_streams_hold_a_slot_until_exhausted():
+    controller = AdmissionController()
+    api = GenerateAPI(model="test-model", base_url=HOST, admission=controller)
+    chunk = {"model": "test-model", "created_at": "now", "response": "A"}
+    mock_api_response(
+        "/generate",
+        [{**chunk, "done": False}, {**chunk, "done": True}],
+        stream=True,
+    )
+
+    stream = api.generate(prompt="test", stream=True)
+    next(stream)
+    assert controller.stats().in_flight == {HOST: 1}
+    list(stream)
+    assert controller.stats().in_flight == {}
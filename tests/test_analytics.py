@@ -0,0 +1,171 @@
+import threading
+import pytest
+import responses
+from ollama_python.analytics import PerformanceTracker
+from ollama_python.endpoints.generate import GenerateAPI
+from ollama_python.models.generate import Completion, StreamCompletion
+from ollama_python.singleflight import SingleFlight
+from tests.utils.server import StandInServer
+from tests.utils.utils import mock_api_response
+
+BASE_URL = "http://test-servers/api"
+
+
+def completion(
+    model: str = "test-model",
+    total: float = 3.0,
+    load: float = 0.01,
+    prompt_tokens: int = 100,
+    prompt_seconds: float = 0.5,
+    tokens: int = 50,
+    seconds: float = 1.0,
+) -> dict:
+    return {
+        "model": model,
+        "created_at": "2023-08-04T19:22:45.499127Z",
+        "response": "A",
+        "done": True,
+        "context": [1, 2, 3],
+        "total_duration": int(total * 1e9),
+        "load_duration": int(load * 1e9),
+        "prompt_eval_count": prompt_tokens,
+        "prompt_eval_duration": int(prompt_seconds * 1e9),
+        "eval_count": tokens,
+        "eval_duration": int(seconds * 1e9),
+    }
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_rates_queueing_and_loads_per_host_and_model():
+    tracker = PerformanceTracker(clock=FakeClock())
+    tracker.record(Completion(**completion()), BASE_URL)
+    tracker.record(Completion(**completion(load=2.0, total=3.5)), BASE_URL + "/")
+    tracker.record(Completion(**completion(model="other")), BASE_URL)
+
+    stats = tracker.stats(model="test-model")
+    assert len(stats.models) == 1
+    model = stats.models[0]
+    assert (model.base_url, model.requests, model.loads) == (BASE_URL, 2, 1)
+    assert model.load_rate == 0.5
+    assert model.prompt_tokens_per_second.p50 == pytest.approx(200, rel=0.05)
+    assert model.generation_tokens_per_second.mean == pytest.approx(50)
+    assert model.queue_seconds.count == 2
+    assert model.queue_seconds.p99 == pytest.approx(1.49, rel=0.05)
+    assert len(tracker.stats(base_url=BASE_URL + "/").models) == 2
+    assert tracker.stats(base_url="http://elsewhere/api").models == []
+
+
+def test_quantiles_follow_the_distribution():
+    tracker = PerformanceTracker(clock=FakeClock())
+    for tokens in range(1, 101):
+        tracker.record(Completion(**completion(tokens=tokens)), BASE_URL)
+
+    rates = tracker.stats().models[0].generation_tokens_per_second
+    assert rates.p50 == pytest.approx(50, rel=0.1)
+    assert rates.p90 == pytest.approx(90, rel=0.1)
+    assert rates.p99 == pytest.approx(99, rel=0.1)
+
+
+def test_samples_expire_one_slot_at_a_time():
+    clock = FakeClock()
+    tracker = PerformanceTracker(window=10, slots=5, clock=clock)
+    tracker.record(Completion(**completion()), BASE_URL)
+    clock.now += 6
+    tracker.record(Completion(**completion()), BASE_URL)
+
+    assert tracker.stats().models[0].requests == 2
+    clock.now += 5
+    assert tracker.stats().models[0].requests == 1
+    # Reuses the slot of the first sample
+    tracker.record(Completion(**completion()), BASE_URL)
+    assert tracker.stats().models[0].requests == 2
+    clock.now += 100
+    assert tracker.stats().models == []
+
+
+def test_memory_is_bounded():
+    tracker = PerformanceTracker(window=10, slots=5, clock=FakeClock())
+    for index in range(1000):
+        tracker.clock.now += 0.5
+        tracker.record(
+            Completion(**completion(tokens=index + 1, total=1.5, load=0)), BASE_URL
+        )
+
+    (series,) = tracker._series.values()
+    assert len(series) == 5
+    assert all(len(slot.histograms["queue_seconds"].counts) == 1 for slot in series)
+    assert tracker.stats().models[0].queue_seconds.p50 < 1e-6
+
+
+def test_chunks_without_timings_are_ignored():
+    tracker = PerformanceTracker()
+    chunk = StreamCompletion(
+        model="test-model", created_at="now", response="A", done=False
+    )
+
+    assert not tracker.record(chunk, BASE_URL)
+    assert tracker.stats().models == []
+    tracker.record(Completion(**completion(prompt_tokens=0)), BASE_URL)
+    assert tracker.stats().models[0].prompt_tokens_per_second.count == 0
+    with pytest.raises(ValueError):
+        PerformanceTracker(slots=0)
+
+
+@responses.activate
+def test_attached_tracker_records_completions_and_streams():
+    tracker = PerformanceTracker()
+    api = GenerateAPI(model="test-model", base_url=BASE_URL, analytics=tracker)
+    mock_api_response("/generate", completion())
+    api.generate(prompt="test")
+    mock_api_response(
+        "/generate",
+        [{**completion(), "done": False}, {**completion(), "response": ""}],
+        stream=True,
+    )
+    assert len(list(api.generate(prompt="test", stream=True))) == 2
+    message = {"role": "assistant", "content": "A"}
+    chat = {**completion(), "message": [message]}
+    mock_api_response("/chat", chat)
+    api.generate_chat_completion(messages=[{"role": "user", "content": "Hello"}])
+    mock_api_response("/chat", [chat], stream=True)
+    list(
+        api.generate_chat_completion(
+            messages=[{"role": "user", "content": "Hello"}], stream=True
+        )
+    )
+
+    assert tracker.stats().models[0].requests == 4
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_shared_requests_are_recorded_once(stream):
+    tracker = PerformanceTracker()
+    group = SingleFlight()
+    with StandInServer(chunks=[completion()], header_delay=0.5) as server:
+        api = GenerateAPI(
+            model="test-model",
+            base_url=server.base_url,
+            analytics=tracker,
+            single_flight=group,
+        )
+
+        def call():
+            result = api.generate(prompt="test", options={"seed": 1}, stream=stream)
+            return list(result) if stream else result
+
+        threads = [threading.Thread(target=call) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(server.requests) == 1
+    assert group.stats().shared == 4
+    assert tracker.stats().models[0].requests == 1
@@ -0,0 +1,268 @@
+import gzip
+import json
+import shutil
+import threading
+import time
+import pytest
+import responses
+from ollama_python.audit import AuditLog
+from ollama_python.endpoints.generate import GenerateAPI
+from ollama_python.history import MessageHistory
+from ollama_python.models.metrics import AuditLogStats
+from tests.utils.utils import mock_api_response
+
+COMPLETION = {
+    "model": "test-model",
+    "created_at": "2023-08-04T19:22:45.499127Z",
+    "done": True,
+    "context": [1, 2, 3],
+    "total_duration": 1,
+    "load_duration": 0,
+    "prompt_eval_count": 1,
+    "prompt_eval_duration": 1,
+    "eval_count": 1,
+    "eval_duration": 1,
+}
+
+
+def read(log: AuditLog) -> list[dict]:
+    log.flush()
+    lines = []
+    for path in log.files:
+        with gzip.open(path, "rt") as file:
+            lines += [json.loads(line) for line in file]
+    return lines
+
+
+class SlowLog(AuditLog):
+    """An audit log whose writer waits until released"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.writing = threading.Event()
+        self.release = threading.Event()
+
+    def _write(self, batch):
+        self.writing.set()
+        self.release.wait()
+        return super()._write(batch)
+
+
+@pytest.fixture
+def log(tmp_path):
+    with AuditLog(str(tmp_path / "audit"), flush_interval=0.01) as log:
+        yield log
+
+
+@pytest.fixture
+def generate_api(log) -> GenerateAPI:
+    return GenerateAPI(
+        model="test-model", base_url="http://test-servers/api", audit=log
+    )
+
+
+@responses.activate
+def test_blocking_calls_record_the_request_and_response(generate_api, log):
+    mock_api_response("/generate", {**COMPLETION, "response": "Hi"})
+    generate_api.generate(prompt="Hello", options={"seed": 1})
+
+    (entry,) = read(log)
+    assert entry["endpoint"] == "generate"
+    assert entry["base_url"] == "http://test-servers/api"
+    assert entry["request"]["prompt"] == "Hello"
+    assert entry["request"]["options"] == {"seed": 1}
+    assert entry["status"] == 200
+    assert entry["response"]["response"] == "Hi"
+    assert entry["duration"] >= 0
+    assert "error" not in entry
+
+
+@responses.activate
+def test_streams_record_every_chunk(generate_api, log):
+    chunks = [
+        {"model": "test-model", "created_at": "now", "response": "Hi", "done": False},
+        {**COMPLETION, "response": ""},
+    ]
+    mock_api_response("/generate", chunks, stream=True)
+    list(generate_api.generate(prompt="Hello", stream=True))
+
+    (entry,) = read(log)
+    assert entry["chunks"] == chunks
+
+
+@responses.activate
+def test_passthrough_streams_record_the_raw_bytes(generate_api, log):
+    chunks = [{"response": "Hi", "done": False}, {"response": "", "done": True}]
+    mock_api_response("/chat", chunks, stream=True)
+    list(
+        generate_api.generate_chat_completion(
+            messages=[{"role": "user", "content": "Hello"}],
+            stream=True,
+            passthrough="sse",
+        )
+    )
+    mock_api_response("/generate", chunks, stream=True)
+    list(generate_api.generate(prompt="Hello", stream=True, passthrough="ndjson"))
+
+    expected = "\n".join(json.dumps(chunk) for chunk in chunks)
+    sse, ndjson = read(log)
+    assert sse["raw"] == expected + "\n"
+    assert ndjson["raw"] == expected
+
+
+@responses.activate
+def test_failed_calls_record_the_error(generate_api, log):
+    mock_api_response("/generate", {"error": "model not found"}, status=404)
+    with pytest.raises(Exception):
+        generate_api.generate(prompt="Hello")
+
+    (entry,) = read(log)
+    assert entry["status"] == 404
+    assert entry["response"] == {"error": "model not found"}
+    assert entry["error"].startswith("HTTPError")
+
+
+@responses.activate
+def test_histories_are_recorded_as_sent(generate_api, log):
+    mock_api_response(
+        "/chat",
+        {**COMPLETION, "message": [{"role": "assistant", "content": "Hi"}]},
+    )
+    history = MessageHistory([{"role": "user", "content": "Hello"}])
+    generate_api.generate_chat_completion(messages=history)
+    history.append({"role": "user", "content": "Later"})
+
+    (entry,) = read(log)
+    assert entry["request"]["messages"] == [{"role": "user", "content": "Hello"}]
+
+
+def test_records_are_written_in_batches_and_rotated(tmp_path):
+    with AuditLog(
+        str(tmp_path), batch_size=2, flush_interval=10, max_file_bytes=1, max_files=2
+    ) as log:
+        for index in range(6):
+            log.submit(log.begin("http://host/api", "generate", {"index": index}))
+        log.flush()
+        entries = read(log)
+        stats = log.stats()
+
+    assert [entry["request"]["index"] for entry in entries] == [2, 3, 4, 5]
+    assert stats.batches == 3
+    assert stats.written == 6
+    assert stats.files == 2
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_unserializable_values_are_recorded_as_text(log):
+    log.submit(log.begin("http://host/api", "create", {"blob": b"data", "at": object}))
+    record = log.begin("http://host/api", "generate", None)
+    record.response = b"not json"
+    log.submit(record)
+
+    first, second = read(log)
+    assert first["request"] == {"blob": "data", "at": "<class 'object'>"}
+    assert second["request"] is None
+    assert second["response"] == "not json"
+
+
+@pytest.mark.parametrize(
+    "overflow, kept, dropped",
+    [
+        ("drop_newest", [0, 1], 2),
+        ("drop_oldest", [0, 3], 2),
+        ("block", [0, 1, 2, 3], 0),
+    ],
+)
+def test_overflow_policies(tmp_path, overflow, kept, dropped):
+    log = SlowLog(str(tmp_path), max_queue=1, batch_size=1, overflow=overflow)
+    log.submit(log.begin("http://host/api", "generate", {"index": 0}))
+    # The writer holds the first record, the queue has room for one more
+    log.writing.wait()
+    submitters = []
+    for index in range(1, 4):
+        record = log.begin("http://host/api", "generate", {"index": index})
+        if overflow == "block":
+            submitter = threading.Thread(target=log.submit, args=(record,))
+            submitter.start()
+            submitters.append(submitter)
+            submitter.join(0.05)
+        else:
+            log.submit(record)
+    log.release.set()
+    for submitter in submitters:
+        submitter.join()
+    log.close()
+
+    assert sorted(entry["request"]["index"] for entry in read(log)) == kept
+    assert log.stats().dropped == dropped
+
+
+def test_blocked_records_are_dropped_on_close(tmp_path):
+    log = SlowLog(str(tmp_path), max_queue=1, batch_size=1, overflow="block")
+    for index in range(2):
+        log.submit(log.begin("http://host/api", "generate", {"index": index}))
+    log.writing.wait()
+    submitter = threading.Thread(
+        target=log.submit, args=(log.begin("http://host/api", "generate", None),)
+    )
+    submitter.start()
+    submitter.join(0.05)
+    # Closing while the writer is busy drops the blocked record
+    closer = threading.Thread(target=log.close)
+    closer.start()
+    submitter.join()
+    log.release.set()
+    closer.join()
+    log.submit(log.begin("http://host/api", "generate", None))
+
+    assert log.stats() == AuditLogStats(
+        overflow="block",
+        submitted=4,
+        written=2,
+        dropped=2,
+        batches=2,
+        files=1,
+        bytes_written=log.stats().bytes_written,
+    )
+
+
+def test_idle_writer_keeps_waiting(tmp_path):
+    with AuditLog(str(tmp_path), flush_interval=0.001) as log:
+        log.submit(log.begin("http://host/api", "generate", None))
+        log.flush()
+        time.sleep(0.02)
+        log.submit(log.begin("http://host/api", "generate", None))
+
+        assert len(read(log)) == 2
+
+
+def test_failed_writes_drop_the_batch(tmp_path):
+    directory = tmp_path / "gone"
+    with AuditLog(str(directory), flush_interval=0.01) as log:
+        shutil.rmtree(directory)
+        log.submit(log.begin("http://host/api", "generate", None))
+        log.flush()
+        stats = log.stats()
+
+    assert stats.write_errors == 1
+    assert stats.dropped == 1
+    assert stats.written == 0
+
+
+def test_flush_times_out(tmp_path):
+    log = SlowLog(str(tmp_path), batch_size=1)
+    log.submit(log.begin("http://host/api", "generate", None))
+
+    assert not log.flush(timeout=0.01)
+    log.release.set()
+    assert log.flush()
+    log.close()
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{"overflow": "spill"}, {"max_queue": 0}, {"batch_size": 0}, {"max_files": 0}],
+)
+def test_invalid_settings(tmp_path, kwargs):
+    with pytest.raises(ValueError):
+        AuditLog(str(tmp_path), **kwargs)
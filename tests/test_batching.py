@@ -0,0 +1,136 @@
+import json
+import pytest
+import responses
+from requests.exceptions import HTTPError
+from ollama_python.batching import EmbeddingBatcher
+from ollama_python.endpoints.embedding import EmbeddingAPI
+from ollama_python.models.embedding import Embedding, Embeddings
+from tests.utils.utils import mock_api_response
+
+
+@pytest.fixture
+def embedding_api() -> EmbeddingAPI:
+    return EmbeddingAPI(
+        model="test-embedding-model", base_url="http://test-servers/api"
+    )
+
+
+@responses.activate
+def test_get_embeddings(embedding_api):
+    mock_api_response("/embed", {"embeddings": [[1, 2], [3, 4]]})
+    result = embedding_api.get_embeddings(inputs=["a", "b"], options={"seed": 1})
+
+    assert isinstance(result, Embeddings)
+    assert result.embeddings == [[1, 2], [3, 4]]
+    body = json.loads(responses.calls[0].request.body)
+    assert body["input"] == ["a", "b"]
+    assert body["options"] == {"seed": 1}
+
+
+@responses.activate
+def test_concurrent_requests_are_sent_as_one_batch(embedding_api):
+    mock_api_response("/embed", {"embeddings": [[1.0], [2.0], [3.0]]})
+    with EmbeddingBatcher(embedding_api, max_batch_size=3, max_wait=1) as batcher:
+        # Hold the queue so the flusher sees all three requests at once
+        with batcher._cond:
+            futures = [batcher.submit(prompt) for prompt in ["a", "b", "c"]]
+        results = [future.result() for future in futures]
+
+    assert [result.embedding for result in results] == [[1.0], [2.0], [3.0]]
+    assert len(responses.calls) == 1
+    stats = batcher.stats()
+    assert stats.batches == 1
+    assert stats.mean_batch_size == 3
+    assert stats.batch_supported
+
+
+@responses.activate
+def test_requests_with_different_options_are_not_batched_together(embedding_api):
+    mock_api_response("/embed", {"embeddings": [[1.0]]})
+    with EmbeddingBatcher(embedding_api, max_batch_size=2) as batcher:
+        with batcher._cond:
+            futures = [
+                batcher.submit("a", options={"seed": 1}),
+                batcher.submit("b", options={"seed": 2}),
+            ]
+        [future.result() for future in futures]
+
+    assert batcher.stats().batches == 2
+
+
+@responses.activate
+def test_falls_back_to_single_prompt_endpoint(embedding_api):
+    mock_api_response("/embed", status=404)
+    mock_api_response("/embedding", {"embedding": [3.0, 4.0]})
+    mock_api_response("/embedding", {"embedding": [0.0, 0.0]})
+    batcher = EmbeddingBatcher(embedding_api)
+
+    result = batcher.get_embedding("a")
+    assert isinstance(result, Embedding)
+    # Normalized like the embeddings of the batch endpoint
+    assert result.embedding == pytest.approx([0.6, 0.8])
+    assert batcher.get_embedding("b").embedding == [0.0, 0.0]
+
+    stats = batcher.stats()
+    assert stats.batch_supported is False
+    assert stats.fallbacks == 2
+    assert stats.requests == 2
+    assert len(responses.calls) == 3
+
+
+@responses.activate
+def test_fallback_errors_are_raised(embedding_api):
+    mock_api_response("/embed", status=404)
+    mock_api_response("/embedding", status=500)
+    batcher = EmbeddingBatcher(embedding_api)
+
+    with pytest.raises(HTTPError):
+        batcher.get_embedding("a")
+
+
+@responses.activate
+def test_batch_errors_are_raised_to_every_caller(embedding_api):
+    mock_api_response("/embed", status=500)
+    batcher = EmbeddingBatcher(embedding_api)
+
+    with pytest.raises(HTTPError):
+        batcher.get_embedding("a")
+    with pytest.raises(ValueError):
+        batcher.get_embedding("a", options={"invalid": 1})
+    assert batcher.stats().batch_supported is None
+
+
+@responses.activate
+def test_missing_embeddings_fail_every_caller(embedding_api):
+    mock_api_response("/embed", {"embeddings": [[1.0]]})
+    with EmbeddingBatcher(embedding_api, max_batch_size=2, max_wait=1) as batcher:
+        with batcher._cond:
+            futures = [batcher.submit(prompt) for prompt in ["a", "b"]]
+
+        for future in futures:
+            with pytest.raises(ValueError, match="Expected 2 embeddings"):
+                future.result(timeout=5)
+
+
+def test_window_is_skipped_for_sparse_traffic(embedding_api):
+    batcher = EmbeddingBatcher(embedding_api, max_wait=0.01)
+    assert batcher._linger() == 0
+
+    for now in [0.0, 0.001, 0.002]:
+        batcher._record_arrival(now)
+    assert batcher._linger() == 0.01
+
+    batcher._record_arrival(10.0)
+    assert batcher._linger() == 0
+
+
+@pytest.mark.parametrize("batch_supported", [None, False])
+def test_closed_batcher_rejects_requests(embedding_api, batch_supported):
+    batcher = EmbeddingBatcher(embedding_api)
+    batcher.batch_supported = batch_supported
+    batcher.close()
+
+    with pytest.raises(RuntimeError):
+        batcher.submit("a")
+    with pytest.raises(ValueError):
+        EmbeddingBatcher(embedding_api, max_batch_size=0)
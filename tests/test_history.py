@@ -0,0 +1,123 @@
+import json
+import pydantic
+import pytest
+import responses
+from ollama_python.endpoints.base import BaseAPI
+from ollama_python.endpoints.generate import GenerateAPI
+from ollama_python.history import MessageHistory
+from ollama_python.images import ImageEncoder
+from ollama_python.models import generate
+from ollama_python.models.generate import ChatCompletion
+from ollama_python.singleflight import SingleFlight
+from tests.utils.utils import mock_api_response
+
+CHAT_RESULT = {
+    "model": "test-model",
+    "created_at": "2023-08-04T19:22:45.499127Z",
+    "message": [{"role": "assistant", "content": "Hi there"}],
+    "done": True,
+    "context": [1, 2, 3],
+    "total_duration": 1,
+    "load_duration": 1,
+    "prompt_eval_duration": 1,
+    "eval_count": 1,
+    "eval_duration": 1,
+}
+
+
+@pytest.fixture
+def validations(monkeypatch) -> list:
+    validated = []
+    message = generate.Message
+
+    def counting(**fields):
+        validated.append(fields)
+        return message(**fields)
+
+    monkeypatch.setattr(generate, "Message", counting)
+    return validated
+
+
+def test_messages_are_validated_when_appended():
+    history = MessageHistory([{"role": "user", "content": "Hello"}])
+    with pytest.raises(pydantic.ValidationError):
+        history.append({"role": "robot", "content": "Hello"})
+    assert len(history) == 1
+    assert list(history) == [{"role": "user", "content": "Hello"}]
+    assert history[0]["content"] == "Hello"
+
+
+def test_encoded_json_is_cached_until_the_next_append():
+    history = MessageHistory()
+    assert history.encoded() == "[]"
+    history.extend(
+        [{"role": "system", "content": "Be brief"}, {"role": "user", "content": "Hi"}]
+    )
+
+    encoded = history.encoded()
+    assert json.loads(encoded) == list(history)
+    assert history.encoded() is encoded
+    history.append({"role": "assistant", "content": "Hello"})
+    assert json.loads(history.encoded())[-1]["content"] == "Hello"
+
+
+def test_images_are_encoded_once():
+    encoder = ImageEncoder()
+    history = MessageHistory(image_encoder=encoder)
+    history.append({"role": "user", "content": "What is this?", "images": [b"image"]})
+    assert history[0]["images"] == ["aW1hZ2U="]
+    assert encoder.stats().misses == 1
+
+
+def test_append_completion():
+    history = MessageHistory([{"role": "user", "content": "Hello"}])
+    history.append_completion(ChatCompletion(**CHAT_RESULT))
+    assert history[-1] == {"role": "assistant", "content": "Hi there"}
+
+
+@responses.activate
+def test_chat_turns_only_validate_new_messages(validations):
+    api = GenerateAPI(model="test-model", base_url="http://test-servers/api")
+    history = MessageHistory()
+    for turn in range(3):
+        mock_api_response("/chat", CHAT_RESULT)
+        history.append({"role": "user", "content": f"Question {turn}"})
+        completion = api.generate_chat_completion(messages=history)
+        history.append_completion(completion)
+
+    assert len(validations) == 6
+    body = json.loads(responses.calls[-1].request.body)
+    assert body["model"] == "test-model"
+    assert body["messages"] == list(history)[:-1]
+    assert responses.calls[-1].request.headers["Content-Type"] == "application/json"
+
+
+@responses.activate
+def test_streamed_chat_with_history():
+    mock_api_response("/chat", [{**CHAT_RESULT, "done": False}], stream=True)
+    api = GenerateAPI(model="test-model", base_url="http://test-servers/api")
+    history = MessageHistory([{"role": "user", "content": "Hello"}])
+
+    assert len(list(api.generate_chat_completion(messages=history, stream=True))) == 1
+    assert json.loads(responses.calls[0].request.body)["messages"] == list(history)
+
+
+def test_identical_history_requests_share_a_key():
+    api = GenerateAPI(
+        model="test-model",
+        base_url="http://test-servers/api",
+        single_flight=SingleFlight(),
+    )
+    first = MessageHistory([{"role": "user", "content": "Hello"}])
+    second = MessageHistory([{"role": "user", "content": "Hello"}])
+    assert api._request_key("chat", {"messages": first}) == api._request_key(
+        "chat", {"messages": second}
+    )
+    assert api._request_key("chat", {"file": object()}) is None
+
+
+def test_body_with_only_encoded_values():
+    history = MessageHistory([{"role": "user", "content": "Hello"}])
+    body = BaseAPI._body({"messages": history})
+    assert json.loads(body["data"]) == {"messages": list(history)}
+    assert BaseAPI._body({"model": "test-model"}) == {"json": {"model": "test-model"}}
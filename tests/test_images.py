@@ -0,0 +1,133 @@
+import base64
+import io
+import json
+import os
+import pytest
+import responses
+from ollama_python.endpoints.generate import GenerateAPI
+from ollama_python.images import ImageEncoder
+from tests.utils.server import chunk
+from tests.utils.utils import mock_api_response
+
+IMAGE = bytes(range(256)) * 4000 + b"xy"
+ENCODED = base64.b64encode(IMAGE).decode()
+
+
+class UnmappableFile(io.BytesIO):
+    """A file object that only supports read, like a socket or pipe"""
+
+    def fileno(self):
+        raise io.UnsupportedOperation()
+
+
+@pytest.fixture
+def image_path(tmp_path):
+    path = tmp_path / "image.png"
+    path.write_bytes(IMAGE)
+    return path
+
+
+def test_every_kind_of_image_encodes_like_base64(image_path):
+    encoder = ImageEncoder(max_entries=0)
+
+    assert encoder.encode(IMAGE) == ENCODED
+    assert encoder.encode(bytearray(IMAGE)) == ENCODED
+    assert encoder.encode(image_path) == ENCODED
+    with open(image_path, "rb") as file:
+        assert encoder.encode(file) == ENCODED
+    assert encoder.encode(UnmappableFile(IMAGE)) == ENCODED
+    assert encoder.encode(ENCODED) == ENCODED
+    assert encoder.encode(b"") == ""
+    assert encoder.stats().entries == 0
+
+
+def test_file_positioned_after_the_start_is_read_from_there(image_path):
+    with open(image_path, "rb") as file:
+        file.read(3)
+        assert ImageEncoder().encode(file) == base64.b64encode(IMAGE[3:]).decode()
+
+
+def test_repeated_images_are_served_from_the_cache(image_path):
+    encoder = ImageEncoder()
+
+    assert encoder.encode_all([image_path, image_path, IMAGE]) == [ENCODED] * 3
+    assert encoder.encode(UnmappableFile(IMAGE)) == ENCODED
+    stats = encoder.stats()
+    assert (stats.hits, stats.misses, stats.entries) == (3, 1, 1)
+    assert stats.cached_bytes == len(ENCODED)
+
+
+def test_changed_file_is_encoded_again(image_path):
+    encoder = ImageEncoder()
+    encoder.encode(image_path)
+    image_path.write_bytes(b"new")
+    os.utime(image_path, ns=(0, 0))
+
+    assert encoder.encode(image_path) == base64.b64encode(b"new").decode()
+
+
+def test_evicted_path_is_encoded_again(image_path):
+    encoder = ImageEncoder(max_entries=1)
+    encoder.encode(image_path)
+    encoder.encode(b"other")
+
+    assert encoder.encode(image_path) == ENCODED
+    assert encoder.stats().evictions == 2
+
+
+def test_remembered_paths_are_bounded(tmp_path):
+    encoder = ImageEncoder(max_entries=1)
+    for index in range(5):
+        path = tmp_path / f"{index}.png"
+        path.write_bytes(bytes([index]))
+        encoder.encode(path)
+
+    assert len(encoder._files) == 4
+
+
+def test_cache_size_is_bounded():
+    encoder = ImageEncoder(max_entries=8, max_bytes=12)
+    encoder.encode_all([b"first", b"second", b"too large to cache at all"])
+
+    stats = encoder.stats()
+    assert (stats.entries, stats.cached_bytes, stats.evictions) == (1, 8, 1)
+    encoder.encode(b"second")
+    encoder._store(*next(iter(encoder._cache.items())))
+    assert encoder.stats().cached_bytes == 8
+    encoder.clear()
+    assert encoder.stats().entries == 0
+
+
+def test_unsupported_image():
+    with pytest.raises(TypeError):
+        ImageEncoder().encode(42)
+
+
+@responses.activate
+def test_generate_sends_encoded_images(image_path):
+    response = {**chunk("A", done=True), "context": [1]}
+    response.update(total_duration=1, load_duration=1, prompt_eval_duration=1)
+    response.update(eval_count=1, eval_duration=1)
+    mock_api_response("/generate", response)
+    api = GenerateAPI(model="llava", base_url="http://test-servers/api")
+    api.generate(prompt="What is in this image?", images=[image_path, IMAGE])
+
+    body = json.loads(responses.calls[0].request.body)
+    assert body["images"] == [ENCODED, ENCODED]
+    assert api.image_encoder.stats().hits == 1
+
+
+@responses.activate
+def test_chat_sends_encoded_images(image_path):
+    message = {"model": "llava", "created_at": "now", "done": False}
+    mock_api_response("/chat", [message], stream=True)
+    api = GenerateAPI(model="llava", base_url="http://test-servers/api")
+    messages = [
+        {"role": "user", "content": "Describe it", "images": [image_path]},
+        {"role": "assistant", "content": "A picture"},
+    ]
+    list(api.generate_chat_completion(messages=messages, stream=True))
+
+    body = json.loads(responses.calls[0].request.body)
+    assert body["messages"][0]["images"] == [ENCODED]
+    assert messages[0]["images"] == [image_path]
@@ -0,0 +1,68 @@
+import importlib
+import pkgutil
+import subprocess
+import sys
+import pydantic
+import pytest
+import ollama_python.endpoints as endpoints
+import ollama_python.models as models
+
+# Generous next to the ~15ms it takes today, importing requests and pydantic eagerly took ~200ms
+IMPORT_BUDGET_MS = 100
+HEAVY_MODULES = ["requests", "urllib3", "pydantic"]
+ENTRY_POINT = (
+    "from ollama_python.endpoints import GenerateAPI, EmbeddingAPI, ModelManagementAPI; "
+    "import ollama_python.models; "
+    "GenerateAPI(model='test-model'); EmbeddingAPI(model='test-model')"
+)
+
+
+def run_python(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def test_heavy_dependencies_are_imported_on_first_use():
+    check = f"; import sys; print([m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+
+    assert run_python(ENTRY_POINT + check).stdout.strip() == "[]"
+
+
+def test_import_time_budget():
+    timings = run_python(ENTRY_POINT, "-X", "importtime").stderr.splitlines()
+    # Every line reads "import time: <self us> | <cumulative us> | <module>"
+    own = [line.split("|") for line in timings if "ollama_python" in line]
+    total_ms = sum(int(fields[0].split(":")[1]) for fields in own) / 1000
+
+    assert own
+    assert total_ms < IMPORT_BUDGET_MS
+
+
+def test_lazy_exports():
+    assert models.Options.__name__ == "Options"
+    assert endpoints.GenerateAPI.__name__ == "GenerateAPI"
+    assert "Timeouts" in dir(models)
+    assert "EmbeddingAPI" in dir(endpoints)
+    with pytest.raises(AttributeError):
+        models.Missing
+    with pytest.raises(AttributeError):
+        endpoints.Missing
+
+
+def test_every_model_is_exported():
+    defined = set()
+    for module in pkgutil.iter_modules(models.__path__):
+        module = importlib.import_module(f"ollama_python.models.{module.name}")
+        defined |= {
+            name
+            for name, value in vars(module).items()
+            if isinstance(value, type)
+            and issubclass(value, pydantic.BaseModel)
+            and value.__module__ == module.__name__
+        }
+
+    assert defined == set(models.__all__)
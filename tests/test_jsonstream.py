@@ -0,0 +1,149 @@
+import json
+import pytest
+import responses
+from ollama_python.endpoints.generate import GenerateAPI
+from ollama_python.jsonstream import IncrementalJSONParser, parse_json_stream
+from tests.utils.server import StandInServer, chunk
+from tests.utils.utils import mock_api_response
+
+DOCUMENT = {
+    "name": 'Ada "the" {first}',
+    "tags": ["a", "b"],
+    "scores": [1, -2.5e3, True, None],
+    "nested": {"deep": [{"x": 1}]},
+}
+
+
+def fragments(text: str, size: int) -> list[str]:
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 1000])
+def test_parser_matches_json_loads_for_any_fragmentation(size):
+    parser = IncrementalJSONParser()
+    events = []
+    for fragment in fragments(json.dumps(DOCUMENT), size):
+        events.extend(parser.feed(fragment))
+    events.extend(parser.close())
+
+    assert events[-1].path == ()
+    assert events[-1].value == DOCUMENT
+    assert parser.complete
+    paths = [event.path for event in events]
+    assert ("tags", 1) in paths
+    assert ("nested", "deep", 0, "x") in paths
+    assert paths.index(("tags",)) < paths.index(("scores", 0))
+
+
+def test_values_are_reported_as_soon_as_they_are_complete():
+    parser = IncrementalJSONParser(max_depth=2)
+
+    assert parser.feed('{"items": [{"id": 1}') == [
+        ((("items", 0)), {"id": 1}, {"items": [{"id": 1}]})
+    ]
+    assert parser.feed(", 2") == []
+    events = parser.feed("]")
+    assert [event.path for event in events] == [("items", 1), ("items",)]
+    assert not parser.complete
+
+
+def test_top_level_scalars():
+    parser = IncrementalJSONParser()
+
+    assert parser.feed("12") == []
+    assert parser.close()[0].value == 12
+    assert parser.feed('"text"')[0].value == "text"
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        '{"a": 1]',
+        "]",
+        "{1: 2}",
+        '{"a": {{}}}',
+        "[tru]",
+        "[1 2]",
+        '{"a" 1}',
+        '{"a": 1 "b": 2}',
+        "[1, ]",
+        '{"a": 1, }',
+        '{"a": }',
+        '{"a": 1:}',
+        "[1: 2]",
+        "[, 1]",
+        "[[] {}]",
+        "1, 2",
+        "1 2",
+        '{"a": 1}{"b": 2}',
+        '{"a": 1} [',
+        '"a" "b"',
+        "[] 1",
+    ],
+)
+def test_invalid_json(text):
+    with pytest.raises(ValueError):
+        IncrementalJSONParser().feed(text)
+
+
+def test_only_whitespace_may_follow_the_document():
+    parser = IncrementalJSONParser()
+    parser.feed('{"a": 1}')
+    assert parser.feed(" \n") == []
+    with pytest.raises(ValueError):
+        parser.feed("x")
+    assert parser.close() == []
+
+
+def test_incomplete_json():
+    parser = IncrementalJSONParser()
+    parser.feed('{"a": [1')
+    with pytest.raises(ValueError):
+        parser.close()
+
+
+def test_stream_is_closed_when_the_document_is_complete():
+    text = json.dumps({"answer": 42, "reason": "because"}) + "\n\n\n"
+    chunks = [chunk(fragment) for fragment in fragments(text, 4)]
+    chunks += [chunk("\n") for _ in range(100)] + [chunk("", done=True)]
+    with StandInServer(chunks=chunks, chunk_delay=0.01) as server:
+        api = GenerateAPI(model="test-model", base_url=server.base_url)
+        events = list(
+            parse_json_stream(
+                api.generate(prompt="test", format="json", stream=True), max_depth=1
+            )
+        )
+
+        assert [event.path for event in events] == [("answer",), ("reason",), ()]
+        assert events[0].document is events[-1].value
+        assert server.disconnected.wait(2)
+
+
+@responses.activate
+@pytest.mark.parametrize("trailing", [" \n", " 3"])
+def test_chat_stream_read_to_the_end(trailing):
+    message = {"model": "test-model", "created_at": "now", "done": False}
+    contents = ["[1,", " 2]", trailing]
+    mock_api_response(
+        "/chat",
+        [
+            {**message, "message": [{"role": "assistant", "content": content}]}
+            for content in contents
+        ],
+        stream=True,
+    )
+    api = GenerateAPI(model="test-model", base_url="http://test-servers/api")
+    events = parse_json_stream(
+        api.generate_chat_completion(
+            messages=[{"role": "user", "content": "Hello"}], format="json", stream=True
+        ),
+        max_depth=0,
+        stop_at_end=False,
+    )
+
+    assert next(events).value == [1, 2]
+    if trailing.strip():
+        with pytest.raises(ValueError):
+            next(events)
+    else:
+        assert list(events) == []
@@ -0,0 +1,299 @@
+import threading
+import time
+import pytest
+import requests
+import responses
+from ollama_python.endpoints.generate import GenerateAPI
+from ollama_python.limiter import AdaptiveLimiter, LimitExceeded, is_overload
+from ollama_python.transport import CancelHandle
+from tests.utils.server import StandInServer, chunk
+from tests.utils.utils import mock_api_response
+
+HOST = "http://test-servers/api"
+
+
+class Timed:
+    """A final chunk with server timings in seconds"""
+
+    def __init__(self, per_token: float, queued: float = 0.0, tokens: int = 100):
+        self.done = True
+        self.eval_count = tokens
+        self.eval_duration = int(per_token * tokens * 1e9)
+        self.load_duration = 0
+        self.prompt_eval_duration = 0
+        self.total_duration = self.eval_duration + int(queued * 1e9)
+
+
+def sample(limiter: AdaptiveLimiter, completion=None, host: str = HOST) -> None:
+    permit = limiter.acquire(host, model="test-model")
+    permit.observe(completion)
+    limiter.release(permit)
+
+
+def burst(limiter: AdaptiveLimiter, completion) -> None:
+    """Fill the limit of the host, then release every request"""
+    permits = [
+        limiter.acquire(HOST, model="test-model") for _ in range(limiter.limit(HOST))
+    ]
+    for permit in permits:
+        permit.observe(completion)
+        limiter.release(permit)
+
+
+def test_requests_over_the_limit_wait_in_order():
+    limiter = AdaptiveLimiter(initial_limit=1)
+    first = limiter.acquire(HOST)
+    order = []
+
+    def request(name: str):
+        with limiter.slot(HOST):
+            order.append(name)
+
+    threads = []
+    for name in ["a", "b", "c"]:
+        thread = threading.Thread(target=request, args=(name,))
+        thread.start()
+        threads.append(thread)
+        while limiter.stats().hosts[0].queued < len(threads):
+            time.sleep(0.001)
+    limiter.release(first)
+    for thread in threads:
+        thread.join()
+
+    assert order == ["a", "b", "c"]
+    stats = limiter.stats().hosts[0]
+    assert (stats.admitted, stats.in_flight, stats.queued) == (4, 0, 0)
+
+
+def test_full_queues_reject_at_once():
+    limiter = AdaptiveLimiter(initial_limit=1, max_queue=0)
+    limiter.acquire(HOST)
+    with pytest.raises(LimitExceeded):
+        limiter.acquire(HOST)
+    assert limiter.stats().hosts[0].rejected == 1
+
+
+def test_waiting_times_out():
+    limiter = AdaptiveLimiter(initial_limit=1)
+    limiter.acquire(HOST)
+    with pytest.raises(TimeoutError):
+        limiter.acquire(HOST, timeout=0.01)
+    stats = limiter.stats().hosts[0]
+    assert (stats.timeouts, stats.queued) == (1, 0)
+
+
+def test_aimd_grows_while_the_host_keeps_up():
+    limiter = AdaptiveLimiter(algorithm="aimd", initial_limit=2, max_limit=3)
+    for _ in range(4):
+        burst(limiter, Timed(0.02))
+    assert limiter.limit(HOST) == 3
+    for _ in range(10):
+        burst(limiter, Timed(0.02))
+    assert limiter.limit(HOST) == 3
+
+
+def test_aimd_backs_off_when_the_server_queues_requests():
+    limiter = AdaptiveLimiter(algorithm="aimd", initial_limit=10)
+    sample(limiter, Timed(0.02, queued=1.0))
+    assert limiter.limit(HOST) == 9
+
+
+def test_aimd_backs_off_when_generation_slows_down():
+    limiter = AdaptiveLimiter(algorithm="aimd", initial_limit=10, max_limit=10)
+    for _ in range(20):
+        sample(limiter, Timed(0.02))
+    for _ in range(5):
+        sample(limiter, Timed(0.2))
+    assert limiter.limit(HOST) < 10
+
+
+def test_aimd_holds_an_unused_limit():
+    limiter = AdaptiveLimiter(algorithm="aimd", initial_limit=4)
+    sample(limiter)
+    assert limiter.stats().hosts[0].limit == 4
+
+
+def test_overload_backs_off_down_to_the_minimum():
+    limiter = AdaptiveLimiter(initial_limit=2, min_limit=1)
+    for _ in range(10):
+        permit = limiter.acquire(HOST)
+        limiter.release(permit, overloaded=True)
+    stats = limiter.stats().hosts[0]
+    assert (stats.limit, stats.overloads) == (1, 10)
+
+
+def test_gradient_grows_then_shrinks_with_latency():
+    limiter = AdaptiveLimiter(initial_limit=1, max_limit=8)
+    for _ in range(30):
+        burst(limiter, Timed(0.02))
+    assert limiter.limit(HOST) == 8
+
+    for _ in range(10):
+        burst(limiter, Timed(0.2))
+    assert limiter.limit(HOST) < 8
+
+
+def test_gradient_holds_an_unused_limit():
+    limiter = AdaptiveLimiter(initial_limit=8, max_limit=64)
+    for _ in range(10):
+        sample(limiter, Timed(0.02))
+    assert limiter.limit(HOST) == 8
+
+
+@pytest.mark.parametrize("algorithm", ["gradient", "aimd"])
+def test_zero_latency_samples_are_ignored(monkeypatch, algorithm):
+    # A coarse clock measures no time between acquire and release
+    monkeypatch.setattr(time, "monotonic", lambda: 100.0)
+    limiter = AdaptiveLimiter(algorithm=algorithm, initial_limit=1)
+    first = limiter.acquire(HOST)
+    waiter = threading.Thread(target=lambda: limiter.release(limiter.acquire(HOST)))
+    waiter.start()
+    while limiter.stats().hosts[0].queued == 0:
+        pass
+    limiter.release(first)
+    waiter.join(5)
+
+    assert not waiter.is_alive()
+    assert limiter.stats().hosts[0].samples == 0
+    assert limiter.limit(HOST) == 1
+
+
+def test_signals_are_kept_per_model():
+    limiter = AdaptiveLimiter(algorithm="aimd", initial_limit=2, max_limit=2)
+    for _ in range(10):
+        sample(limiter, Timed(0.01))
+    # A slower model is not a sign of congestion
+    permit = limiter.acquire(HOST, model="large-model")
+    permit.observe(Timed(0.5))
+    limiter.release(permit)
+    assert limiter.limit(HOST) == 2
+
+
+def test_invalid_configuration():
+    with pytest.raises(ValueError):
+        AdaptiveLimiter(algorithm="vegas")
+    with pytest.raises(ValueError):
+        AdaptiveLimiter(initial_limit=0)
+    with pytest.raises(ValueError):
+        AdaptiveLimiter(initial_limit=10, max_limit=5)
+
+
+def test_is_overload():
+    def http_error(status: int) -> requests.HTTPError:
+        response = requests.Response()
+        response.status_code = status
+        return requests.HTTPError(response=response)
+
+    assert is_overload(http_error(503))
+    assert not is_overload(http_error(404))
+    assert not is_overload(requests.HTTPError())
+    assert is_overload(requests.exceptions.ReadTimeout())
+    assert is_overload(requests.exceptions.ConnectionError())
+    assert not is_overload(ValueError())
+
+
+@responses.activate
+def test_endpoints_sample_completions():
+    limiter = AdaptiveLimiter()
+    api = GenerateAPI(model="test-model", base_url=HOST, limiter=limiter)
+    mock_api_response(
+        "/generate",
+        {
+            "model": "test-model",
+            "created_at": "now",
+            "response": "A",
+            "done": True,
+            "context": [1],
+            "total_duration": 2000,
+            "load_duration": 0,
+            "prompt_eval_duration": 500,
+            "eval_count": 10,
+            "eval_duration": 1000,
+        },
+    )
+    api.generate(prompt="test")
+    mock_api_response("/generate", {"error": "overloaded"}, status=503)
+    with pytest.raises(requests.HTTPError):
+        api.generate(prompt="test")
+    mock_api_response("/generate", {"error": "model not found"}, status=404)
+    with pytest.raises(requests.HTTPError):
+        api.generate(prompt="test")
+
+    stats = limiter.stats().hosts[0]
+    assert (stats.samples, stats.overloads, stats.in_flight) == (1, 1, 0)
+    assert ((HOST, "test-model", "token")) in limiter._signals
+
+
+def test_streams_hold_a_slot_until_exhausted():
+    limiter = AdaptiveLimiter(initial_limit=1, max_queue=0)
+    with StandInServer(chunks=[chunk("A"), chunk("B", done=True)]) as server:
+        api = GenerateAPI(model="test-model", base_url=server.base_url, limiter=limiter)
+        stream = api.generate(prompt="test", stream=True)
+        next(stream)
+        with pytest.raises(LimitExceeded):
+            next(api.generate(prompt="test", stream=True, passthrough="ndjson"))
+        list(stream)
+        assert b"".join(api.generate(prompt="test", stream=True, passthrough="sse"))
+
+    stats = limiter.stats().hosts[0]
+    assert (stats.in_flight, stats.rejected, stats.samples) == (0, 1, 2)
+
+
+def test_cancelled_streams_do_not_count_as_overload():
+    limiter = AdaptiveLimiter()
+    chunks = [chunk("A"), chunk("B", done=True)]
+    with StandInServer(chunks=chunks, chunk_delay=5) as server:
+        api = GenerateAPI(model="test-model", base_url=server.base_url, limiter=limiter)
+        cancel = CancelHandle()
+        stream = api.generate(prompt="test", stream=True, cancel=cancel)
+        next(stream)
+        threading.Timer(0.05, cancel.cancel).start()
+        with pytest.raises(requests.RequestException):
+            list(stream)
+
+    stats = limiter.stats().hosts[0]
+    assert (stats.in_flight, stats.overloads) == (0, 0)
+
+
+def test_streams_cut_short_are_not_sampled():
+    limiter = AdaptiveLimiter(initial_limit=4)
+    chunks = [chunk("A"), chunk("B"), chunk("C", done=True)]
+    with StandInServer(chunks=chunks, chunk_delay=0.05) as server:
+        api = GenerateAPI(model="test-model", base_url=server.base_url, limiter=limiter)
+        cancel = CancelHandle()
+        stream = api.generate(prompt="test", stream=True, cancel=cancel)
+        next(stream)
+        cancel.cancel()
+        with pytest.raises(requests.RequestException):
+            list(stream)
+        stream = api.generate(prompt="test", stream=True)
+        next(stream)
+        stream.close()
+
+    stats = limiter.stats().hosts[0]
+    assert (stats.in_flight, stats.samples, stats.overloads) == (0, 0, 0)
+    assert stats.limit == 4
+    assert not limiter._signals
+
+
+def test_aimd_backs_off_once_per_round():
+    limiter = AdaptiveLimiter(algorithm="aimd", initial_limit=10)
+    burst(limiter, Timed(0.02, queued=1.0))
+    assert limiter.limit(HOST) == 9
+
+
+def test_slot_errors_count_as_overload():
+    limiter = AdaptiveLimiter(initial_limit=4)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        with limiter.slot(HOST):
+            raise requests.exceptions.ConnectionError()
+    with pytest.raises(ValueError):
+        with limiter.slot(HOST):
+            raise ValueError()
+    stats = limiter.stats().hosts[0]
+    assert (stats.overloads, stats.in_flight, stats.limit, stats.samples) == (
+        1,
+        0,
+        3,
+        0,
+    )
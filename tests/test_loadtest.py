@@ -0,0 +1,121 @@
+import json
+import random
+import pytest
+import requests
+from ollama_python.fakeserver import FakeServer
+from ollama_python.loadtest import (
+    Arrival,
+    LoadTest,
+    _Mix,
+    format_report,
+    main,
+    poisson_arrivals,
+    trace_arrivals,
+)
+from tests.utils.server import StandInServer, chunk
+
+
+def mix(stream_ratio: float = 0.5, embedding_ratio: float = 0.0) -> _Mix:
+    return _Mix([4, 8], stream_ratio, embedding_ratio, random.Random(1))
+
+
+def test_poisson_arrivals():
+    arrivals = poisson_arrivals(100, 10, mix(embedding_ratio=0.2))
+    assert 900 < len(arrivals) < 1100
+    assert all(0 < arrival.at < 10 for arrival in arrivals)
+    assert {arrival.kind for arrival in arrivals} == {"generate", "stream", "embedding"}
+    assert {len(arrival.prompt.split()) for arrival in arrivals} == {4, 8}
+    with pytest.raises(ValueError):
+        poisson_arrivals(0, 10, mix())
+
+
+def test_trace_arrivals():
+    lines = [
+        '{"at": 1.5, "kind": "embedding", "prompt": "hello"}',
+        "",
+        '{"at": 0.5, "prompt_words": 20}',
+    ]
+    arrivals = trace_arrivals(lines, mix())
+    assert [arrival.at for arrival in arrivals] == [0.5, 1.5]
+    assert len(arrivals[0].prompt.split()) == 20
+    assert (arrivals[1].kind, arrivals[1].prompt) == ("embedding", "hello")
+    with pytest.raises(ValueError):
+        trace_arrivals(['{"at": 0, "kind": "chat"}'], mix())
+
+
+def test_run_against_the_fake_server():
+    arrivals = [
+        Arrival(0.01 * index, kind, "a prompt")
+        for index, kind in enumerate(["generate", "stream", "embedding"] * 3)
+    ]
+    with FakeServer(tokens=4, token_delay=0.001) as server:
+        report = LoadTest(server.base_url, "test-model", num_predict=3).run(arrivals)
+
+    assert report.scheduled == report.completed == 9
+    assert report.dropped == 0 and report.errors == {}
+    assert report.output_tokens_per_second > 0
+    kinds = {kind.kind: kind for kind in report.kinds}
+    assert set(kinds) == {"generate", "stream", "embedding"}
+    assert kinds["stream"].time_to_first_token_seconds.count == 3
+    assert kinds["generate"].tokens_per_second.p50 == pytest.approx(1000, rel=0.01)
+    assert kinds["embedding"].latency_seconds.count == 3
+    assert "stream" in format_report(report)
+
+
+def test_errors_are_reported_per_type():
+    arrivals = [Arrival(0, "generate", "a prompt") for _ in range(4)]
+    with FakeServer(error_rate=1.0) as server:
+        report = LoadTest(server.base_url, "test-model").run(arrivals)
+    assert report.errors == {"HTTPError": 4}
+    assert report.kinds[0].error_rate == 1.0
+    assert report.kinds[0].latency_seconds.count == 0
+    assert "error HTTPError: 4" in format_report(report)
+
+
+def test_requests_over_the_in_flight_limit_are_dropped():
+    arrivals = [Arrival(0, "generate", "a prompt") for _ in range(3)]
+    with FakeServer(tokens=20, token_delay=0.01) as server:
+        report = LoadTest(server.base_url, "test-model", max_in_flight=1).run(arrivals)
+    assert (report.completed, report.dropped) == (1, 2)
+
+
+def test_streams_without_timings_count_chunks():
+    with StandInServer(chunks=[chunk("a"), chunk("b"), chunk("", done=True)]) as server:
+        report = LoadTest(server.base_url, "test-model").run(
+            [Arrival(0, "stream", "a prompt")]
+        )
+    assert report.output_tokens_per_second > 0
+    assert report.kinds[0].tokens_per_second.count == 1
+
+    with StandInServer(chunks=[]) as server:
+        report = LoadTest(server.base_url, "test-model").run(
+            [Arrival(0, "stream", "a prompt")]
+        )
+    assert report.kinds[0].tokens_per_second.count == 0
+    assert report.offered_rate == 0
+
+
+def test_fake_server_rejects_unknown_endpoints():
+    with FakeServer() as server:
+        response = requests.post(f"{server.base_url}/show", json={"prompt": "a"})
+    assert response.status_code == 404
+
+
+def test_main_with_the_fake_server(capsys):
+    main(["--fake", "--rate", "50", "--duration", "0.2", "--seed", "1"])
+    assert "achieved" in capsys.readouterr().out
+
+    main(
+        ["--fake", "--rate", "50", "--duration", "0.2", "--json", "--fake-tokens", "2"]
+    )
+    assert json.loads(capsys.readouterr().out)["scheduled"] >= 0
+
+
+def test_main_with_a_trace(tmp_path, capsys):
+    trace = tmp_path / "trace.jsonl"
+    trace.write_text('{"at": 0, "kind": "embedding"}\n{"at": 0.05, "kind": "stream"}\n')
+    with FakeServer(token_delay=0.001) as server:
+        main(["--base-url", server.base_url, "--trace", str(trace), "--json"])
+    report = json.loads(capsys.readouterr().out)
+    assert report["completed"] == 2
+    assert report["offered_rate"] == pytest.approx(40)
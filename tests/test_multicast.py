@@ -0,0 +1,203 @@
+import threading
+import time
+import pytest
+from ollama_python.endpoints.generate import GenerateAPI
+from ollama_python.multicast import StreamMulticast, SubscriberDetached
+from tests.utils.server import StandInServer, chunk
+
+
+def gated(items: list, gate: threading.Semaphore, closed: list):
+    """A source that yields one item every time the gate is released"""
+    try:
+        for item in items:
+            gate.acquire()
+            yield item
+    finally:
+        closed.append(True)
+
+
+def wait_for(condition, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def test_every_subscriber_receives_every_item():
+    multicast = StreamMulticast(iter(range(100)), buffer_size=200)
+    first, second = multicast.subscribe(), multicast.subscribe()
+    results = []
+    reader = threading.Thread(target=lambda: results.append(list(second)))
+    reader.start()
+
+    assert list(first) == list(range(100))
+    reader.join()
+    assert results == [list(range(100))]
+    assert multicast.stats().published == 100
+
+
+def test_late_joiners_replay_from_the_start():
+    gate, closed = threading.Semaphore(0), []
+    multicast = StreamMulticast(gated(["a", "b", "c"], gate, closed))
+    early = multicast.subscribe()
+    gate.release(2)
+    assert [next(early), next(early)] == ["a", "b"]
+
+    late = multicast.subscribe()
+    gate.release()
+    assert list(late) == ["a", "b", "c"]
+    assert list(early) == ["c"]
+    assert list(multicast.subscribe()) == ["a", "b", "c"]
+    assert closed == [True]
+
+
+def test_without_replay_late_joiners_start_live():
+    gate, closed = threading.Semaphore(0), []
+    multicast = StreamMulticast(gated(["a", "b"], gate, closed), replay=False)
+    early = multicast.subscribe()
+    gate.release()
+    assert next(early) == "a"
+
+    late = multicast.subscribe()
+    gate.release()
+    assert list(late) == ["b"]
+
+
+def test_drop_policy_keeps_the_newest_items():
+    multicast = StreamMulticast(iter(range(10)), buffer_size=3, policy="drop")
+    slow = multicast.subscribe()
+    multicast.join(2)
+
+    assert list(slow) == [7, 8, 9]
+    assert slow.dropped == 7
+    assert multicast.stats().dropped == 7
+
+
+def test_detach_policy_never_holds_the_upstream_back():
+    multicast = StreamMulticast(iter(range(10)), buffer_size=3, replay=False)
+    slow = multicast.subscribe(policy="detach")
+    multicast.join(2)
+
+    assert multicast.stats().done
+    assert [next(slow) for _ in range(3)] == [0, 1, 2]
+    with pytest.raises(SubscriberDetached):
+        next(slow)
+    assert slow.detached
+
+
+def test_block_policy_applies_backpressure_until_the_timeout():
+    gate, closed = threading.Semaphore(100), []
+    multicast = StreamMulticast(
+        gated(list(range(10)), gate, closed),
+        buffer_size=2,
+        policy="block",
+        block_timeout=0.2,
+    )
+    blocking, dropping = multicast.subscribe(), multicast.subscribe(policy="drop")
+    assert wait_for(lambda: multicast.stats().published == 3)
+    assert next(blocking) == 0
+    assert wait_for(lambda: multicast.stats().published == 4)
+
+    multicast.join(2)
+    assert multicast.stats().detached == 1
+    assert list(dropping) == [8, 9]
+    with pytest.raises(SubscriberDetached):
+        list(blocking)
+
+
+def test_block_policy_releases_when_a_blocking_subscriber_leaves():
+    multicast = StreamMulticast(
+        iter(range(10)), buffer_size=1, policy="block", block_timeout=None
+    )
+    blocking, other = multicast.subscribe(), multicast.subscribe(policy="drop")
+    assert wait_for(lambda: multicast.stats().published == 2)
+    blocking.close()
+    multicast.join(2)
+
+    assert list(blocking) == []
+    assert list(other) == [9]
+
+
+def test_closing_the_multicast_stops_the_upstream():
+    gate, closed = threading.Semaphore(0), []
+    multicast = StreamMulticast(
+        gated(list(range(10)), gate, closed), buffer_size=1, policy="block"
+    )
+    with multicast:
+        subscriber = multicast.subscribe()
+        gate.release(3)
+        assert wait_for(lambda: multicast.stats().published == 2)
+    gate.release(10)
+    multicast.join(2)
+
+    assert list(subscriber) == [0]
+    assert closed == [True]
+
+
+def test_item_read_after_closing_is_not_published():
+    gate, closed = threading.Semaphore(0), []
+    multicast = StreamMulticast(gated(list(range(10)), gate, closed))
+    subscriber = multicast.subscribe()
+    gate.release()
+    assert next(subscriber) == 0
+    multicast.close()
+    gate.release()
+    multicast.join(2)
+
+    assert list(subscriber) == []
+    assert multicast.stats().published == 1
+    assert closed == [True]
+
+
+def test_closing_before_subscribing_closes_the_source():
+    class Source:
+        closed = False
+
+        def __next__(self):
+            return 1  # pragma: no cover
+
+        def close(self):
+            self.closed = True
+
+    source = Source()
+    multicast = StreamMulticast(source)
+    multicast.close()
+    multicast.join()
+
+    assert source.closed
+    assert list(multicast.subscribe()) == []
+
+
+def test_upstream_errors_reach_every_subscriber():
+    def failing():
+        yield 1
+        raise ValueError("upstream failed")
+
+    multicast = StreamMulticast(failing())
+    with multicast.subscribe() as subscriber:
+        assert next(subscriber) == 1
+        with pytest.raises(ValueError, match="upstream failed"):
+            next(subscriber)
+
+
+def test_invalid_settings():
+    with pytest.raises(ValueError):
+        StreamMulticast(iter([]), buffer_size=0)
+    with pytest.raises(ValueError):
+        StreamMulticast(iter([]), policy="wait")
+    with pytest.raises(ValueError):
+        StreamMulticast(iter([])).subscribe(policy="wait")
+
+
+def test_one_generation_multicast_to_many_viewers():
+    chunks = [chunk(str(i)) for i in range(20)] + [chunk("", done=True)]
+    with StandInServer(chunks=chunks) as server:
+        api = GenerateAPI(model="test-model", base_url=server.base_url)
+        multicast = StreamMulticast(api.generate(prompt="test", stream=True))
+        viewers = [multicast.subscribe() for _ in range(3)]
+        texts = ["".join(item.response for item in viewer) for viewer in viewers]
+
+    assert texts == ["".join(str(i) for i in range(20))] * 3
+    assert len(server.requests) == 1
@@ -0,0 +1,216 @@
+import asyncio
+import json
+import time
+import pytest
+import responses
+from ollama_python.endpoints.generate import GenerateAPI
+from ollama_python.endpoints.model_management import ModelManagementAPI
+from ollama_python.relay import ASGIStreamResponse, WSGIStreamResponse
+from ollama_python.transport import CancelHandle
+from tests.utils.server import StandInServer, chunk
+from tests.utils.utils import mock_api_response
+
+CHUNKS = [chunk("Hello"), chunk(" World"), chunk("", done=True)]
+NDJSON = b"".join(json.dumps(item).encode() + b"\n" for item in CHUNKS)
+
+
+def run_asgi(app, disconnect_after=None) -> list[dict]:
+    messages = []
+    requests = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive() -> dict:
+        if requests:
+            return requests.pop()
+        if disconnect_after is None:
+            await asyncio.Event().wait()
+        while len(messages) < disconnect_after:
+            await asyncio.sleep(0.01)
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        messages.append(message)
+
+    asyncio.run(app({"type": "http"}, receive, send))
+    return messages
+
+
+def cancel_asgi(app, after: int) -> list[dict]:
+    """Cancel the task running the app once it has sent a number of messages"""
+    messages = []
+
+    async def receive() -> dict:
+        await asyncio.Event().wait()
+
+    async def send(message: dict) -> None:
+        messages.append(message)
+
+    async def main() -> None:
+        task = asyncio.ensure_future(app({"type": "http"}, receive, send))
+        while len(messages) < after:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    return messages
+
+
+def test_ndjson_passthrough_yields_the_upstream_bytes():
+    with StandInServer(chunks=CHUNKS) as server:
+        api = GenerateAPI(model="test-model", base_url=server.base_url)
+        data = list(api.generate(prompt="test", stream=True, passthrough="ndjson"))
+
+    assert all(isinstance(item, bytes) for item in data)
+    assert len(data) == len(CHUNKS)
+    assert b"".join(data) == NDJSON
+
+
+def test_sse_passthrough_frames_every_line():
+    with StandInServer(chunks=CHUNKS) as server:
+        api = GenerateAPI(model="test-model", base_url=server.base_url)
+        events = list(
+            api.generate_chat_completion(
+                messages=[{"role": "user", "content": "Hello"}],
+                stream=True,
+                passthrough="sse",
+            )
+        )
+
+    assert events == [
+        b"data: " + json.dumps(item).encode() + b"\n\n" for item in CHUNKS
+    ]
+
+
+@responses.activate
+def test_pull_passthrough():
+    progress = [{"status": "pulling manifest"}, {"status": "success"}]
+    mock_api_response("/pull", progress, stream=True)
+    api = ModelManagementAPI(base_url="http://test-servers/api")
+    data = b"".join(api.pull(name="mistral", stream=True, passthrough="ndjson"))
+
+    assert [json.loads(line) for line in data.splitlines()] == progress
+
+
+def test_passthrough_validation():
+    api = GenerateAPI(model="test-model", base_url="http://test-servers/api")
+    with pytest.raises(ValueError):
+        api.generate(prompt="test", passthrough="ndjson")
+    with pytest.raises(ValueError):
+        api.generate(prompt="test", stream=True, passthrough="xml")
+    with pytest.raises(ValueError):
+        api.generate(
+            prompt="test", stream=True, passthrough="sse", stop_when=[lambda text: True]
+        )
+    with pytest.raises(ValueError):
+        api.generate_chat_completion(
+            messages=[{"role": "user", "content": "Hello"}],
+            stream=True,
+            passthrough="sse",
+            stop_when=[lambda text: True],
+        )
+
+
+def test_asgi_response_relays_every_chunk():
+    with StandInServer(chunks=CHUNKS) as server:
+        api = GenerateAPI(model="test-model", base_url=server.base_url)
+        app = ASGIStreamResponse(
+            api.generate(prompt="test", stream=True, passthrough="sse"),
+            passthrough="sse",
+        )
+        messages = run_asgi(app)
+
+    start, *bodies, end = messages
+    assert start["status"] == 200
+    assert (b"content-type", b"text/event-stream") in start["headers"]
+    assert [body["body"] for body in bodies] == [
+        b"data: " + json.dumps(item).encode() + b"\n\n" for item in CHUNKS
+    ]
+    assert end == {"type": "http.response.body", "body": b"", "more_body": False}
+
+
+def test_asgi_disconnect_cancels_the_upstream_call():
+    slow = [chunk(str(i)) for i in range(100)] + [chunk("", done=True)]
+    with StandInServer(chunks=slow, chunk_delay=0.05) as server:
+        api = GenerateAPI(model="test-model", base_url=server.base_url)
+        handle = CancelHandle()
+        app = ASGIStreamResponse(
+            api.generate(
+                prompt="test", stream=True, passthrough="ndjson", cancel=handle
+            ),
+            cancel=handle,
+        )
+        messages = run_asgi(app, disconnect_after=3)
+
+        assert server.disconnected.wait(2)
+    assert handle.cancelled
+    assert len(messages) < 10
+    assert messages[-1]["more_body"]
+
+
+def test_asgi_disconnect_without_cancel_handle_closes_the_stream():
+    closed = []
+
+    def stream():
+        try:
+            while True:
+                yield b"{}\n"
+        finally:
+            closed.append(True)
+
+    messages = run_asgi(ASGIStreamResponse(stream()), disconnect_after=2)
+
+    assert closed == [True]
+    assert all(message.get("more_body", True) for message in messages)
+
+
+def test_asgi_cancellation_during_a_read_cancels_the_upstream_call():
+    slow = [chunk(str(i)) for i in range(100)] + [chunk("", done=True)]
+    with StandInServer(chunks=slow, chunk_delay=0.5) as server:
+        api = GenerateAPI(model="test-model", base_url=server.base_url)
+        handle = CancelHandle()
+        app = ASGIStreamResponse(
+            api.generate(
+                prompt="test", stream=True, passthrough="ndjson", cancel=handle
+            ),
+            cancel=handle,
+        )
+        messages = cancel_asgi(app, after=2)
+
+        assert server.disconnected.wait(2)
+    assert handle.cancelled
+    assert len(messages) == 2
+
+
+def test_asgi_cancellation_during_a_read_closes_the_stream_after_it():
+    closed = []
+
+    def stream():
+        try:
+            while True:
+                yield b"{}\n"
+                time.sleep(0.1)
+        finally:
+            closed.append(True)
+
+    cancel_asgi(ASGIStreamResponse(stream()), after=2)
+
+    assert closed == [True]
+
+
+def test_asgi_upstream_error_fails_before_the_headers():
+    def failing():
+        raise ConnectionError("upstream unavailable")
+        yield  # pragma: no cover
+
+    with pytest.raises(ConnectionError):
+        run_asgi(ASGIStreamResponse(failing()))
+
+
+def test_wsgi_response():
+    statuses = []
+    app = WSGIStreamResponse(iter([b"a\n", b"b\n"]), passthrough="ndjson")
+    body = app({}, lambda status, headers: statuses.append((status, headers)))
+
+    assert list(body) == [b"a\n", b"b\n"]
+    assert statuses == [("200 OK", [("content-type", "application/x-ndjson")])]
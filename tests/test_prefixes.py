@@ -0,0 +1,195 @@
+import json
+import threading
+import pytest
+import responses
+from ollama_python.analytics import PerformanceTracker
+from ollama_python.endpoints.embedding import EmbeddingAPI
+from ollama_python.endpoints.generate import GenerateAPI
+from ollama_python.models.model_management import ModelTagList
+from ollama_python.prefixes import PrefixRegistry
+from ollama_python.semantic_cache import SemanticCache
+from tests.utils.utils import mock_api_response
+
+BASE_URL = "http://test-servers/api"
+PREAMBLE = "You are a support agent for ACME. " * 50
+
+
+def completion(context: list[int], prompt_eval_count: int = 500) -> dict:
+    return {
+        "model": "test-model",
+        "created_at": "2023-08-04T19:22:45.499127Z",
+        "response": "",
+        "done": True,
+        "context": context,
+        "total_duration": 1,
+        "load_duration": 1,
+        "prompt_eval_count": prompt_eval_count,
+        "prompt_eval_duration": 1,
+        "eval_count": 0,
+        "eval_duration": 1,
+    }
+
+
+def tags(digest: str) -> dict:
+    details = {
+        "format": "gguf",
+        "family": "llama",
+        "parameter_size": "7B",
+        "quantization_level": "Q4_0",
+    }
+    model = {"size": 1, "modified_at": "now", "details": details}
+    return {"models": [{**model, "name": "test-model:latest", "digest": digest}]}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def sent(path: str) -> list[dict]:
+    return [
+        json.loads(call.request.body)
+        for call in responses.calls
+        if call.request.url.endswith(path)
+    ]
+
+
+@pytest.fixture
+def registry() -> PrefixRegistry:
+    registry = PrefixRegistry(clock=FakeClock())
+    registry.register("support", PREAMBLE, system="Be brief")
+    return registry
+
+
+@responses.activate
+def test_prefix_is_evaluated_once_and_its_context_reused(registry):
+    mock_api_response("/tags", tags("sha-1"), request_type=responses.GET)
+    mock_api_response("/generate", completion([1, 2, 3]))
+    api = GenerateAPI(model="test-model", base_url=BASE_URL, prefixes=registry)
+    api.generate(prompt="Where is my order?", prefix="support")
+    api.generate(prompt="Can I get a refund?", prefix="support")
+
+    evaluation, first, second = sent("/generate")
+    assert evaluation["prompt"] == PREAMBLE
+    assert evaluation["system"] == "Be brief"
+    assert evaluation["options"] == {"num_predict": 1}
+    assert first["context"] == second["context"] == [1, 2, 3]
+    assert second["prompt"] == "Can I get a refund?"
+    assert sum(call.request.url.endswith("/tags") for call in responses.calls) == 1
+    stats = registry.stats()
+    assert (stats.evaluations, stats.hits, stats.prompt_tokens_saved) == (1, 1, 500)
+
+
+@responses.activate
+def test_changed_digest_evaluates_the_prefix_again(registry):
+    mock_api_response("/tags", tags("sha-1"), request_type=responses.GET)
+    mock_api_response("/tags", tags("sha-2"), request_type=responses.GET)
+    mock_api_response("/generate", completion([1, 2, 3]))
+    mock_api_response("/generate", completion([4, 5, 6]))
+    api = GenerateAPI(model="test-model", base_url=BASE_URL, prefixes=registry)
+    api.generate(prompt="A", prefix="support")
+    registry.clock.now += 30
+    api.generate(prompt="B", prefix="support")
+    registry.clock.now += 60
+    api.generate(prompt="C", prefix="support")
+
+    contexts = [body.get("context") for body in sent("/generate")]
+    assert contexts == [None, [1, 2, 3], [1, 2, 3], None, [4, 5, 6]]
+    assert registry.stats().invalidations == 1
+    # Both checks went through the client kept for the host
+    assert list(registry._model_apis) == [BASE_URL]
+
+
+@responses.activate
+def test_observed_model_lists_and_explicit_invalidation(registry):
+    mock_api_response("/generate", completion([1]))
+    registry.check_interval = None
+    api = GenerateAPI(model="test-model:latest", base_url=BASE_URL, prefixes=registry)
+    api.generate(prompt="A", prefix="support")
+    registry.observe_models(ModelTagList(**tags("sha-1")), BASE_URL)
+    registry.observe_models(ModelTagList(**tags("sha-1")), BASE_URL)
+    assert registry.stats().entries == 1
+
+    registry.observe_models(ModelTagList(**tags("sha-2")), BASE_URL + "/")
+    assert registry.stats().entries == 0
+    api.generate(prompt="B", prefix="support")
+    registry.invalidate(model="test-model", base_url="http://elsewhere/api")
+    assert registry.stats().entries == 1
+    registry.invalidate(model="test-model")
+    assert registry.stats().entries == 0
+
+
+@responses.activate
+def test_evaluations_bypass_the_semantic_cache_and_the_tracker(registry):
+    registry.check_interval = None
+    mock_api_response("/generate", completion([1, 2, 3]))
+    tracker = PerformanceTracker()
+    api = GenerateAPI(
+        model="test-model",
+        base_url=BASE_URL,
+        analytics=tracker,
+        semantic_cache=SemanticCache(EmbeddingAPI(model="embedder", base_url=BASE_URL)),
+    )
+
+    assert registry.context(api, "support") == [1, 2, 3]
+    assert [call.request.url for call in responses.calls] == [f"{BASE_URL}/generate"]
+    assert tracker.stats().models == []
+    assert api.semantic_cache.stats().lookups == 0
+
+
+def test_prefix_validation(registry):
+    api = GenerateAPI(model="test-model", base_url=BASE_URL, prefixes=registry)
+    with pytest.raises(KeyError):
+        api.generate(prompt="A", prefix="unknown")
+    with pytest.raises(ValueError):
+        api.generate(prompt="A", prefix="support", context=[1])
+    with pytest.raises(ValueError):
+        GenerateAPI(model="test-model", base_url=BASE_URL).generate(
+            prompt="A", prefix="support"
+        )
+
+
+@responses.activate
+def test_concurrent_first_calls_share_one_evaluation(registry):
+    registry.check_interval = None
+    release = threading.Event()
+
+    def slow_generate(request):
+        release.wait(2)
+        return 200, {}, json.dumps(completion([7]))
+
+    responses.add_callback(responses.POST, f"{BASE_URL}/generate", slow_generate)
+    api = GenerateAPI(model="test-model", base_url=BASE_URL)
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(registry.context(api, "support"))
+        )
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == [[7]] * 3
+    assert registry.stats().evaluations == 1
+
+
+@responses.activate
+def test_prefix_replaced_during_evaluation_is_not_stored(registry):
+    registry.check_interval = None
+
+    def replace_prefix(request):
+        registry.register("support", "New preamble")
+        return 200, {}, json.dumps(completion([7]))
+
+    responses.add_callback(responses.POST, f"{BASE_URL}/generate", replace_prefix)
+    api = GenerateAPI(model="test-model", base_url=BASE_URL)
+
+    assert registry.context(api, "support") == [7]
+    assert registry.stats().entries == 0
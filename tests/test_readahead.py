@@ -0,0 +1,157 @@
+import threading
+import time
+import pytest
+from ollama_python.endpoints.generate import GenerateAPI
+from ollama_python.endpoints.model_management import ModelManagementAPI
+from ollama_python.readahead import ReadAhead
+from ollama_python.stopping import StopSequences
+from tests.utils.server import StandInServer, chunk
+
+
+def tracked(items: list, closed: list, error: Exception = None):
+    try:
+        yield from items
+        if error is not None:
+            raise error
+    finally:
+        closed.append(True)
+
+
+def wait_for(condition, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def test_yields_every_item_in_order():
+    closed = []
+    stream = ReadAhead(tracked(list(range(50)), closed), max_items=8)
+
+    assert list(stream) == list(range(50))
+    stats = stream.stats()
+    assert stats.items == 50 and stats.queued == 0 and stats.done
+    assert 1 <= stats.high_water <= 8
+    assert closed == [True]
+    assert list(stream) == []
+
+
+def test_queue_is_bounded_and_reading_waits_for_the_consumer():
+    stream = ReadAhead(iter(range(10)), max_items=3)
+
+    assert next(stream) == 0
+    assert wait_for(lambda: stream.stats().queued == 3)
+    time.sleep(0.05)
+    stats = stream.stats()
+    assert stats.items == 4 and stats.high_water == 3 and stats.stalls >= 1
+    assert not stats.done
+
+    assert list(stream) == list(range(1, 10))
+    assert stream.stats().done
+
+
+def test_errors_are_raised_after_the_items_read_before_them():
+    closed = []
+    stream = ReadAhead(tracked([1, 2], closed, ValueError("broken")))
+
+    assert [next(stream), next(stream)] == [1, 2]
+    with pytest.raises(ValueError, match="broken"):
+        next(stream)
+    with pytest.raises(StopIteration):
+        next(stream)
+    assert closed == [True]
+
+
+class Source:
+    def __init__(self):
+        self.closed = 0
+
+    def __iter__(self):
+        return iter([1, 2])
+
+    def close(self):
+        self.closed += 1
+
+
+def test_close_before_reading_closes_the_source():
+    source = Source()
+    with ReadAhead(source) as stream:
+        pass
+    assert source.closed == 1
+    assert list(stream) == []
+    stream.close()
+    assert source.closed == 1
+
+
+def test_close_stops_reading_and_drops_queued_items():
+    closed = []
+    stream = ReadAhead(tracked(list(range(100)), closed), max_items=2)
+    assert next(stream) == 0
+    assert wait_for(lambda: stream.stats().queued == 2)
+
+    stream.close()
+    assert list(stream) == []
+    assert wait_for(lambda: closed == [True])
+    assert wait_for(lambda: stream.stats().done)
+    assert stream.stats().items < 100
+
+
+def test_max_items_must_be_positive():
+    with pytest.raises(ValueError):
+        ReadAhead(iter([]), max_items=0)
+
+
+def test_generate_reads_ahead_while_the_consumer_is_busy():
+    chunks = [chunk(str(i)) for i in range(20)] + [chunk("", done=True)]
+    with StandInServer(chunks=chunks) as server:
+        api = GenerateAPI(model="test-model", base_url=server.base_url, read_ahead=64)
+        stream = api.generate(prompt="test", stream=True)
+
+        assert isinstance(stream, ReadAhead)
+        assert next(stream).response == "0"
+        # The rest of the response is drained while the consumer is not reading
+        assert wait_for(lambda: stream.stats().done)
+        assert stream.stats().high_water >= 20
+        assert [item.response for item in stream] == [str(i) for i in range(1, 20)] + [
+            ""
+        ]
+
+
+def test_stop_conditions_run_ahead_of_the_consumer():
+    chunks = [chunk("a"), chunk("b"), chunk("STOP"), chunk("c", done=True)]
+    with StandInServer(chunks=chunks) as server:
+        api = GenerateAPI(model="test-model", base_url=server.base_url, read_ahead=4)
+        stream = api.generate(
+            prompt="test",
+            stream=True,
+            stop_when=[StopSequences(["STOP"])],
+        )
+        assert len(list(stream)) == 3
+
+
+def test_passthrough_and_model_management_streams_read_ahead():
+    with StandInServer(chunks=[chunk("a"), chunk("", done=True)]) as server:
+        api = GenerateAPI(model="test-model", base_url=server.base_url, read_ahead=4)
+        data = b"".join(api.generate(prompt="test", stream=True, passthrough="ndjson"))
+        assert data.count(b"\n") == 2
+
+        models = ModelManagementAPI(base_url=server.base_url, read_ahead=4)
+        assert isinstance(models.pull(name="test-model", stream=True), ReadAhead)
+
+
+def test_read_ahead_is_disabled_by_default():
+    api = GenerateAPI(model="test-model")
+    assert api.read_ahead is None
+    stream = iter([])
+    assert api._read_ahead(stream) is stream
+
+
+def test_abandoned_streams_are_closed():
+    closed = []
+    stream = ReadAhead(tracked(list(range(10)), closed), max_items=1)
+    next(stream)
+    del stream
+    assert wait_for(lambda: closed == [True])
+    assert threading.active_count() >= 1
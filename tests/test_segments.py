@@ -0,0 +1,159 @@
+import re
+import time
+from ollama_python.endpoints.generate import GenerateAPI
+from ollama_python.segments import Segment, SegmentStream, segments
+from tests.utils.server import StandInServer, chunk
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Source:
+    def __init__(self, fragments: list):
+        self.fragments = fragments
+        self.closed = 0
+
+    def __iter__(self):
+        return iter(self.fragments)
+
+    def close(self):
+        self.closed += 1
+
+
+def texts(stream) -> list[str]:
+    return [segment.text for segment in stream]
+
+
+def test_sentences_are_split_across_fragments():
+    fragments = ["Hel", "lo there", ". How are", " you? I am 3.", "14", " years old!"]
+    result = texts(segments(iter(fragments)))
+    assert result == ["Hello there. ", "How are you? ", "I am 3.14 years old!"]
+    assert "".join(result) == "".join(fragments)
+
+
+def test_lines_keep_whitespace_only_segments_for_the_next_segment():
+    result = texts(segments(iter(["a\nb", "c\n", "\nd"]), boundary="line"))
+    assert result == ["a\n", "bc\n", "\nd"]
+
+
+def test_custom_boundaries():
+    assert texts(segments(iter(["a, b", "; c"]), boundary=r"[,;]\s*")) == [
+        "a, ",
+        "b; ",
+        "c",
+    ]
+    pattern = re.compile(r"--")
+    # Without lookback boundaries split across fragments are missed
+    assert texts(segments(iter(["a-", "-b"]), boundary=pattern, lookback=0)) == ["a--b"]
+    assert texts(segments(iter(["a-", "-b"]), boundary=pattern)) == ["a--", "b"]
+
+
+def test_stages_can_be_chained():
+    lines = segments(iter(["One. Two", ".\nThree"]), boundary="line")
+    assert texts(segments(lines)) == ["One. ", "Two.\n", "Three"]
+
+
+def test_max_latency_flushes_up_to_the_last_whitespace():
+    clock = FakeClock()
+
+    def fragments():
+        yield "a long"
+        clock.now = 0.5
+        yield " sentence with"
+        clock.now = 1.5
+        yield "out an end"
+        yield "ing"
+
+    stream = SegmentStream(fragments(), max_latency=1.0, clock=clock)
+    segment = next(stream)
+    assert segment.forced and segment.text == "a long sentence without an "
+    assert segment.index == 0 and segment.elapsed == 1.5
+    assert texts(stream) == ["ending"]
+
+
+def test_max_latency_flush_without_whitespace_flushes_everything():
+    clock = FakeClock()
+
+    def fragments():
+        yield "   "
+        clock.now = 1.0
+        yield "abc"
+        yield "def"
+
+    stream = SegmentStream(fragments(), max_latency=1.0, clock=clock)
+    result = list(stream)
+    assert [(segment.text, segment.forced) for segment in result] == [
+        ("   abc", True),
+        ("def", False),
+    ]
+    assert stream.stats().forced == 1
+
+
+def test_whitespace_is_not_flushed_on_its_own():
+    clock = FakeClock()
+
+    def fragments():
+        yield "a "
+        clock.now = 2.0
+        yield " "
+        yield "b"
+
+    assert texts(SegmentStream(fragments(), max_latency=1.0, clock=clock)) == [
+        "a  ",
+        "b",
+    ]
+
+
+def test_stats_report_time_to_first_segment():
+    clock = FakeClock()
+
+    def fragments():
+        clock.now = 1.0
+        yield ""
+        yield "Hi"
+        clock.now = 3.0
+        yield ". Bye"
+
+    stream = SegmentStream(fragments(), clock=clock)
+    assert stream.stats().time_to_first_segment is None
+    assert texts(stream) == ["Hi. ", "Bye"]
+    stats = stream.stats()
+    assert stats.segments == 2 and stats.done
+    assert stats.time_to_first_fragment == 1.0
+    assert stats.time_to_first_segment == 3.0
+
+
+def test_close_closes_the_upstream_stream():
+    source = Source(["a. ", "b. "])
+    with segments(source) as stream:
+        pass
+    assert source.closed == 1
+
+    source = Source(["a. ", "b. "])
+    stream = segments(source)
+    assert next(stream).text == "a. "
+    stream.close()
+    assert source.closed == 1
+    assert list(stream) == []
+
+
+def test_long_segments_are_not_rebuffered():
+    start = time.perf_counter()
+    result = texts(segments(iter(["a"] * 200_000)))
+    assert result == ["a" * 200_000]
+    assert time.perf_counter() - start < 5
+
+
+def test_segments_of_streamed_completions():
+    chunks = [chunk("Hello"), chunk(" world."), chunk(" Bye"), chunk("", done=True)]
+    with StandInServer(chunks=chunks) as server:
+        api = GenerateAPI(model="test-model", base_url=server.base_url)
+        result = list(segments(api.generate(prompt="test", stream=True)))
+    assert [segment.text for segment in result] == ["Hello world. ", "Bye"]
+    assert all(isinstance(segment, Segment) for segment in result)
+    assert repr(result[0]) == "Segment('Hello world. ', index=0, forced=False)"
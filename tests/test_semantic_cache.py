@@ -0,0 +1,219 @@
+import json
+import sys
+import pytest
+import responses
+from ollama_python import semantic_cache
+from ollama_python.endpoints.embedding import EmbeddingAPI
+from ollama_python.endpoints.generate import GenerateAPI
+from ollama_python.history import MessageHistory
+from ollama_python.models.generate import Completion
+from ollama_python.models.metrics import SemanticCacheStats
+from ollama_python.semantic_cache import SemanticCache
+from tests.utils.utils import mock_api_response
+
+VECTORS = {
+    "What is the capital of France?": [1.0, 0.0, 0.0],
+    "Tell me the capital of France": [0.99, 0.1, 0.0],
+    "How tall is Mount Everest?": [0.0, 1.0, 0.0],
+    "user: Hello": [0.0, 0.0, 2.0],
+    "user: Hi there": [0.0, 0.1, 3.0],
+    "short": [1.0, 0.0],
+}
+
+COMPLETION = {
+    "model": "test-model",
+    "created_at": "2023-08-04T19:22:45.499127Z",
+    "done": True,
+    "context": [1, 2, 3],
+    "total_duration": 2000000000,
+    "load_duration": 0,
+    "prompt_eval_count": 1,
+    "prompt_eval_duration": 1,
+    "eval_count": 1,
+    "eval_duration": 1,
+}
+
+
+def embed(request):
+    prompt = json.loads(request.body)["prompt"]
+    return 200, {}, json.dumps({"embedding": VECTORS[prompt]})
+
+
+@pytest.fixture(autouse=True, params=["numpy", "python"])
+def search(request, monkeypatch):
+    """Run every test with the numpy search and with the pure Python fallback"""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setitem(sys.modules, "numpy", None)
+    monkeypatch.setattr(semantic_cache, "_numpy", None)
+
+
+@pytest.fixture
+def cache() -> SemanticCache:
+    responses.add_callback(
+        responses.POST, "http://test-servers/api/embedding", callback=embed
+    )
+    embedding_api = EmbeddingAPI(model="embedder", base_url="http://test-servers/api")
+    return SemanticCache(embedding_api, threshold=0.95, max_entries=2)
+
+
+@pytest.fixture
+def generate_api(cache) -> GenerateAPI:
+    return GenerateAPI(
+        model="test-model", base_url="http://test-servers/api", semantic_cache=cache
+    )
+
+
+def generate_calls() -> int:
+    return sum(call.request.url.endswith("/generate") for call in responses.calls)
+
+
+@responses.activate
+def test_similar_prompts_are_answered_from_the_cache(generate_api, cache):
+    mock_api_response("/generate", {**COMPLETION, "response": "Paris"})
+    first = generate_api.generate(prompt="What is the capital of France?")
+    second = generate_api.generate(prompt="Tell me the capital of France")
+
+    assert first.response == second.response == "Paris"
+    assert second is not first
+    assert generate_calls() == 1
+    assert cache.stats() == SemanticCacheStats(
+        entries=1, lookups=2, hits=1, hit_rate=0.5, saved_seconds=2.0
+    )
+
+
+@responses.activate
+def test_dissimilar_prompts_are_generated(generate_api, cache):
+    mock_api_response("/generate", {**COMPLETION, "response": "Paris"})
+    mock_api_response("/generate", {**COMPLETION, "response": "8849m"})
+    generate_api.generate(prompt="What is the capital of France?")
+    answer = generate_api.generate(prompt="How tall is Mount Everest?")
+
+    assert answer.response == "8849m"
+    assert generate_calls() == 2
+    assert cache.stats().hits == 0
+
+
+@responses.activate
+def test_prompts_are_only_compared_within_the_same_parameters(generate_api, cache):
+    mock_api_response("/generate", {**COMPLETION, "response": "Paris"})
+    mock_api_response("/generate", {**COMPLETION, "response": "PARIS"})
+    generate_api.generate(prompt="What is the capital of France?")
+    answer = generate_api.generate(
+        prompt="What is the capital of France?", system="Shout"
+    )
+
+    assert answer.response == "PARIS"
+    assert generate_calls() == 2
+
+
+@responses.activate
+def test_images_bypass_the_cache(generate_api, cache):
+    mock_api_response("/generate", {**COMPLETION, "response": "Paris"})
+    generate_api.generate(prompt="What is the capital of France?", images=[b"img"])
+
+    assert cache.stats().lookups == 0
+
+
+@responses.activate
+def test_least_recently_used_entries_are_evicted(generate_api, cache):
+    mock_api_response("/generate", {**COMPLETION, "response": "Paris"})
+    mock_api_response("/generate", {**COMPLETION, "response": "PARIS"})
+    mock_api_response("/generate", {**COMPLETION, "response": "8849m"})
+    generate_api.generate(prompt="What is the capital of France?")
+    generate_api.generate(prompt="What is the capital of France?", system="Shout")
+    # The hit makes the first entry the most recently used
+    generate_api.generate(prompt="Tell me the capital of France")
+    generate_api.generate(prompt="How tall is Mount Everest?")
+    answer = generate_api.generate(prompt="Tell me the capital of France")
+
+    assert answer.response == "Paris"
+    assert generate_calls() == 3
+    stats = cache.stats()
+    assert stats.entries == 2
+    assert stats.evictions == 1
+
+
+@responses.activate
+def test_chat_completions_compare_the_whole_conversation(generate_api, cache):
+    mock_api_response(
+        "/chat",
+        {**COMPLETION, "message": [{"role": "assistant", "content": "Hello!"}]},
+    )
+    first = generate_api.generate_chat_completion(
+        messages=[{"role": "user", "content": "Hello"}]
+    )
+    second = generate_api.generate_chat_completion(
+        messages=MessageHistory([{"role": "user", "content": "Hi there"}])
+    )
+    generate_api.generate_chat_completion(
+        messages=[{"role": "user", "content": "Hello", "images": [b"img"]}]
+    )
+
+    assert second.message == first.message
+    assert sum(call.request.url.endswith("/chat") for call in responses.calls) == 2
+    assert cache.stats().hits == 1
+
+
+@responses.activate
+def test_embeddings_of_another_size_never_match(cache):
+    cache.cached("scope", "What is the capital of France?", lambda: "unused")
+    assert cache.cached("scope", "short", lambda: "generated") == "generated"
+
+
+@responses.activate
+def test_failed_embeddings_generate_without_the_cache(cache):
+    responses.replace(responses.POST, "http://test-servers/api/embedding", status=500)
+
+    assert cache.cached("scope", "anything", lambda: "generated") == "generated"
+    assert cache.stats().embedding_errors == 1
+    assert cache.stats().entries == 0
+
+
+@responses.activate
+def test_evictions_keep_the_rest_of_the_scope(cache):
+    completion = Completion(**COMPLETION, response="cached")
+    for prompt in ["What is the capital of France?", "How tall is Mount Everest?"]:
+        cache.cached("scope", prompt, lambda: completion)
+    cache.cached("scope", "user: Hello", lambda: completion)
+
+    assert cache.cached("scope", "How tall is Mount Everest?", None) == completion
+    assert (
+        cache.cached("scope", "What is the capital of France?", lambda: "new") == "new"
+    )
+
+
+@responses.activate
+def test_entries_evicted_during_the_search_are_not_returned(cache, monkeypatch):
+    completion = Completion(**COMPLETION, response="cached")
+    cache.cached("scope", "What is the capital of France?", lambda: completion)
+    nearest = semantic_cache._nearest
+
+    def evicting(*args):
+        found = nearest(*args)
+        cache.clear()
+        return found
+
+    monkeypatch.setattr(semantic_cache, "_nearest", evicting)
+
+    assert (
+        cache.cached("scope", "Tell me the capital of France", lambda: "new") == "new"
+    )
+    assert cache.stats().hits == 0
+
+
+@responses.activate
+def test_clear(cache):
+    cache.cached("scope", "What is the capital of France?", lambda: "generated")
+    cache.clear()
+
+    assert cache.stats().entries == 0
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{"threshold": 1.5}, {"threshold": -2}, {"max_entries": 0}]
+)
+def test_invalid_settings(kwargs):
+    with pytest.raises(ValueError):
+        SemanticCache(EmbeddingAPI(model="embedder"), **kwargs)
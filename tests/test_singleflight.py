@@ -0,0 +1,239 @@
+import threading
+import pytest
+import responses
+from ollama_python.endpoints.embedding import EmbeddingAPI
+from ollama_python.endpoints.generate import GenerateAPI
+from ollama_python.models.generate import StreamCompletion
+from ollama_python.models.transport import Timeouts
+from ollama_python.singleflight import SingleFlight
+from ollama_python.transport import CancelHandle, DeadlineExceeded
+from tests.utils.server import StandInServer, chunk
+from tests.utils.utils import mock_api_response
+
+BASE_URL = "http://test-servers/api"
+
+
+def run_concurrently(count: int, target) -> list:
+    results = [None] * count
+
+    def run(index: int):
+        results[index] = target()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_concurrent_calls_share_one_upstream_call():
+    group = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def upstream():
+        calls.append(1)
+        release.wait(5)
+        return "result"
+
+    threads, results = run_concurrently(5, lambda: group.do("key", upstream))
+    while group.stats().shared < 4:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["result"] * 5
+    assert len(calls) == 1
+    assert group.stats().upstream == 1
+    assert group.stats().in_flight == 0
+
+
+def test_errors_are_shared_and_nothing_is_cached():
+    group = SingleFlight()
+    release = threading.Event()
+
+    def fail():
+        release.wait(5)
+        raise RuntimeError("boom")
+
+    def call():
+        try:
+            group.do("key", fail)
+        except RuntimeError as error:
+            return error
+
+    threads, results = run_concurrently(2, call)
+    while group.stats().shared < 1:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert group.do("key", lambda: 1) == 1
+    assert group.stats().upstream == 2
+
+
+def test_stream_is_fanned_out_to_late_subscribers():
+    group = SingleFlight()
+    opened = []
+
+    def upstream():
+        opened.append(1)
+        yield from range(3)
+
+    first = group.stream("key", upstream)
+    assert next(first) == 0
+    second = group.stream("key", upstream)
+
+    assert list(second) == [0, 1, 2]
+    assert list(first) == [1, 2]
+    assert len(opened) == 1
+    assert list(group.stream("key", upstream)) == [0, 1, 2]
+    assert len(opened) == 2
+
+
+def test_concurrent_stream_subscribers_wait_for_the_reader():
+    group = SingleFlight()
+    release = threading.Event()
+
+    def upstream():
+        release.wait(5)
+        yield from range(3)
+
+    threads, results = run_concurrently(3, lambda: list(group.stream("key", upstream)))
+    while group.stats().shared < 2:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == [[0, 1, 2]] * 3
+    assert group.stats().upstream == 1
+
+
+def test_abandoned_stream_closes_upstream():
+    group = SingleFlight()
+    closed = []
+
+    def upstream():
+        try:
+            yield from range(10)
+        finally:
+            closed.append(1)
+
+    stream = group.stream("key", upstream)
+    next(stream)
+    stream.close()
+
+    assert closed == [1]
+    assert group.stats().in_flight == 0
+
+
+def test_stream_errors_are_raised_to_every_subscriber():
+    group = SingleFlight()
+
+    def upstream():
+        yield 1
+        raise RuntimeError("boom")
+
+    first = group.stream("key", upstream)
+    second = group.stream("key", upstream)
+    assert next(first) == 1
+    with pytest.raises(RuntimeError):
+        list(first)
+    with pytest.raises(RuntimeError):
+        list(second)
+
+
+@responses.activate
+def test_generate_only_shares_deterministic_requests():
+    group = SingleFlight()
+    api = GenerateAPI(model="test-model", base_url=BASE_URL, single_flight=group)
+    mock_api_response(
+        "/generate",
+        [{"model": "test-model", "created_at": "now", "response": "A", "done": True}],
+        stream=True,
+    )
+
+    result = list(api.generate(prompt="test", options={"seed": 1}, stream=True))
+    assert isinstance(result[0], StreamCompletion)
+    assert group.stats().upstream == 1
+
+    list(api.generate(prompt="test", options={"temperature": 0.7}, stream=True))
+    assert group.stats().upstream == 1
+
+
+@responses.activate
+def test_embedding_uses_single_flight():
+    group = SingleFlight()
+    api = EmbeddingAPI(model="test-model", base_url=BASE_URL, single_flight=group)
+    mock_api_response("/embedding", {"embedding": [1.0, 2.0]})
+
+    assert api.get_embedding(prompt="test").embedding == [1.0, 2.0]
+    assert group.stats().upstream == 1
+
+
+def test_unserializable_parameters_are_not_shared():
+    api = GenerateAPI(
+        model="test-model", base_url=BASE_URL, single_flight=SingleFlight()
+    )
+
+    assert api._request_key("generate", {"images": [object()]}) is None
+
+
+def test_waiting_callers_keep_their_own_deadline():
+    group = SingleFlight()
+    release = threading.Event()
+
+    def upstream():
+        release.wait(5)
+        yield 1
+
+    leader = threading.Thread(target=lambda: group.do("call", release.wait))
+    leader.start()
+    while group.stats().in_flight < 1:
+        pass
+    with pytest.raises(DeadlineExceeded):
+        group.do("call", lambda: None, deadline=0.01)
+
+    stream = group.stream("stream", upstream)
+    reader = threading.Thread(target=lambda: list(stream))
+    reader.start()
+    while not group._streams.get("stream") or not group._streams["stream"].reading:
+        pass
+    with pytest.raises(DeadlineExceeded):
+        list(group.stream("stream", upstream, deadline=0.01))
+
+    release.set()
+    leader.join()
+    reader.join()
+
+
+def test_calls_with_a_cancel_handle_are_not_shared():
+    group = SingleFlight()
+    with StandInServer(chunks=[chunk("A", done=True)], header_delay=0.3) as server:
+        api = GenerateAPI(
+            model="test-model", base_url=server.base_url, single_flight=group
+        )
+        threads, results = run_concurrently(
+            2,
+            lambda: api.generate(
+                prompt="test", options={"seed": 1}, stream=True, cancel=CancelHandle()
+            ),
+        )
+        for thread in threads:
+            thread.join()
+        for stream in results:
+            list(stream)
+        list(
+            api.generate(
+                prompt="test",
+                options={"seed": 1},
+                stream=True,
+                timeouts=Timeouts(deadline=5),
+            )
+        )
+
+        assert len(server.requests) == 3
+    assert group.stats().upstream == 1
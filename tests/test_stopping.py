@@ -0,0 +1,152 @@
+import pytest
+import responses
+from ollama_python.endpoints.generate import GenerateAPI
+from ollama_python.stopping import (
+    JsonComplete,
+    RegexStop,
+    StopCondition,
+    StopSequences,
+    TokenBudget,
+    stop_early,
+)
+from tests.utils.server import StandInServer, chunk
+from tests.utils.utils import mock_api_response
+
+
+def feed_all(condition, fragments: list[str]) -> list[bool]:
+    return [condition.feed(fragment) for fragment in fragments]
+
+
+def test_stop_sequences_match_across_fragments():
+    condition = StopSequences(["World", "xyz"])
+
+    assert feed_all(condition, ["Hel", "lo Wo", "rld", "!"]) == [
+        False,
+        False,
+        True,
+        False,
+    ]
+    assert condition.matched == "World"
+
+
+@pytest.mark.parametrize(
+    "sequences, fragments, matched",
+    [
+        (["abab"], ["aba", "bab"], "abab"),
+        (["she", "he", "hers"], ["us", "he"], "she"),
+        (["hers", "is"], ["h", "i", "s"], "is"),
+        (["abcx", "bcy"], ["abcbc", "y"], "bcy"),
+    ],
+)
+def test_stop_sequences_follow_failure_links(sequences, fragments, matched):
+    condition = StopSequences(sequences)
+
+    assert any(feed_all(condition, fragments))
+    assert condition.matched == matched
+
+
+def test_stop_sequences_require_a_sequence():
+    with pytest.raises(ValueError):
+        StopSequences([])
+    with pytest.raises(ValueError):
+        StopSequences([""])
+
+
+def test_regex_matches_across_fragments():
+    condition = RegexStop(r"Answer: \d+", window=16)
+
+    assert feed_all(condition, ["The Ans", "wer: ", "42"]) == [False, False, True]
+    assert condition.match.group() == "Answer: 42"
+
+
+def test_json_complete_ignores_brackets_in_strings():
+    condition = JsonComplete()
+
+    assert feed_all(condition, ['{"a": "}', '\\"]", "b": [1, ', "2]", "}", "{"]) == [
+        False,
+        False,
+        False,
+        True,
+        False,
+    ]
+
+
+def test_token_budget():
+    condition = TokenBudget(max_tokens=2)
+
+    assert feed_all(condition, ["a", "b"]) == [False, True]
+    with pytest.raises(ValueError):
+        TokenBudget(max_tokens=0)
+
+
+def test_stop_early_closes_the_stream():
+    closed = []
+
+    def stream():
+        try:
+            yield from ["a", "b", "c"]
+        finally:
+            closed.append(True)
+
+    assert list(stop_early(stream(), [lambda text: text == "b"], text=str)) == [
+        "a",
+        "b",
+    ]
+    assert closed == [True]
+
+
+def test_generate_closes_the_connection_when_a_condition_fires():
+    chunks = [chunk(str(i)) for i in range(100)] + [chunk("", done=True)]
+    with StandInServer(chunks=chunks, chunk_delay=0.01) as server:
+        api = GenerateAPI(model="test-model", base_url=server.base_url)
+        results = list(
+            api.generate(prompt="test", stream=True, stop_when=[StopSequences(["23"])])
+        )
+
+        assert [result.response for result in results] == ["0", "1", "2", "3"]
+        assert server.disconnected.wait(2)
+
+
+@responses.activate
+def test_chat_stop_conditions():
+    message = {"model": "test-model", "created_at": "now", "done": False}
+    mock_api_response(
+        "/chat",
+        [
+            {**message, "message": [{"role": "assistant", "content": "Hi"}]},
+            {**message, "message": [{"role": "assistant", "content": "there"}]},
+            {**message, "done": True},
+        ],
+        stream=True,
+    )
+    api = GenerateAPI(model="test-model", base_url="http://test-servers/api")
+    results = list(
+        api.generate_chat_completion(
+            messages=[{"role": "user", "content": "Hello"}],
+            stream=True,
+            stop_when=[TokenBudget(max_tokens=2)],
+        )
+    )
+
+    assert len(results) == 2
+
+
+def test_stop_conditions_require_streaming():
+    api = GenerateAPI(model="test-model", base_url="http://test-servers/api")
+    with pytest.raises(ValueError):
+        api.generate(prompt="test", stop_when=[TokenBudget(max_tokens=1)])
+    with pytest.raises(ValueError):
+        api.generate_chat_completion(
+            messages=[{"role": "user", "content": "Hello"}],
+            stop_when=[TokenBudget(max_tokens=1)],
+        )
+
+
+def test_stop_condition_must_implement_feed():
+    class Incomplete(StopCondition):
+        pass
+
+    with pytest.raises(TypeError):
+        StopCondition()
+    with pytest.raises(TypeError):
+        Incomplete()
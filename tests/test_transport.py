@@ -0,0 +1,155 @@
+import socket
+import threading
+import time
+import pytest
+import requests
+from ollama_python.endpoints.generate import GenerateAPI
+from ollama_python.models.generate import StreamCompletion
+from ollama_python.models.transport import Timeouts
+from ollama_python.transport import (
+    Call,
+    CancelHandle,
+    DeadlineExceeded,
+    FirstTokenTimeout,
+    InterTokenTimeout,
+    RequestCancelled,
+)
+from tests.utils.server import StandInServer, chunk, elapsed
+
+SLOW_STREAM = [chunk(str(i)) for i in range(100)] + [chunk("", done=True)]
+
+
+def test_stream_through_local_server():
+    with StandInServer(chunks=[chunk("A"), chunk("B", done=True)]) as server:
+        api = GenerateAPI(model="test-model", base_url=server.base_url)
+        results = list(
+            api.generate(
+                prompt="test",
+                stream=True,
+                timeouts=Timeouts(connect=1, first_token=1, inter_token=1),
+            )
+        )
+
+    assert [result.response for result in results] == ["A", "B"]
+    assert all(isinstance(result, StreamCompletion) for result in results)
+
+
+def test_first_token_timeout():
+    with StandInServer(header_delay=2) as server:
+        api = GenerateAPI(model="test-model", base_url=server.base_url)
+        start = time.monotonic()
+        with pytest.raises(FirstTokenTimeout):
+            list(
+                api.generate(
+                    prompt="test", stream=True, timeouts=Timeouts(first_token=0.2)
+                )
+            )
+
+    assert elapsed(start) < 1.5
+
+
+def test_inter_token_timeout():
+    with StandInServer(chunks=SLOW_STREAM, stall_after=1) as server:
+        api = GenerateAPI(
+            model="test-model",
+            base_url=server.base_url,
+            timeouts=Timeouts(first_token=2, inter_token=0.2),
+        )
+        stream = api.generate(prompt="test", stream=True)
+        assert next(stream).response == "0"
+        with pytest.raises(InterTokenTimeout):
+            next(stream)
+
+
+def test_deadline_closes_the_stream():
+    with StandInServer(chunks=SLOW_STREAM, chunk_delay=0.05) as server:
+        api = GenerateAPI(model="test-model", base_url=server.base_url)
+        start = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            list(
+                api.generate(
+                    prompt="test", stream=True, timeouts=Timeouts(deadline=0.3)
+                )
+            )
+
+        assert elapsed(start) < 1.5
+        assert server.disconnected.wait(2)
+
+
+def test_deadline_of_blocking_call():
+    with StandInServer(header_delay=2) as server:
+        api = GenerateAPI(model="test-model", base_url=server.base_url)
+        with pytest.raises(DeadlineExceeded):
+            api.generate(prompt="test", timeouts=Timeouts(deadline=0.2))
+
+
+def test_cancel_stream_from_another_thread():
+    with StandInServer(chunks=SLOW_STREAM, chunk_delay=0.05) as server:
+        api = GenerateAPI(model="test-model", base_url=server.base_url)
+        handle = CancelHandle()
+        stream = api.generate(prompt="test", stream=True, cancel=handle)
+        next(stream)
+
+        threading.Timer(0.1, handle.cancel).start()
+        start = time.monotonic()
+        with pytest.raises(RequestCancelled):
+            list(stream)
+
+        assert elapsed(start) < 1.5
+        assert server.disconnected.wait(2)
+        assert handle.cancelled
+
+
+def test_cancel_blocking_call_waiting_for_headers():
+    with StandInServer(header_delay=3) as server:
+        api = GenerateAPI(model="test-model", base_url=server.base_url)
+        handle = CancelHandle()
+        threading.Timer(0.2, handle.cancel).start()
+        start = time.monotonic()
+        with pytest.raises(RequestCancelled):
+            api.generate(prompt="test", cancel=handle)
+
+        assert elapsed(start) < 2
+
+
+def test_cancelled_handle_never_sends_the_request():
+    with StandInServer() as server:
+        api = GenerateAPI(model="test-model", base_url=server.base_url)
+        handle = CancelHandle()
+        handle.cancel()
+        with pytest.raises(RequestCancelled):
+            list(api.generate(prompt="test", stream=True, cancel=handle))
+
+    assert server.requests == []
+
+
+def test_invalid_timeouts():
+    with pytest.raises(ValueError):
+        Timeouts(first_token=0)
+
+
+class FakeConnection:
+    def __init__(self, sock):
+        self.sock = sock
+
+
+def test_cancel_handle_shuts_down_connections_attached_late():
+    left, right = socket.socketpair()
+    handle = CancelHandle()
+    handle.cancel(reason="user went away")
+    handle._attach(FakeConnection(left))
+
+    assert right.recv(1) == b""
+    with pytest.raises(RequestCancelled, match="user went away"):
+        handle.raise_if_cancelled()
+
+    left.close()
+    right.close()
+    handle.cancel()
+    handle._attach(FakeConnection(None))
+
+
+def test_read_timeout_of_blocking_call_is_a_deadline():
+    with pytest.raises(DeadlineExceeded):
+        with Call(Timeouts(deadline=5)):
+            raise requests.exceptions.ReadTimeout()
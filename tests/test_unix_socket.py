@@ -0,0 +1,110 @@
+import socket
+import pytest
+import requests
+from ollama_python import transport
+from ollama_python.endpoints.embedding import EmbeddingAPI
+from ollama_python.endpoints.generate import GenerateAPI
+from ollama_python.endpoints.model_management import ModelManagementAPI
+from ollama_python.models.transport import Timeouts
+from ollama_python.transport import CancelHandle, RequestCancelled, unix_socket_url
+from tests.utils.server import StandInServer, chunk
+
+COMPLETION = {
+    **chunk("Hello", done=True),
+    "context": [1],
+    "total_duration": 1,
+    "load_duration": 1,
+    "prompt_eval_duration": 1,
+    "eval_count": 1,
+    "eval_duration": 1,
+}
+
+
+@pytest.fixture
+def socket_path(tmp_path) -> str:
+    return str(tmp_path / "ollama.sock")
+
+
+def test_unix_socket_url():
+    assert (
+        unix_socket_url("/var/run/ollama.sock", "http://localhost:11434/api")
+        == "http+unix://%2Fvar%2Frun%2Follama.sock/api"
+    )
+
+
+def test_streaming_over_a_unix_socket(socket_path):
+    with StandInServer(
+        chunks=[chunk("A"), chunk("B", done=True)], unix_socket=socket_path
+    ) as server:
+        api = GenerateAPI(model="test-model", base_url=server.base_url)
+        results = list(
+            api.generate(prompt="test", stream=True, timeouts=Timeouts(first_token=1))
+        )
+        bodies = list(api.generate(prompt="test", stream=True, passthrough="ndjson"))
+
+    assert [result.response for result in results] == ["A", "B"]
+    assert len(bodies) == 2
+
+
+def test_explicit_socket_path_for_every_endpoint(socket_path):
+    with StandInServer(chunks=[COMPLETION], unix_socket=socket_path):
+        generate = GenerateAPI(model="test-model", socket_path=socket_path)
+        assert generate.base_url.startswith("http+unix://")
+        assert generate.generate(prompt="test").response == "Hello"
+
+        management = ModelManagementAPI(socket_path=socket_path)
+        assert management.list_local_models().models == []
+        assert management.check_blob_exists("sha256:0") == 200
+        # The socket path is not sent as the Host header
+        assert (
+            management.session.get(f"{management.base_url}/tags").json()["host"]
+            == "localhost"
+        )
+
+
+def test_embedding_over_a_unix_socket(socket_path):
+    with StandInServer(chunks=[{"embedding": [0.5]}], unix_socket=socket_path):
+        api = EmbeddingAPI(model="test-model", socket_path=socket_path)
+        assert api.get_embedding(prompt="test").embedding == [0.5]
+
+
+def test_cancelling_a_unix_socket_stream(socket_path):
+    slow = [chunk(str(i)) for i in range(100)]
+    with StandInServer(
+        chunks=slow, chunk_delay=0.05, unix_socket=socket_path
+    ) as server:
+        api = GenerateAPI(model="test-model", socket_path=socket_path)
+        handle = CancelHandle()
+        stream = api.generate(prompt="test", stream=True, cancel=handle)
+        next(stream)
+        handle.cancel()
+        with pytest.raises(RequestCancelled):
+            list(stream)
+
+        assert server.disconnected.wait(2)
+
+
+def test_missing_socket(socket_path):
+    api = GenerateAPI(model="test-model", socket_path=socket_path)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        api.generate(prompt="test")
+
+
+def test_unix_socket_connect_timeout(socket_path, monkeypatch):
+    class SlowSocket:
+        def __init__(self, *args):
+            self.closed = False
+
+        def settimeout(self, timeout):
+            pass
+
+        def connect(self, path):
+            raise socket.timeout()
+
+        def close(self):
+            self.closed = True
+
+    monkeypatch.setattr(transport.socket, "socket", SlowSocket)
+    api = GenerateAPI(model="test-model", socket_path=socket_path)
+    with pytest.raises(requests.exceptions.ConnectTimeout):
+        api.generate(prompt="test", timeouts=Timeouts(connect=0.1))
@@ -0,0 +1,147 @@
+import json
+import pytest
+import responses
+from ollama_python.models.generate import Completion, StreamCompletion
+from ollama_python.warmup import WarmupScheduler
+from tests.utils.utils import mock_api_response
+
+BASE_URL = "http://test-servers/api"
+
+
+def completion(load_duration: int = 1_000_000) -> dict:
+    return {
+        "model": "test-model",
+        "created_at": "2023-08-04T19:22:45.499127Z",
+        "response": "A",
+        "done": True,
+        "context": [1, 2, 3],
+        "total_duration": 2_000_000_000,
+        "load_duration": load_duration,
+        "prompt_eval_count": 2,
+        "prompt_eval_duration": 1000,
+        "eval_count": 1,
+        "eval_duration": 1000,
+    }
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def scheduler(clock) -> WarmupScheduler:
+    scheduler = WarmupScheduler(interval=100, min_interval=10, clock=clock)
+    scheduler.add_target(model="test-model", base_url=f"{BASE_URL}/")
+    return scheduler
+
+
+@responses.activate
+def test_warmup_is_due_immediately_and_then_after_interval(scheduler, clock):
+    mock_api_response("/generate", completion())
+
+    assert scheduler.run_pending() == 1
+    body = json.loads(responses.calls[0].request.body)
+    assert body["keep_alive"] == "5m"
+    assert body["options"] == {"num_predict": 1}
+
+    clock.now += 99
+    assert scheduler.run_pending() == 0
+    clock.now += 1
+    assert scheduler.run_pending() == 1
+
+    stats = scheduler.stats()
+    assert stats.warmups == 2
+    assert stats.warmup_seconds == 4.0
+    assert stats.warmup_tokens == 6
+
+
+@responses.activate
+def test_observed_traffic_defers_warmup(scheduler, clock):
+    mock_api_response("/generate", completion())
+    scheduler.run_pending()
+
+    clock.now += 90
+    scheduler.observe(Completion(**completion()), base_url=BASE_URL)
+    clock.now += 20
+    assert scheduler.run_pending() == 0
+
+    stats = scheduler.stats()
+    assert stats.observed == 1
+    assert stats.hit_rate == 1.0
+
+
+@responses.activate
+def test_load_spike_shortens_interval(scheduler, clock):
+    mock_api_response("/generate", completion(load_duration=3_000_000_000))
+    scheduler.run_pending()
+
+    scheduler.observe(
+        Completion(**completion(load_duration=3_000_000_000)), base_url=BASE_URL
+    )
+    stats = scheduler.stats()
+    assert stats.evictions == 1
+    assert stats.cold_starts == 1
+    assert stats.hit_rate == 0.0
+    assert stats.targets[0].next_warmup_at == clock.now + 25
+
+
+@responses.activate
+def test_preload_warms_before_known_traffic(scheduler, clock):
+    mock_api_response("/generate", completion())
+    scheduler.run_pending()
+
+    scheduler.add_preload(at=clock.now + 60, base_url=BASE_URL)
+    clock.now += 20
+    assert scheduler.run_pending() == 0
+    clock.now += 10
+    assert scheduler.run_pending() == 1
+
+
+@responses.activate
+def test_failed_warmup_is_counted(scheduler):
+    mock_api_response("/generate", status=500)
+    scheduler.run_pending()
+
+    stats = scheduler.stats()
+    assert stats.warmups == 1
+    assert stats.failures == 1
+
+
+def test_unknown_targets_and_stream_chunks_are_ignored(scheduler):
+    scheduler.observe(
+        StreamCompletion(
+            model="test-model", created_at="now", response="A", done=False
+        ),
+        base_url=BASE_URL,
+    )
+    scheduler.observe(
+        Completion(**{**completion(), "model": "other-model"}), base_url=BASE_URL
+    )
+    scheduler.remove_target(model="test-model", base_url=BASE_URL)
+    scheduler.observe(Completion(**completion()), base_url=BASE_URL)
+
+    assert scheduler.stats().observed == 0
+
+
+def test_invalid_intervals():
+    with pytest.raises(ValueError):
+        WarmupScheduler(interval=5, min_interval=10)
+
+
+@responses.activate
+def test_background_thread(scheduler):
+    mock_api_response("/generate", completion())
+    with scheduler:
+        scheduler.start()
+    scheduler.stop()
+
+    assert scheduler.stats().warmups == 1
@@ -0,0 +1,17 @@
+import time
+from typing import Optional
+
+from ollama_python.fakeserver import FakeServer, chunk
+
+
+class StandInServer(FakeServer):
+    """The fake server replaying scripted NDJSON chunks, a single final chunk by default"""
+
+    def __init__(self, chunks: Optional[list[dict]] = None, **kwargs):
+        super().__init__(
+            chunks=chunks if chunks is not None else [chunk("A", done=True)], **kwargs
+        )
+
+
+def elapsed(start: float) -> float:
+    return time.monotonic() - start